@@ -3,6 +3,7 @@ import os
 from datetime import timedelta
 from dotenv import load_dotenv
 import dj_database_url
+from celery.schedules import crontab
 
 load_dotenv()
 
@@ -37,6 +38,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'core.instrumentation.QueryBudgetMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -46,6 +48,18 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# Query instrumentation, see core.instrumentation. Budgets are keyed by URL name.
+QUERY_SAMPLE_RATE = float(os.getenv('QUERY_SAMPLE_RATE', '1.0' if DEBUG else '0.05'))
+QUERY_BUDGET_DEFAULT = int(os.getenv('QUERY_BUDGET_DEFAULT', '4'))
+QUERY_DUPLICATE_LIMIT = 1
+QUERY_BUDGETS = {
+    'dashboard-summary': 5,
+    'project-weekly-reports': 6,
+    # Scope, page, subtask and dependency prefetches, plus the validators aggregate when paginated
+    'task-list': 5,
+    'task-changes': 6,
+}
+
 ROOT_URLCONF = 'config.urls'
 
 TEMPLATES = [
@@ -132,16 +146,23 @@ CORS_ALLOWED_ORIGINS = [origin.strip() for origin in cors_origins.split(',') if
 # DRF Configuration
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        # simplejwt's JWTAuthentication with the user row cached; see core.authentication
+        'core.authentication.CachedJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
     ),
+    # Opt-in keyset pagination: lists are paginated when ?cursor= or ?page_size= is sent
+    'DEFAULT_PAGINATION_CLASS': 'core.pagination.KeysetPagination',
+    'PAGE_SIZE': int(os.getenv('API_PAGE_SIZE', '50')),
 }
 
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(minutes=60),
     'REFRESH_TOKEN_LIFETIME': timedelta(days=1),
+    # Adds role, name and avatar claims
+    'TOKEN_OBTAIN_SERIALIZER': 'core.authentication.TokenObtainPairSerializer',
+    'TOKEN_REFRESH_SERIALIZER': 'core.authentication.TokenRefreshSerializer',
 }
 
 # Email Configuration using Anymail + Mailtrap
@@ -151,6 +172,22 @@ ANYMAIL = {
 EMAIL_BACKEND = 'anymail.backends.mailtrap.EmailBackend'
 DEFAULT_FROM_EMAIL = "notifications@researchintelligence.com"
 
+# Cache: the shared Redis instance when REDIS_URL is set, per-process memory otherwise
+REDIS_URL = os.getenv('REDIS_URL', '')
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
 # Celery Configuration
 CELERY_BROKER_URL = 'redis://127.0.0.1:6379' 
 CELERY_RESULT_BACKEND = 'django-db'  
@@ -158,6 +195,28 @@ CELERY_ACCEPT_CONTENT = ['application/json']
 CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
 CELERY_TIMEZONE = 'Africa/Nairobi'
+CELERY_BEAT_SCHEDULE = {
+    # Directors open every project report on Monday morning; build them all beforehand
+    'warm-weekly-reports': {
+        'task': 'core.tasks.warm_weekly_reports',
+        'schedule': crontab(hour=6, minute=0, day_of_week='mon'),
+    },
+    # Safety net for outbox emails whose wake-up task was lost or are due for retry
+    'drain-email-outbox': {
+        'task': 'core.tasks.drain_email_outbox',
+        'schedule': 60.0,
+    },
+    # Just after midnight, once yesterday's due dates have passed
+    'mark-overdue-tasks': {
+        'task': 'core.tasks.mark_overdue_tasks',
+        'schedule': crontab(hour=0, minute=5),
+    },
+    # Sync tokens older than the retention window get 410 and reload
+    'prune-change-log': {
+        'task': 'core.tasks.prune_change_log',
+        'schedule': crontab(hour=3, minute=30),
+    },
+}
 
 # Email Configuration
 EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
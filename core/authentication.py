@@ -0,0 +1,99 @@
+"""
+JWT authentication without a user query per request.
+
+``CachedJWTAuthentication`` resolves the token's user from ``UserCache``, a
+short-lived cache of the ``User`` row. The row is loaded from the database
+only on a miss. Every save or delete of a user drops its entry (see
+``core.signals``), so role changes and deactivations apply on the next
+request. Queryset ``update()`` calls on users bypass those signals and are
+only picked up when the entry expires.
+
+The cached row leaves out the password hash. The ``User`` built from it
+treats the hash as a deferred field: reading it costs a query, and ``save()``
+only writes the fields that were loaded or set.
+
+Tokens also carry ``role``, ``name`` and ``avatar`` claims so clients can
+render the signed-in user without calling ``/me/``. They are display hints
+only; permissions always use the cached row. Refreshing a token re-stamps
+them from the current row.
+"""
+from django.core.cache import cache
+from django.db import router
+from django.utils.translation import gettext_lazy as _
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.serializers import (
+    TokenObtainPairSerializer as BaseTokenObtainPairSerializer,
+    TokenRefreshSerializer as BaseTokenRefreshSerializer,
+)
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken
+from .models import User
+
+USER_CACHE_TIMEOUT = 5 * 60
+CACHED_FIELDS = tuple(field.attname for field in User._meta.concrete_fields if field.attname != 'password')
+
+
+class UserCache:
+    @staticmethod
+    def cache_key(user_id):
+        return f'auth:user:{user_id}'
+
+    @classmethod
+    def get(cls, user_id):
+        """The ``User`` with ``user_id`` (password deferred), or ``None`` if there is none."""
+        key = cls.cache_key(user_id)
+        values = cache.get(key)
+        if values is None:
+            values = User.objects.filter(pk=user_id).values_list(*CACHED_FIELDS).first()
+            if values is None:
+                return None
+            cache.set(key, values, USER_CACHE_TIMEOUT)
+        return User.from_db(router.db_for_read(User), CACHED_FIELDS, values)
+
+    @classmethod
+    def invalidate(cls, user_id):
+        cache.delete(cls.cache_key(user_id))
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    def get_user(self, validated_token):
+        if api_settings.CHECK_REVOKE_TOKEN:
+            # Comparing password hashes needs the full row
+            return super().get_user(validated_token)
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_('Token contained no recognizable user identification'))
+
+        user = UserCache.get(user_id)
+        if user is None:
+            raise AuthenticationFailed(_('User not found'), code='user_not_found')
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_('User is inactive'), code='user_inactive')
+        return user
+
+
+def add_user_claims(token, user):
+    token['role'] = user.role
+    token['name'] = user.get_full_name() or user.username
+    token['avatar'] = user.avatar
+    return token
+
+
+class TokenObtainPairSerializer(BaseTokenObtainPairSerializer):
+    @classmethod
+    def get_token(cls, user):
+        return add_user_claims(super().get_token(user), user)
+
+
+class TokenRefreshSerializer(BaseTokenRefreshSerializer):
+    def validate(self, attrs):
+        data = super().validate(attrs)
+        # Claims copied from the refresh token may predate a role change
+        access = AccessToken(data['access'])
+        user = UserCache.get(access[api_settings.USER_ID_CLAIM])
+        if user is not None:
+            data['access'] = str(add_user_claims(access, user))
+        return data
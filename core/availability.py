@@ -0,0 +1,142 @@
+"""
+Attendee availability and event conflicts.
+
+``IntervalIndex.load`` reads every event in a time window that any of the
+given users owns or attends with one query. It then keeps each user's busy
+intervals sorted by start, with a running maximum of their ends. Overlap
+lookups bisect on the start and walk back only while an earlier interval can
+still reach the query start.
+
+The index answers two questions:
+
+* ``conflicts``: who is already booked during an event (reported when events
+  are created or updated);
+* ``free_slots``: the earliest slots of a given length when all the users are
+  free, within working hours (``GET /events/availability/``).
+
+Only times and event ids are exposed, never titles, because the other users'
+events need not be visible to the person scheduling.
+"""
+import math
+from bisect import bisect_left
+from datetime import datetime, time, timedelta
+from django.db.models import Q
+from .models import Event
+
+DEFAULT_WINDOW = timedelta(days=14)
+MAX_WINDOW = timedelta(days=31)
+MAX_USERS = 50
+SLOT_STEP = timedelta(minutes=15)
+WORKDAY = (time(8), time(17))
+
+
+def _round_up(moment, step=SLOT_STEP):
+    seconds = step.total_seconds()
+    return datetime.fromtimestamp(math.ceil(moment.timestamp() / seconds) * seconds, tz=moment.tzinfo)
+
+
+def merge(intervals):
+    """Union of ``(start, end)`` pairs as sorted, non-overlapping pairs."""
+    merged = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+class IntervalIndex:
+    def __init__(self, busy):
+        """``busy``: ``{user id: iterable of (start, end, event id)}``."""
+        self.intervals, self.starts, self.max_ends = {}, {}, {}
+        for user_id, intervals in busy.items():
+            intervals = sorted(set(intervals))
+            self.intervals[user_id] = intervals
+            self.starts[user_id] = [interval[0] for interval in intervals]
+            running, max_ends = None, []
+            for _, end, _ in intervals:
+                running = end if running is None else max(running, end)
+                max_ends.append(running)
+            self.max_ends[user_id] = max_ends
+
+    @classmethod
+    def load(cls, user_ids, start, end, exclude_event=None):
+        user_ids = set(user_ids)
+        queryset = (
+            Event.objects.filter(start_date__lt=end, end_date__gt=start)
+            .filter(Q(owner_id__in=user_ids) | Q(attendees__in=user_ids))
+        )
+        if exclude_event is not None:
+            queryset = queryset.exclude(pk=exclude_event)
+        busy = {user_id: [] for user_id in user_ids}
+        rows = queryset.values_list('id', 'start_date', 'end_date', 'owner_id', 'attendees')
+        for event_id, event_start, event_end, owner_id, attendee_id in rows:
+            if event_end <= event_start:
+                # Deadlines and other zero-length events don't block anyone's time
+                continue
+            for user_id in {owner_id, attendee_id} & user_ids:
+                busy[user_id].append((event_start, event_end, event_id))
+        return cls(busy)
+
+    def overlapping(self, user_id, start, end):
+        """Intervals of ``user_id`` that overlap ``[start, end)``, in start order."""
+        intervals = self.intervals.get(user_id, [])
+        found = []
+        # Everything from here on starts too late
+        index = bisect_left(self.starts.get(user_id, []), end) - 1
+        while index >= 0 and self.max_ends[user_id][index] > start:
+            if intervals[index][1] > start:
+                found.append(intervals[index])
+            index -= 1
+        return found[::-1]
+
+    def conflicts(self, user_ids, start, end):
+        return [
+            {'user': user_id, 'event': event_id, 'start_date': busy_start, 'end_date': busy_end}
+            for user_id in sorted(user_ids)
+            for busy_start, busy_end, event_id in self.overlapping(user_id, start, end)
+        ]
+
+    def busy(self, user_id):
+        return merge((start, end) for start, end, _ in self.intervals.get(user_id, []))
+
+    def free_slots(self, user_ids, start, end, duration, limit, tz, workday=WORKDAY, weekends=False):
+        """
+        The earliest ``limit`` slots of ``duration`` in ``[start, end)`` when none
+        of ``user_ids`` is busy. Slots start on ``SLOT_STEP`` boundaries within
+        ``workday`` hours in ``tz``.
+        """
+        busy = merge(
+            (busy_start, busy_end) for user_id in user_ids for busy_start, busy_end, _ in self.intervals.get(user_id, [])
+        )
+        slots, position = [], 0
+        day = start.astimezone(tz).date()
+        while len(slots) < limit and day <= end.astimezone(tz).date():
+            opens = max(start, datetime.combine(day, workday[0], tzinfo=tz))
+            closes = min(end, datetime.combine(day, workday[1], tzinfo=tz))
+            day += timedelta(days=1)
+            if opens >= closes or (not weekends and opens.astimezone(tz).weekday() >= 5):
+                continue
+            # Busy intervals that ended before today opened are behind us for good
+            while position < len(busy) and busy[position][1] <= opens:
+                position += 1
+            cursor, index = opens, position
+            while len(slots) < limit and cursor < closes:
+                gap_end = min(closes, busy[index][0]) if index < len(busy) else closes
+                slot = _round_up(cursor)
+                while len(slots) < limit and slot + duration <= gap_end:
+                    slots.append((slot, slot + duration))
+                    slot += duration
+                if index >= len(busy) or busy[index][0] >= closes:
+                    break
+                cursor = max(cursor, busy[index][1])
+                index += 1
+        return slots
+
+
+def event_conflicts(event):
+    """Other events that the owner or attendees of ``event`` are booked into at the same time."""
+    participants = {event.owner_id, *event.attendees.values_list('id', flat=True)}
+    index = IntervalIndex.load(participants, event.start_date, event.end_date, exclude_event=event.pk)
+    return index.conflicts(participants, event.start_date, event.end_date)
@@ -0,0 +1,197 @@
+"""
+Endpoint load benchmarks.
+
+``EndpointBenchmark`` runs every GET endpoint of the API in-process, through
+the full middleware stack, as the busiest user of each role. The endpoints are:
+
+* each argument-free route in ``core/urls.py`` (lists with ``?page_size=``), and
+* each viewset's ``retrieve`` and detail GET actions, against the first row
+  that role's list returns.
+
+For every (role, endpoint) it records latency percentiles over
+``iterations`` timed runs, queries and DB time (from ``QueryProfile``), and
+the peak Python allocation of one extra run under ``tracemalloc``. Results are
+written as JSON together with the git commit and the row counts of the
+dataset. ``compare`` lines up two result files so runs on different commits
+(on the same dataset) can be diffed.
+"""
+import json
+import math
+import subprocess
+import time
+import tracemalloc
+from urllib.parse import urlencode
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Count
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from .models import User, Project, Task, Message, Event, Output
+from .instrumentation import QueryProfile, budget_routes
+from .urls import router
+
+COUNTED_MODELS = (User, Project, Task, Message, Event, Output)
+# Query strings the routes need to do real work; callables get the requesting user
+ROUTE_PARAMS = {
+    'search': {'q': 'study'},
+    'event-availability': lambda user: {'users': user.pk},
+    # Without a token the feeds only report their head
+    **{f'{resource}-changes': {'since': 0} for resource in ('project', 'task', 'event', 'message', 'output')},
+}
+# Streams never finish, so they can't be timed like the other routes
+SKIPPED_ROUTES = {'notification-stream'}
+
+
+def route_params(name, user):
+    params = ROUTE_PARAMS.get(name, {})
+    return params(user) if callable(params) else dict(params)
+
+
+def percentile(values, p):
+    """Nearest-rank percentile of a non-empty list."""
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(p / 100 * len(ordered)) - 1)]
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, cwd=settings.BASE_DIR, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class EndpointBenchmark:
+    def __init__(self, iterations=20, warmup=2, page_size=50, cold=False, roles=None, memory=True):
+        self.iterations = iterations
+        self.warmup = warmup
+        self.page_size = page_size
+        self.cold = cold
+        self.roles = roles or [role for role, _ in User.ROLES]
+        self.memory = memory
+
+    def _get(self, client, path):
+        if self.cold:
+            cache.clear()
+        return client.get(path)
+
+    @staticmethod
+    def _first_id(response):
+        data = getattr(response, 'data', None)
+        rows = data.get('results') if isinstance(data, dict) else data
+        if response.status_code == 200 and isinstance(rows, list) and rows and isinstance(rows[0], dict):
+            return rows[0].get('id')
+        return None
+
+    def endpoints(self, client, user):
+        """``(name, path)`` pairs to time for ``user``, whom ``client`` is authenticated as."""
+        query = f'?page_size={self.page_size}' if self.page_size else ''
+        endpoints = []
+        for name, path in budget_routes():
+            if name in SKIPPED_ROUTES:
+                continue
+            params = {'page_size': self.page_size} if self.page_size else {}
+            params.update(route_params(name, user))
+            endpoints.append((name, f'{path}?{urlencode(params)}' if params else path))
+        for _, viewset, basename in router.registry:
+            if not hasattr(viewset, 'retrieve'):
+                continue
+            pk = self._first_id(client.get(reverse(f'{basename}-list') + query))
+            if pk is None:
+                continue
+            endpoints.append((f'{basename}-detail', reverse(f'{basename}-detail', args=[pk])))
+            for extra in viewset.get_extra_actions():
+                if extra.detail and 'get' in extra.mapping:
+                    name = f'{basename}-{extra.url_name}'
+                    endpoints.append((name, reverse(name, args=[pk])))
+        return endpoints
+
+    def measure(self, client, path):
+        for _ in range(self.warmup):
+            self._get(client, path)
+        timings, profile = [], None
+        for _ in range(self.iterations):
+            profile = QueryProfile()
+            started = time.perf_counter()
+            with connection.execute_wrapper(profile):
+                response = self._get(client, path)
+            timings.append((time.perf_counter() - started) * 1000)
+
+        result = {
+            'status': response.status_code,
+            'p50_ms': round(percentile(timings, 50), 2),
+            'p95_ms': round(percentile(timings, 95), 2),
+            'p99_ms': round(percentile(timings, 99), 2),
+            'mean_ms': round(sum(timings) / len(timings), 2),
+            'queries': profile.count,
+            'db_ms': round(profile.duration * 1000, 2),
+            'bytes': len(response.content),
+        }
+        if self.memory:
+            tracemalloc.start()
+            try:
+                self._get(client, path)
+                result['peak_kb'] = round(tracemalloc.get_traced_memory()[1] / 1024, 1)
+            finally:
+                tracemalloc.stop()
+        return result
+
+    def run(self, log=None):
+        results = []
+        for role in self.roles:
+            # The busiest member of the role sees the largest payloads
+            user = (
+                User.objects.filter(role=role, is_active=True)
+                .annotate(project_count=Count('projects')).order_by('-project_count', 'id').first()
+            )
+            if user is None:
+                if log:
+                    log(f'No active {role}; skipped.')
+                continue
+            client = APIClient(SERVER_NAME='localhost')
+            client.force_authenticate(user=user)
+            for name, path in self.endpoints(client, user):
+                result = {'role': role, 'endpoint': name, 'path': path, **self.measure(client, path)}
+                results.append(result)
+                if log:
+                    log(f"{role:<20} {name:<32} p50 {result['p50_ms']:>8.1f}ms  p95 {result['p95_ms']:>8.1f}ms  "
+                        f"{result['queries']:>3} queries")
+        return {
+            'commit': git_commit(),
+            'created_at': timezone.now().isoformat(),
+            'database': connection.vendor,
+            'rows': {model.__name__: model.objects.count() for model in COUNTED_MODELS},
+            'settings': {'iterations': self.iterations, 'page_size': self.page_size, 'cold': self.cold},
+            'results': results,
+        }
+
+
+def compare(baseline, current):
+    """Per (role, endpoint): p50, p95 and query count of both runs with the relative change in p95."""
+    before = {(row['role'], row['endpoint']): row for row in baseline['results']}
+    rows = []
+    for row in current['results']:
+        old = before.get((row['role'], row['endpoint']))
+        if old is None:
+            continue
+        change = (row['p95_ms'] - old['p95_ms']) / old['p95_ms'] if old['p95_ms'] else None
+        rows.append({
+            'role': row['role'], 'endpoint': row['endpoint'],
+            'p50_ms': (old['p50_ms'], row['p50_ms']), 'p95_ms': (old['p95_ms'], row['p95_ms']),
+            'queries': (old['queries'], row['queries']),
+            'p95_change': round(change, 3) if change is not None else None,
+        })
+    return rows
+
+
+def load(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def save(report, path):
+    with open(path, 'w') as f:
+        json.dump(report, f, indent=2)
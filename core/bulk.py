@@ -0,0 +1,252 @@
+"""
+Bulk task writes.
+
+``TaskBulkWriter`` validates a whole list payload in one pass. Related
+projects, assignees and dependencies are checked with one query per relation,
+not one per item. It then writes every task, subtask and dependency edge with
+``bulk_create``/``bulk_update`` inside a single transaction. Any invalid item
+rejects the whole batch, and the errors come back as a list aligned with the
+payload (``{}`` for valid items), the same shape DRF uses for ``many=True``.
+"""
+from django.db import transaction
+from django.utils import timezone
+from rest_framework import serializers
+from .models import User, Project, Task, SubTask
+from .graph import TaskGraph, check_dependencies, DependencyCycleError
+from .signals import tasks_changed, notify_task_assigned
+from .search import SearchIndex
+from . import changes
+
+MAX_BULK_ITEMS = 1000
+BATCH_SIZE = 500
+UPDATABLE_FIELDS = ('project', 'title', 'assignee', 'due_date', 'status', 'priority')
+
+
+class BulkSubTaskSerializer(serializers.Serializer):
+    title = serializers.CharField(max_length=255)
+    completed = serializers.BooleanField(required=False, default=False)
+
+
+class BulkTaskItemSerializer(serializers.Serializer):
+    id = serializers.IntegerField(required=False)
+    # Client-side handle so other items in the same payload can depend on this one
+    ref = serializers.CharField(required=False, max_length=100)
+    project = serializers.IntegerField()
+    title = serializers.CharField(max_length=255)
+    assignee = serializers.IntegerField(required=False, allow_null=True)
+    due_date = serializers.DateField()
+    status = serializers.ChoiceField(choices=Task.STATUS_CHOICES, required=False)
+    priority = serializers.ChoiceField(choices=Task.PRIORITY_CHOICES, required=False)
+    # Integers are ids of existing tasks, strings are refs of items in this payload
+    dependencies = serializers.ListField(child=serializers.JSONField(), required=False)
+    subtasks = BulkSubTaskSerializer(many=True, required=False)
+
+
+def _add_error(errors, index, field, message):
+    errors[index].setdefault(field, []).append(message)
+
+
+class TaskBulkWriter:
+    def __init__(self, scope):
+        self.scope = scope
+
+    # Validation
+
+    def _parse(self, payload, partial):
+        if not isinstance(payload, list) or not payload:
+            raise serializers.ValidationError({'non_field_errors': ['Expected a non-empty list of tasks.']})
+        if len(payload) > MAX_BULK_ITEMS:
+            raise serializers.ValidationError({'non_field_errors': [f'At most {MAX_BULK_ITEMS} tasks per request.']})
+
+        items, errors = [], []
+        for data in payload:
+            serializer = BulkTaskItemSerializer(data=data, partial=partial)
+            if serializer.is_valid():
+                items.append(serializer.validated_data)
+                errors.append({})
+            else:
+                items.append(None)
+                errors.append(dict(serializer.errors))
+        return items, errors
+
+    def _check_relations(self, items, errors, existing_ids=()):
+        project_ids = {item['project'] for item in items if item and 'project' in item}
+        assignee_ids = {item['assignee'] for item in items if item and item.get('assignee') is not None}
+        dependency_ids = {
+            dep for item in items if item for dep in item.get('dependencies', ())
+            if isinstance(dep, int) and not isinstance(dep, bool)
+        }
+
+        visible_projects = set(
+            self.scope.filter_projects(Project.objects.filter(id__in=project_ids)).values_list('id', flat=True)
+        ) if project_ids else set()
+        known_users = set(User.objects.filter(id__in=assignee_ids).values_list('id', flat=True)) if assignee_ids else set()
+        visible_tasks = set(
+            self.scope.filter_tasks(Task.objects.filter(id__in=dependency_ids)).values_list('id', flat=True)
+        ) if dependency_ids else set()
+        visible_tasks.update(existing_ids)
+
+        refs = {}
+        for index, item in enumerate(items):
+            if item and item.get('ref'):
+                if item['ref'] in refs:
+                    _add_error(errors, index, 'ref', 'Duplicate ref in payload.')
+                refs[item['ref']] = index
+
+        for index, item in enumerate(items):
+            if not item:
+                continue
+            if 'project' in item and item['project'] not in visible_projects:
+                _add_error(errors, index, 'project', 'Project not found.')
+            if item.get('assignee') is not None and item['assignee'] not in known_users:
+                _add_error(errors, index, 'assignee', 'User not found.')
+            for dep in item.get('dependencies', ()):
+                if isinstance(dep, str):
+                    if dep not in refs:
+                        _add_error(errors, index, 'dependencies', f'Unknown ref "{dep}".')
+                    elif refs[dep] == index:
+                        _add_error(errors, index, 'dependencies', 'A task cannot depend on itself.')
+                elif isinstance(dep, bool) or not isinstance(dep, int):
+                    _add_error(errors, index, 'dependencies', 'Expected a task id or a ref.')
+                elif dep not in visible_tasks:
+                    _add_error(errors, index, 'dependencies', f'Task {dep} not found.')
+                elif dep == item.get('id'):
+                    _add_error(errors, index, 'dependencies', 'A task cannot depend on itself.')
+
+    @staticmethod
+    def _check_cycles(items, errors, graph_check):
+        """Flag every item on a dependency cycle found by ``graph_check``."""
+        if any(errors):
+            return
+        try:
+            graph_check()
+        except DependencyCycleError as e:
+            on_cycle = set(e.cycle)
+            for index, item in enumerate(items):
+                if item.get('ref', item.get('id')) in on_cycle:
+                    _add_error(errors, index, 'dependencies', str(e))
+
+    @staticmethod
+    def _raise_if_invalid(errors):
+        if any(errors):
+            raise serializers.ValidationError(errors)
+
+    # Writes
+
+    @staticmethod
+    def _replace_subtasks(items, tasks):
+        replaced = [task.id for item, task in zip(items, tasks) if 'subtasks' in item]
+        if replaced:
+            SubTask.objects.filter(task_id__in=replaced).delete()
+        SubTask.objects.bulk_create([
+            SubTask(task_id=task.id, title=sub['title'], completed=sub['completed'])
+            for item, task in zip(items, tasks) for sub in item.get('subtasks', ())
+        ], batch_size=BATCH_SIZE)
+
+    @staticmethod
+    def _replace_dependencies(items, tasks, by_ref):
+        Through = Task.dependencies.through
+        replaced = [task.id for item, task in zip(items, tasks) if 'dependencies' in item]
+        if replaced:
+            Through.objects.filter(from_task_id__in=replaced).delete()
+        edges = {
+            (task.id, by_ref[dep].id if isinstance(dep, str) else dep)
+            for item, task in zip(items, tasks) for dep in item.get('dependencies', ())
+        }
+        Through.objects.bulk_create(
+            [Through(from_task_id=from_id, to_task_id=to_id) for from_id, to_id in edges],
+            batch_size=BATCH_SIZE,
+        )
+
+    def create(self, payload):
+        items, errors = self._parse(payload, partial=False)
+        for index, item in enumerate(items):
+            if item and 'id' in item:
+                _add_error(errors, index, 'id', 'Cannot be set when creating tasks.')
+        self._check_relations(items, errors)
+
+        def payload_cycles():
+            # New tasks have no dependants outside the payload, so any cycle is among refs
+            refs = {item['ref']: {'title': None, 'due_date': None, 'status': None} for item in items if item.get('ref')}
+            edges = {
+                item['ref']: {dep for dep in item.get('dependencies', ()) if isinstance(dep, str)}
+                for item in items if item.get('ref')
+            }
+            cycle = TaskGraph(refs, edges).find_cycle()
+            if cycle:
+                raise DependencyCycleError(cycle)
+
+        self._check_cycles(items, errors, payload_cycles)
+        self._raise_if_invalid(errors)
+
+        with transaction.atomic():
+            tasks = []
+            for item in items:
+                fields = {field: item[field] for field in ('title', 'due_date', 'status', 'priority') if field in item}
+                tasks.append(Task(project_id=item['project'], assignee_id=item.get('assignee'), **fields))
+            Task.objects.bulk_create(tasks, batch_size=BATCH_SIZE)
+
+            by_ref = {item['ref']: task for item, task in zip(items, tasks) if item.get('ref')}
+            self._replace_subtasks(items, tasks)
+            self._replace_dependencies(items, tasks, by_ref)
+            SearchIndex.index(tasks)
+            changes.record(Task, [task.id for task in tasks])
+            notify_task_assigned(tasks)
+
+        tasks_changed({task.project_id for task in tasks})
+        return tasks
+
+    def update(self, payload):
+        items, errors = self._parse(payload, partial=True)
+        for index, item in enumerate(items):
+            if item is not None and 'id' not in item:
+                _add_error(errors, index, 'id', 'This field is required.')
+            if item and item.get('ref'):
+                _add_error(errors, index, 'ref', 'Refs are only supported when creating tasks.')
+
+        ids = [item['id'] for item in items if item and 'id' in item]
+        existing = {task.id: task for task in self.scope.filter_tasks(Task.objects.filter(id__in=ids))}
+        for index, item in enumerate(items):
+            if item and 'id' in item and item['id'] not in existing:
+                _add_error(errors, index, 'id', 'Task not found.')
+        self._check_relations(items, errors, existing_ids=existing)
+        replacements = {item['id']: item['dependencies'] for item in items if item and 'dependencies' in item}
+        if replacements:
+            self._check_cycles(items, errors, lambda: check_dependencies(replacements))
+        self._raise_if_invalid(errors)
+
+        touched_projects = {task.project_id for task in existing.values()}
+        # Subtask and dependency replacements change the task's payload too
+        tasks, changed_fields, now = [], {'updated_at'}, timezone.now()
+        for item in items:
+            task = existing[item['id']]
+            task.updated_at = now
+            for field in UPDATABLE_FIELDS:
+                if field in item:
+                    attname = Task._meta.get_field(field).attname
+                    setattr(task, attname, item[field])
+                    changed_fields.add(field)
+            tasks.append(task)
+        touched_projects.update(task.project_id for task in tasks)
+
+        with transaction.atomic():
+            Task.objects.bulk_update(tasks, sorted(changed_fields), batch_size=BATCH_SIZE)
+            self._replace_subtasks(items, tasks)
+            self._replace_dependencies(items, tasks, {})
+            if 'title' in changed_fields:
+                SearchIndex.index(tasks)
+            changes.record(Task, [task.id for task in tasks])
+            notify_task_assigned(tasks)
+
+        tasks_changed(touched_projects)
+        return tasks
+
+    def delete(self, ids):
+        if not isinstance(ids, list) or not all(isinstance(i, int) and not isinstance(i, bool) for i in ids):
+            raise serializers.ValidationError({'ids': ['Expected a list of task ids.']})
+        queryset = self.scope.filter_tasks(Task.objects.filter(id__in=ids))
+        with transaction.atomic():
+            project_ids = set(queryset.values_list('project_id', flat=True))
+            _, per_model = queryset.delete()
+        tasks_changed(project_ids)
+        return per_model.get(Task._meta.label, 0)
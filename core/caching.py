@@ -0,0 +1,139 @@
+"""
+Versioned response cache for read-heavy list endpoints.
+
+Each cached endpoint belongs to a namespace. Cache keys embed the namespace's
+current version, the requester's role and visibility scope, and the full
+request path. When a model in ``LIST_CACHE_DEPENDENCIES`` changes, the
+signals in ``core.signals`` bump the version of every namespace that depends
+on it. Old entries then become unreachable and age out on their own, so
+invalidation never scans or deletes keys. Hit, miss and invalidation counters
+are kept in the cache and exposed through ``stats()``.
+"""
+import hashlib
+import time
+from django.core.cache import cache
+from django.utils.cache import get_conditional_response
+from rest_framework.response import Response
+from .models import User, Project, Task, Partner, Output, Event, Founder, FounderProject
+from .visibility import ProjectScope
+
+LIST_CACHE_TIMEOUT = 5 * 60
+# Validators set by ConditionalGetMixin, served again with cached bodies
+REPLAYED_HEADERS = ('ETag', 'Cache-Control')
+
+# Which cached namespaces must be invalidated when rows of a model (or an M2M
+# through table) change. Names and titles of related rows are embedded in the
+# payloads, and project membership decides what non-privileged users see.
+LIST_CACHE_DEPENDENCIES = {
+    Project: ('projects', 'outputs', 'partners', 'dashboard'),
+    Project.team.through: ('projects', 'outputs', 'partners', 'dashboard'),
+    User: ('projects', 'outputs'),
+    Task: ('dashboard',),
+    Output: ('outputs', 'dashboard'),
+    Output.authors.through: ('outputs', 'dashboard'),
+    Event: ('dashboard',),
+    Event.attendees.through: ('dashboard',),
+    Partner: ('partners',),
+    Founder: ('founders',),
+    FounderProject: ('founders',),
+}
+
+NAMESPACES = ('projects', 'outputs', 'partners', 'founders', 'dashboard')
+COUNTERS = ('hits', 'misses', 'invalidations')
+
+
+def _version_key(namespace):
+    return f'resp:version:{namespace}'
+
+
+def _counter_key(namespace, counter):
+    return f'resp:stats:{namespace}:{counter}'
+
+
+def _increment(key):
+    try:
+        return cache.incr(key)
+    except ValueError:
+        # Missing or evicted. Start from the clock so a recreated version can
+        # never collide with one that is still embedded in live keys.
+        value = int(time.time() * 1000)
+        cache.set(key, value, timeout=None)
+        return value
+
+
+def _count(namespace, counter):
+    key = _counter_key(namespace, counter)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, 0, timeout=None)
+        cache.incr(key)
+
+
+def record_lookup(namespace, hit):
+    _count(namespace, 'hits' if hit else 'misses')
+
+
+def namespace_version(namespace):
+    version = cache.get(_version_key(namespace))
+    if version is None:
+        version = _increment(_version_key(namespace))
+    return version
+
+
+def invalidate(*namespaces):
+    for namespace in namespaces:
+        _increment(_version_key(namespace))
+        _count(namespace, 'invalidations')
+
+
+def stats():
+    """Counters per namespace plus the overall hit rate."""
+    keys = [_counter_key(ns, counter) for ns in NAMESPACES for counter in COUNTERS]
+    values = cache.get_many(keys)
+    result = {}
+    for namespace in NAMESPACES:
+        counts = {counter: values.get(_counter_key(namespace, counter), 0) for counter in COUNTERS}
+        lookups = counts['hits'] + counts['misses']
+        counts['hit_rate'] = round(counts['hits'] / lookups, 3) if lookups else None
+        result[namespace] = counts
+    return result
+
+
+def scope_key(request):
+    """Identifies everyone who sees the same payload for a given URL."""
+    return f'{request.user.role}:{ProjectScope.for_request(request).cache_key}'
+
+
+class CachedListMixin:
+    """
+    Serves ``list`` from the response cache. Set ``cache_namespace`` to one of
+    ``NAMESPACES`` on the viewset.
+    """
+    cache_namespace = None
+    cache_timeout = LIST_CACHE_TIMEOUT
+
+    def list_cache_key(self, request):
+        path = hashlib.md5(request.get_full_path().encode()).hexdigest()
+        version = namespace_version(self.cache_namespace)
+        return f'resp:{self.cache_namespace}:{version}:{scope_key(request)}:{path}'
+
+    def list(self, request, *args, **kwargs):
+        key = self.list_cache_key(request)
+        cached = cache.get(key)
+        if cached is not None:
+            record_lookup(self.cache_namespace, hit=True)
+            data, headers = cached
+            response = get_conditional_response(request._request, etag=headers.get('ETag')) or Response(data)
+            for header, value in headers.items():
+                response[header] = value
+            response['X-Cache'] = 'HIT'
+            return response
+
+        record_lookup(self.cache_namespace, hit=False)
+        response = super().list(request, *args, **kwargs)
+        if response.status_code == 200:
+            headers = {header: response[header] for header in REPLAYED_HEADERS if header in response}
+            cache.set(key, (response.data, headers), self.cache_timeout)
+        response['X-Cache'] = 'MISS'
+        return response
@@ -0,0 +1,178 @@
+"""
+Delta sync.
+
+Every create, update and delete of a synced model appends a
+``ChangeLogEntry``. The entry id is the sync token. ``GET
+/<resource>/changes/?since=<token>`` reads the entries after the token from
+the ``(resource, id)`` index, collapses repeated changes to the same row, and
+returns:
+
+* the current payload of rows created or updated since then, loaded through
+  the viewset's own queryset (so its visibility rules apply), and
+* tombstones (ids) for rows deleted since then. These are filtered on the
+  project and users copied into the entry at deletion time, because the row
+  itself is gone. Event attendees and output authors can see rows outside
+  their projects, so they are read in ``pre_delete`` (see
+  ``remember_members``), before the M2M rows are removed. Rows changed since
+  the token that the user can no longer see (a reassigned task, a project
+  they left) are reported as tombstones too.
+
+Ids are handed out when an entry is inserted, not when its transaction
+commits, so a slow transaction can commit a lower id after a higher one has
+been read. The token therefore never moves past an entry younger than
+``SETTLE_TIME``: those are left for the next call.
+
+Without ``since`` the endpoint only returns the current head token, for
+clients that have just done a full load. Tokens older than the retention
+window get 410 and the client reloads the collection.
+"""
+import logging
+from datetime import timedelta
+from django.db.models import Max, Min
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.decorators import action
+from rest_framework.response import Response
+from .models import Project, Task, Event, Message, Output, ChangeLogEntry
+from .visibility import ProjectScope
+
+logger = logging.getLogger(__name__)
+
+MAX_CHANGES = 500
+CHANGE_LOG_RETENTION = timedelta(days=30)
+PRUNE_BATCH_SIZE = 10000
+# Longest write transaction the feed waits for before reading past its entries
+SETTLE_TIME = timedelta(seconds=5)
+
+RESOURCES = {Project: 'project', Task: 'task', Event: 'event', Message: 'message', Output: 'output'}
+
+
+# The M2M that makes a row visible to users outside its project
+MEMBER_RELATIONS = {Event: 'attendees', Output: 'authors'}
+
+
+def remember_members(instance):
+    """Keep the attendee or author ids of ``instance`` for its tombstone; call before the row is deleted."""
+    relation = MEMBER_RELATIONS.get(type(instance))
+    if relation is not None:
+        instance._member_ids = list(getattr(instance, relation).values_list('id', flat=True))
+
+
+def _visibility(instance):
+    """(project id, user ids) that decide who may see a tombstone of ``instance``."""
+    members = getattr(instance, '_member_ids', [])
+    if isinstance(instance, Project):
+        return instance.pk, [instance.lead_id]
+    if isinstance(instance, Task):
+        return instance.project_id, [instance.assignee_id]
+    if isinstance(instance, Event):
+        return instance.linked_project_id, [instance.owner_id, *members]
+    if isinstance(instance, Message):
+        # Messages are private to their two users whatever the project
+        return None, [instance.sender_id, instance.receiver_id]
+    return instance.project_id, members
+
+
+def record(model, ids):
+    """Log rows of ``model`` created or updated without firing post_save."""
+    resource = RESOURCES.get(model)
+    if resource is None:
+        return
+    ChangeLogEntry.objects.bulk_create(
+        [ChangeLogEntry(resource=resource, object_id=object_id, action='upsert') for object_id in ids]
+    )
+
+
+def record_save(instance):
+    ChangeLogEntry.objects.create(resource=RESOURCES[type(instance)], object_id=instance.pk, action='upsert')
+
+
+def record_delete(instance):
+    project_id, user_ids = _visibility(instance)
+    ChangeLogEntry.objects.create(
+        resource=RESOURCES[type(instance)],
+        object_id=instance.pk,
+        action='delete',
+        project_id=project_id,
+        user_ids=[user_id for user_id in user_ids if user_id is not None],
+    )
+
+
+def prune(retention=CHANGE_LOG_RETENTION, batch_size=PRUNE_BATCH_SIZE):
+    """Delete entries older than ``retention`` in batches. Returns the number removed."""
+    cutoff = timezone.now() - retention
+    removed = 0
+    while True:
+        ids = list(
+            ChangeLogEntry.objects.filter(created_at__lt=cutoff).order_by('id').values_list('id', flat=True)[:batch_size]
+        )
+        if not ids:
+            break
+        removed += ChangeLogEntry.objects.filter(id__in=ids).delete()[0]
+    logger.info(f"Pruned {removed} change log entries older than {cutoff.isoformat()}.")
+    return removed
+
+
+def _tombstone_visible(entry, scope):
+    if entry.resource == 'message':
+        return scope.user.pk in entry.user_ids
+    if scope.unrestricted:
+        return True
+    return entry.project_id in scope.project_ids or scope.user.pk in entry.user_ids
+
+
+class ChangesFeedMixin:
+    """Adds ``GET <list url>/changes/?since=<token>`` to a viewset over a model in ``RESOURCES``."""
+
+    @action(detail=False, methods=['get'])
+    def changes(self, request):
+        resource = RESOURCES[self.get_queryset().model]
+        entries = ChangeLogEntry.objects.filter(resource=resource)
+        settled = timezone.now() - SETTLE_TIME
+        since = request.query_params.get('since')
+        if since in (None, ''):
+            head = entries.filter(created_at__lte=settled).aggregate(head=Max('id'))['head'] or 0
+            return Response({'next': str(head), 'has_more': False, 'results': [], 'deleted': []})
+        try:
+            since = int(since)
+        except ValueError:
+            return Response(
+                {'error': 'since must be a token returned by this endpoint.'}, status=status.HTTP_400_BAD_REQUEST
+            )
+
+        if since:
+            # Pruning removes the oldest ids first, so a token below them has lost history
+            oldest = ChangeLogEntry.objects.aggregate(oldest=Min('id'))['oldest']
+            if oldest is not None and since < oldest - 1:
+                return Response({'error': 'Sync token expired; reload the collection.'}, status=status.HTTP_410_GONE)
+
+        batch = list(entries.filter(id__gt=since).order_by('id')[:MAX_CHANGES + 1])
+        has_more = len(batch) > MAX_CHANGES
+        batch = batch[:MAX_CHANGES]
+        # A lower id may still be uncommitted while a recent entry is visible, so stop at the first recent one
+        for position, entry in enumerate(batch):
+            if entry.created_at > settled:
+                batch, has_more = batch[:position], False
+                break
+
+        # Only the latest change to each row matters
+        latest = {}
+        for entry in batch:
+            latest[entry.object_id] = entry
+        upserted = [object_id for object_id, entry in latest.items() if entry.action == 'upsert']
+        scope = ProjectScope.for_request(request)
+        deleted = sorted(
+            object_id for object_id, entry in latest.items()
+            if entry.action == 'delete' and _tombstone_visible(entry, scope)
+        )
+        rows = list(self.get_queryset().filter(pk__in=upserted)) if upserted else []
+        # Changed rows the queryset no longer returns have left this user's view
+        visible = {row.pk for row in rows}
+        deleted = sorted([*deleted, *(object_id for object_id in upserted if object_id not in visible)])
+
+        return Response({
+            'next': str(batch[-1].id if batch else since),
+            'has_more': has_more,
+            'results': self.get_serializer(rows, many=True).data,
+            'deleted': deleted,
+        })
@@ -0,0 +1,108 @@
+"""
+Conditional GET for list and detail endpoints.
+
+A list's ETag is derived from ``COUNT(*)`` and ``MAX(updated_at)`` over the
+rows the user can see. Any insert or update moves the max, and any delete
+changes the count. Conditional and paginated requests get both from one
+aggregate query; a plain unpaginated list computes them from the rows it loads
+anyway. Viewsets that also use the response cache mix in its namespace version,
+which catches changes to related rows embedded in the payload, and cache hits
+replay the stored validators. When the client's ``If-None-Match`` still
+matches, the view answers 304 before running the page query or serializing
+anything.
+
+Lists carry no ``Last-Modified`` and ignore ``If-Modified-Since``: a delete
+doesn't move ``MAX(updated_at)``, so a date alone can't tell that a row is
+gone. Detail responses use both validators.
+
+Writes that bypass ``auto_now`` (queryset ``update()``, ``bulk_update``, M2M
+edits) must bump ``updated_at`` themselves; see ``touch``.
+"""
+import hashlib
+from django.db.models import Count, Max
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+from rest_framework.response import Response
+from . import caching, changes
+
+
+def touch(model, ids):
+    """
+    Bump ``updated_at`` on rows changed without going through ``save()`` and
+    log them for delta sync.
+    """
+    ids = list(ids)
+    if ids:
+        model.objects.filter(pk__in=ids).update(updated_at=timezone.now())
+        changes.record(model, ids)
+
+
+class ConditionalGetMixin:
+    """
+    ETag support for ``list``, ETag and Last-Modified for ``retrieve``. The model
+    needs an ``updated_at`` column (``conditional_field`` to override).
+    """
+    conditional_field = 'updated_at'
+
+    def _validators(self, request, last_modified, *parts):
+        namespace = getattr(self, 'cache_namespace', None)
+        version = caching.namespace_version(namespace) if namespace else ''
+        raw = '|'.join(str(part) for part in (
+            request.get_full_path(), caching.scope_key(request), version, last_modified, *parts
+        ))
+        return quote_etag(hashlib.md5(raw.encode()).hexdigest()), last_modified
+
+    def _not_modified(self, request, etag, last_modified):
+        return get_conditional_response(
+            request._request,
+            etag=etag,
+            last_modified=int(last_modified.timestamp()) if last_modified else None,
+        )
+
+    @staticmethod
+    def _set_validators(response, etag, last_modified):
+        response['ETag'] = etag
+        if last_modified:
+            response['Last-Modified'] = http_date(last_modified.timestamp())
+        # Let browsers keep the body but revalidate on every poll
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+    def _list_state(self, queryset):
+        state = queryset.order_by().aggregate(count=Count('pk'), last_modified=Max(self.conditional_field))
+        return state['count'], state['last_modified']
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        state = None
+        if 'HTTP_IF_NONE_MATCH' in request.META:
+            state = self._list_state(queryset)
+            etag, _ = self._validators(request, state[1], state[0])
+            not_modified = self._not_modified(request, etag, None)
+            if not_modified is not None:
+                return self._set_validators(not_modified, etag, None)
+
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            state = state or self._list_state(queryset)
+            response = self.get_paginated_response(self.get_serializer(page, many=True).data)
+        else:
+            rows = list(queryset)
+            if state is None:
+                # The whole list is loaded anyway; derive the same validators without a query
+                stamps = [getattr(row, self.conditional_field) for row in rows]
+                state = (len(rows), max(stamps, default=None))
+            response = Response(self.get_serializer(rows, many=True).data)
+
+        etag, _ = self._validators(request, state[1], state[0])
+        return self._set_validators(response, etag, None)
+
+    def retrieve(self, request, *args, **kwargs):
+        instance = self.get_object()
+        etag, last_modified = self._validators(request, getattr(instance, self.conditional_field), instance.pk)
+        not_modified = self._not_modified(request, etag, last_modified)
+        if not_modified is not None:
+            return self._set_validators(not_modified, etag, last_modified)
+        response = Response(self.get_serializer(instance).data)
+        return self._set_validators(response, etag, last_modified)
@@ -0,0 +1,75 @@
+"""
+Dashboard summary.
+
+Counts of projects, tasks, outputs and events broken down by status,
+priority, type and pipeline stage. Each model is one grouped
+``values(...).annotate(Count('id'))`` query over the rows the user may see,
+folded into per-dimension totals in Python. The result is cached under the
+``dashboard`` namespace of ``core.caching`` per role and visibility scope, so
+any write to the underlying models bumps the version and the next load
+recomputes it.
+"""
+from collections import Counter
+from django.core.cache import cache
+from django.db.models import Count
+from .models import Project, Task, Output, Event
+from .visibility import ProjectScope
+from . import caching
+
+DASHBOARD_CACHE_TIMEOUT = 5 * 60
+CACHE_NAMESPACE = 'dashboard'
+
+# section -> (model, ProjectScope filter, {breakdown name: field})
+BREAKDOWNS = {
+    'projects': (Project, 'filter_projects', {'by_status': 'status', 'by_type': 'project_type'}),
+    'tasks': (Task, 'filter_tasks', {'by_status': 'status', 'by_priority': 'priority'}),
+    'outputs': (Output, 'filter_outputs', {'by_status': 'status', 'by_type': 'output_type'}),
+    'events': (Event, 'filter_events', {'by_stage': 'pipeline_stage'}),
+}
+
+
+class DashboardSummary:
+    @staticmethod
+    def cache_key(request):
+        version = caching.namespace_version(CACHE_NAMESPACE)
+        return f'dashboard:summary:{version}:{caching.scope_key(request)}'
+
+    @classmethod
+    def for_request(cls, request):
+        """Return ``(summary, cache_hit)`` for ``request.user``."""
+        key = cls.cache_key(request)
+        summary = cache.get(key)
+        caching.record_lookup(CACHE_NAMESPACE, hit=summary is not None)
+        if summary is not None:
+            return summary, True
+        summary = cls.compute(ProjectScope.for_request(request))
+        cache.set(key, summary, DASHBOARD_CACHE_TIMEOUT)
+        return summary, False
+
+    @staticmethod
+    def compute(scope):
+        summary = {}
+        for name, (model, scope_filter, breakdowns) in BREAKDOWNS.items():
+            fields = list(breakdowns.values())
+            queryset = getattr(scope, scope_filter)(model.objects.all())
+            # order_by() drops any default ordering so it can't leak into GROUP BY
+            rows = queryset.order_by().values(*fields).annotate(count=Count('id'))
+
+            totals = {breakdown: Counter() for breakdown in breakdowns}
+            total = 0
+            for row in rows:
+                total += row['count']
+                for breakdown, field in breakdowns.items():
+                    totals[breakdown][row[field]] += row['count']
+
+            section = {'total': total}
+            for breakdown, field in breakdowns.items():
+                # Every choice is present, zero or not, so the client never has to fill gaps
+                choices = [value for value, _ in model._meta.get_field(field).choices]
+                section[breakdown] = {value: totals[breakdown].get(value, 0) for value in choices}
+                # Values outside the declared choices (legacy data) are still reported
+                section[breakdown].update({
+                    value: count for value, count in totals[breakdown].items() if value not in section[breakdown]
+                })
+            summary[name] = section
+        return summary
@@ -0,0 +1,310 @@
+"""
+Synthetic datasets for local load testing.
+
+``DatasetGenerator`` fills the database with a parameterised number of users,
+projects, tasks, messages, events, outputs and partners. It writes everything
+with bulk inserts in chunks and keeps only ids in memory, so the ``large``
+preset (10k users, 50k projects, 1M tasks, 5M messages) runs in bounded memory.
+
+The data is shaped like production rather than uniform:
+
+* roles are mostly Research Assistants with a handful of directors;
+* every project has a team, and tasks, outputs and events draw their people
+  from it;
+* tasks are spread unevenly across projects, and some depend on an earlier
+  task of the same project (so the dependency graph stays acyclic);
+* messages come in conversations: a reply chain of geometric length, with
+  occasional side branches;
+* timestamps are spread over the past years instead of all being "now".
+
+Rows are written through ``core.seeding.BulkLoader`` (one password hash for
+every user, M2M links straight into the through tables, ``COPY`` on
+Postgres). Signals don't fire, so the search index is rebuilt at the end and
+the response caches are invalidated.
+"""
+import logging
+import random
+from collections import Counter
+from datetime import datetime, time, timedelta
+from django.utils import timezone
+from .models import User, Project, Task, SubTask, Message, Event, Output, Partner
+from .seeding import BulkLoader
+
+logger = logging.getLogger(__name__)
+
+PRESETS = {
+    'small': {
+        'users': 200, 'projects': 500, 'tasks': 10_000, 'messages': 20_000,
+        'events': 2_000, 'outputs': 1_000, 'partners': 100,
+    },
+    'medium': {
+        'users': 2_000, 'projects': 10_000, 'tasks': 200_000, 'messages': 1_000_000,
+        'events': 20_000, 'outputs': 10_000, 'partners': 500,
+    },
+    'large': {
+        'users': 10_000, 'projects': 50_000, 'tasks': 1_000_000, 'messages': 5_000_000,
+        'events': 100_000, 'outputs': 50_000, 'partners': 2_000,
+    },
+}
+DEFAULT_PASSWORD = 'password123'
+
+ROLE_WEIGHTS = {
+    'Director': 1, 'Deputy Director': 2, 'Admin': 2, 'Innovation Officer': 3,
+    'Data Analyst': 10, 'Research Assistant': 82,
+}
+TEAM_SIZE = (2, 8)
+ATTENDEES = (2, 12)
+AUTHORS = (1, 4)
+SUBTASKS = (0, 3)
+DEPENDENCY_RATE = 0.3
+# Chance that a conversation continues with one more reply, and of a side branch
+REPLY_RATE = 0.55
+BRANCH_RATE = 0.15
+MAX_THREAD_SIZE = 40
+
+FIRST_NAMES = ['Amina', 'Brian', 'Caroline', 'David', 'Esther', 'Faith', 'George', 'Hellen', 'Isaac', 'Joy',
+               'Kevin', 'Lydia', 'Moses', 'Naomi', 'Otieno', 'Purity', 'Kamau', 'Wanjiru', 'Yusuf', 'Zawadi']
+LAST_NAMES = ['Achieng', 'Barasa', 'Cheruiyot', 'Gathoni', 'Kariuki', 'Kiprono', 'Mutua', 'Mwangi', 'Njeri',
+              'Ochieng', 'Odhiambo', 'Omondi', 'Otieno', 'Wafula', 'Wambui', 'Wekesa']
+TOPICS = ['Soil health', 'Mobile money', 'Maternal care', 'Solar irrigation', 'Water quality', 'Crop yield',
+          'Digital literacy', 'Malaria vectors', 'Urban transport', 'Climate adaptation', 'Youth employment']
+ACTIVITIES = ['Draft', 'Review', 'Collect data for', 'Analyse', 'Present', 'Validate', 'Budget', 'Report on']
+EVENT_CATEGORIES = ['Meeting', 'Workshop', 'Conference', 'Training', 'Field Visit']
+
+
+class DatasetGenerator:
+    def __init__(self, counts, seed=0, chunk_size=5000, password=DEFAULT_PASSWORD, index=True):
+        self.counts = counts
+        self.seed = seed
+        self.chunk_size = chunk_size
+        self.loader = BulkLoader(password, batch_size=chunk_size)
+        self.index = index
+        self.random = random.Random(seed)
+        self.tag = f'gen{seed}'
+        self.now = timezone.now()
+        self.user_ids = []
+        self.teams = {}
+
+    # Helpers
+
+    def _chunks(self, total):
+        for start in range(0, total, self.chunk_size):
+            yield range(start, min(start + self.chunk_size, total))
+
+    def _moment(self, days_back, days_ahead=0):
+        return self.now + timedelta(seconds=self.random.randint(-days_back * 86400, days_ahead * 86400))
+
+    def _people(self, team, bounds):
+        """Mostly members of ``team``, topped up (and now and then joined) by outsiders."""
+        k = self.random.randint(*bounds)
+        people = self.random.sample(team, min(k, len(team)))
+        if len(people) < k or self.random.random() < 0.2:
+            people += self.random.sample(self.user_ids, min(max(1, k - len(people)), len(self.user_ids)))
+        return list(dict.fromkeys(people))
+
+    def _write(self, model, rows):
+        return self.loader.insert(model, rows)
+
+    # Steps
+
+    def users(self, total):
+        roles, weights = zip(*ROLE_WEIGHTS.items())
+        for chunk in self._chunks(total):
+            users = []
+            for i in chunk:
+                first, last = self.random.choice(FIRST_NAMES), self.random.choice(LAST_NAMES)
+                users.append(User(
+                    username=f'{self.tag}-user{i}', email=f'{self.tag}-user{i}@example.com',
+                    first_name=first, last_name=last, avatar=f'{first[0]}{last[0]}',
+                    role=self.random.choices(roles, weights)[0], force_password_change=False,
+                ))
+            self.user_ids.extend(user.pk for user in self.loader.users(users))
+
+    def projects(self, total):
+        types = [choice for choice, _ in Project.TYPE_CHOICES]
+        statuses = [choice for choice, _ in Project.STATUS_CHOICES]
+        for chunk in self._chunks(total):
+            projects, teams = [], []
+            for i in chunk:
+                created = self._moment(3 * 365)
+                team = self.random.sample(self.user_ids, min(self.random.randint(*TEAM_SIZE), len(self.user_ids)))
+                projects.append(Project(
+                    title=f'{self.random.choice(TOPICS)} study {i}', project_type=self.random.choice(types),
+                    status=self.random.choices(statuses, [70, 10, 15, 5])[0], lead_id=team[0],
+                    start_date=created.date(), end_date=created.date() + timedelta(days=self.random.randint(90, 720)),
+                    budget=self.random.randint(1, 500) * 1000, progress=self.random.randint(0, 100), created_at=created,
+                ))
+                teams.append(team)
+            self._write(Project, projects)
+            for project, team in zip(projects, teams):
+                self.teams[project.pk] = team
+            self.loader.link(Project.team, [(project.pk, user_id) for project, team in zip(projects, teams) for user_id in team])
+
+    def tasks(self, total):
+        statuses = [choice for choice, _ in Task.STATUS_CHOICES]
+        priorities = [choice for choice, _ in Task.PRIORITY_CHOICES]
+        project_ids = list(self.teams)
+        # Uneven spread: a few busy projects, a long tail of quiet ones
+        weights = [self.random.paretovariate(1.5) for _ in project_ids]
+        per_project = Counter(self.random.choices(project_ids, weights, k=total))
+        previous, pending = {}, []
+
+        def flush():
+            self._write(Task, pending)
+            subtasks, edges = [], []
+            for task in pending:
+                subtasks.extend(
+                    SubTask(task_id=task.pk, title=f'Step {n + 1}', completed=task.status == 'Done')
+                    for n in range(self.random.randint(*SUBTASKS))
+                )
+                earlier = previous.get(task.project_id)
+                if earlier and self.random.random() < DEPENDENCY_RATE:
+                    edges.append((task.pk, earlier))
+                previous[task.project_id] = task.pk
+            self._write(SubTask, subtasks)
+            self.loader.link(Task.dependencies, edges)
+            pending.clear()
+
+        for project_id, count in per_project.items():
+            team = self.teams[project_id]
+            for n in range(count):
+                created = self._moment(2 * 365)
+                due = (created + timedelta(days=self.random.randint(3, 120))).date()
+                status = self.random.choices(statuses, [30, 25, 40, 5])[0]
+                pending.append(Task(
+                    project_id=project_id, title=f'{self.random.choice(ACTIVITIES)} {self.random.choice(TOPICS).lower()}',
+                    assignee_id=self.random.choice(team), due_date=due, status=status,
+                    priority=self.random.choices(priorities, [20, 50, 25, 5])[0], created_at=created,
+                ))
+                if len(pending) >= self.chunk_size:
+                    flush()
+        if pending:
+            flush()
+
+    def _thread_shape(self, limit):
+        """Parent index of each message in one conversation (``None`` for the root)."""
+        parents = [None]
+        while len(parents) < limit and self.random.random() < REPLY_RATE:
+            parents.append(len(parents) - 1)
+            if len(parents) < limit and self.random.random() < BRANCH_RATE:
+                parents.append(len(parents) - 2)
+        return parents
+
+    def messages(self, total):
+        project_ids = list(self.teams)
+        written = 0
+        while written < total:
+            threads, size = [], 0
+            while size < self.chunk_size and written + size < total:
+                shape = self._thread_shape(min(MAX_THREAD_SIZE, total - written - size))
+                threads.append(shape)
+                size += len(shape)
+            self._write_threads(threads, project_ids)
+            written += size
+
+    def _write_threads(self, threads, project_ids):
+        priorities = [choice for choice, _ in Message.PRIORITY_CHOICES]
+        # Build every message first, then insert level by level so parents have ids
+        levels = {}
+        for shape in threads:
+            a, b = self.random.sample(self.user_ids, 2)
+            project_id = self.random.choice(project_ids) if project_ids and self.random.random() < 0.3 else None
+            subject = f'{self.random.choice(TOPICS)} update'
+            sent_at = self._moment(365)
+            nodes, depths = [], []
+            for index, parent in enumerate(shape):
+                depth = 0 if parent is None else depths[parent] + 1
+                sender, receiver = (a, b) if depth % 2 == 0 else (b, a)
+                sent_at = min(self.now, sent_at + timedelta(minutes=self.random.randint(1, 48 * 60)))
+                replied = index in shape[index + 1:]
+                message = Message(
+                    sender_id=sender, receiver_id=receiver, project_id=project_id,
+                    subject=subject if depth == 0 else f'Re: {subject}',
+                    content=f'{self.random.choice(ACTIVITIES)} the {subject.lower()} before the next review.',
+                    timestamp=sent_at, priority=self.random.choices(priorities, [85, 12, 3])[0],
+                    status='replied' if replied else self.random.choices(['pending', 'archived'], [95, 5])[0],
+                    # Older mail has mostly been read
+                    is_read=replied or (self.now - sent_at).days > 14 or self.random.random() < 0.5,
+                )
+                nodes.append(message)
+                depths.append(depth)
+                levels.setdefault(depth, []).append((message, nodes[parent] if parent is not None else None))
+        for depth in sorted(levels):
+            for message, parent in levels[depth]:
+                message.parent_id = parent.pk if parent else None
+            self._write(Message, [message for message, _ in levels[depth]])
+
+    def events(self, total):
+        stages = [choice for choice, _ in Event.PIPELINE_STAGES]
+        project_ids = list(self.teams)
+        for chunk in self._chunks(total):
+            events, attendees = [], []
+            for i in chunk:
+                project_id = self.random.choice(project_ids) if project_ids and self.random.random() < 0.6 else None
+                team = self.teams.get(project_id) or self.random.sample(self.user_ids, min(4, len(self.user_ids)))
+                day = self._moment(180, 180).date()
+                start = timezone.make_aware(datetime.combine(day, time(self.random.randint(8, 16), self.random.choice([0, 30]))))
+                events.append(Event(
+                    title=f'{self.random.choice(EVENT_CATEGORIES)}: {self.random.choice(TOPICS)}',
+                    start_date=start, end_date=start + timedelta(minutes=30 * self.random.randint(1, 8)),
+                    category=self.random.choice(EVENT_CATEGORIES), owner_id=team[0],
+                    pipeline_stage='Completed' if day < self.now.date() else self.random.choice(stages[:3]),
+                    linked_project_id=project_id, created_at=start - timedelta(days=self.random.randint(1, 30)),
+                ))
+                attendees.append(self._people(team, ATTENDEES))
+            self._write(Event, events)
+            self.loader.link(Event.attendees, [
+                (event.pk, user_id) for event, people in zip(events, attendees) for user_id in people
+            ])
+
+    def outputs(self, total):
+        types = [choice for choice, _ in Output.TYPE_CHOICES]
+        statuses = [choice for choice, _ in Output.STATUS_CHOICES]
+        project_ids = list(self.teams)
+        for chunk in self._chunks(total):
+            outputs, authors = [], []
+            for i in chunk:
+                project_id = self.random.choice(project_ids)
+                outputs.append(Output(
+                    project_id=project_id, output_type=self.random.choice(types), status=self.random.choice(statuses),
+                    title=f'{self.random.choice(TOPICS)}: findings {i}', date=self._moment(2 * 365).date(),
+                ))
+                authors.append(self._people(self.teams[project_id], AUTHORS))
+            self._write(Output, outputs)
+            self.loader.link(Output.authors, [
+                (output.pk, user_id) for output, people in zip(outputs, authors) for user_id in people
+            ])
+
+    def partners(self, total):
+        sectors = [choice for choice, _ in Partner.SECTOR_CHOICES]
+        engagements = [choice for choice, _ in Partner.ENGAGEMENT_CHOICES]
+        project_ids = list(self.teams)
+        for chunk in self._chunks(total):
+            self._write(Partner, [
+                Partner(
+                    name=f'{self.random.choice(LAST_NAMES)} {self.random.choice(["Foundation", "Ltd", "Trust", "Institute"])} {i}',
+                    sector=self.random.choice(sectors), contact=self.random.choice(FIRST_NAMES),
+                    email=f'{self.tag}-partner{i}@example.com', engagement=self.random.choice(engagements),
+                    project_id=self.random.choice(project_ids) if project_ids and self.random.random() < 0.5 else None,
+                )
+                for i in chunk
+            ])
+
+    def run(self, log=logger.info):
+        """Generate every model in dependency order. Returns the number of rows created per model."""
+        if self.counts.get('users', 0) < 2:
+            raise ValueError('At least two users are needed.')
+        created = {}
+        for step in ('users', 'projects', 'tasks', 'messages', 'events', 'outputs', 'partners'):
+            total = self.counts.get(step, 0)
+            if step not in ('users', 'projects') and total and not self.teams:
+                raise ValueError(f'Generating {step} needs at least one project.')
+            started = timezone.now()
+            getattr(self, step)(total)
+            created[step] = total
+            log(f'{step}: {total} in {(timezone.now() - started).total_seconds():.1f}s')
+        started = timezone.now()
+        indexed = self.loader.finish(index=self.index)
+        if self.index:
+            log(f'search index: {sum(indexed.values())} documents in {(timezone.now() - started).total_seconds():.1f}s')
+        return created
@@ -0,0 +1,242 @@
+"""
+Task dependency graph.
+
+``Task.dependencies`` is a directed edge from a task to each task it waits on.
+``TaskGraph`` loads the tasks and edges of one or more projects in a single
+query (tasks LEFT JOIN the dependency table), detects cycles, and schedules
+the project with the critical path method. Every task takes
+``TASK_DURATION_DAYS``; completed tasks take no time. Each task's latest
+finish is bounded by its own ``due_date`` as well as by its successors. Slack
+is the number of days a task can slip before some due date is missed. The
+critical path is the chain of tasks with the least slack that drives the
+project finish.
+
+Dependencies may cross projects, so write-time cycle checks don't use the
+per-project graph. They load every task reachable from the new dependencies
+with one recursive query (``TaskGraph.reachable_from``).
+"""
+from collections import deque
+from datetime import timedelta
+from django.core.cache import cache
+from django.db import connection
+from .models import Task
+
+TASK_DURATION_DAYS = 1
+CRITICAL_PATH_CACHE_TIMEOUT = 60 * 60
+
+REACHABLE_SQL = """
+WITH RECURSIVE reachable (id) AS (
+    SELECT id FROM {tasks} WHERE id IN ({seeds})
+    UNION
+    SELECT d.{target} FROM {through} d INNER JOIN reachable r ON d.{source} = r.id
+)
+SELECT r.id, d.{target} FROM reachable r LEFT JOIN {through} d ON d.{source} = r.id
+"""
+
+
+class DependencyCycleError(ValueError):
+    def __init__(self, cycle):
+        self.cycle = cycle
+        super().__init__(f"Task dependencies form a cycle: {' -> '.join(str(task_id) for task_id in cycle)}")
+
+
+class TaskGraph:
+    def __init__(self, tasks, dependencies):
+        # tasks: {id: {'title', 'due_date', 'status'}}; dependencies: {id: set of ids it waits on}.
+        # Edges to tasks outside ``tasks`` (other projects) are left out of the schedule.
+        self.tasks = tasks
+        self.dependencies = {task_id: set(dependencies.get(task_id, ())) & set(tasks) for task_id in tasks}
+
+    @classmethod
+    def for_projects(cls, project_ids):
+        tasks, dependencies = {}, {}
+        rows = Task.objects.filter(project_id__in=project_ids).values_list(
+            'id', 'title', 'due_date', 'status', 'dependencies'
+        )
+        for task_id, title, due_date, status, dependency_id in rows:
+            tasks.setdefault(task_id, {'title': title, 'due_date': due_date, 'status': status})
+            if dependency_id is not None:
+                dependencies.setdefault(task_id, set()).add(dependency_id)
+        return cls(tasks, dependencies)
+
+    @classmethod
+    def for_project(cls, project_id):
+        return cls.for_projects([project_id])
+
+    @classmethod
+    def reachable_from(cls, task_ids):
+        """The tasks ``task_ids`` depend on, directly or transitively, in any project, with their edges."""
+        task_ids = list(task_ids)
+        if not task_ids:
+            return cls({}, {})
+        field = Task._meta.get_field('dependencies')
+        quote = connection.ops.quote_name
+        sql = REACHABLE_SQL.format(
+            tasks=quote(Task._meta.db_table), through=quote(field.m2m_db_table()),
+            source=quote(field.m2m_column_name()), target=quote(field.m2m_reverse_name()),
+            seeds=', '.join(['%s'] * len(task_ids)),
+        )
+        tasks, dependencies = {}, {}
+        with connection.cursor() as cursor:
+            cursor.execute(sql, task_ids)
+            for task_id, dependency_id in cursor.fetchall():
+                tasks.setdefault(task_id, {'title': None, 'due_date': None, 'status': None})
+                if dependency_id is not None:
+                    dependencies.setdefault(task_id, set()).add(dependency_id)
+        return cls(tasks, dependencies)
+
+    def with_dependencies(self, replacements):
+        """A copy of the graph with the dependency sets of some tasks replaced."""
+        dependencies = dict(self.dependencies)
+        tasks = dict(self.tasks)
+        for task_id, depends_on in replacements.items():
+            tasks.setdefault(task_id, {'title': None, 'due_date': None, 'status': None})
+            dependencies[task_id] = set(depends_on)
+        for depends_on in replacements.values():
+            for task_id in depends_on:
+                tasks.setdefault(task_id, {'title': None, 'due_date': None, 'status': None})
+        return TaskGraph(tasks, dependencies)
+
+    def successors(self):
+        successors = {task_id: [] for task_id in self.tasks}
+        for task_id, depends_on in self.dependencies.items():
+            for dependency_id in depends_on:
+                successors[dependency_id].append(task_id)
+        return successors
+
+    def find_cycle(self):
+        """Return one dependency cycle as a list of task ids, or None."""
+        WHITE, GREY, BLACK = 0, 1, 2
+        colour = dict.fromkeys(self.tasks, WHITE)
+        for start in self.tasks:
+            if colour[start] != WHITE:
+                continue
+            # Iterative DFS; the stack holds (node, iterator over its dependencies)
+            path, stack = [start], [(start, iter(sorted(self.dependencies[start])))]
+            colour[start] = GREY
+            while stack:
+                node, children = stack[-1]
+                child = next(children, None)
+                if child is None:
+                    colour[node] = BLACK
+                    stack.pop()
+                    path.pop()
+                elif colour[child] == GREY:
+                    return path[path.index(child):] + [child]
+                elif colour[child] == WHITE:
+                    colour[child] = GREY
+                    path.append(child)
+                    stack.append((child, iter(sorted(self.dependencies[child]))))
+        return None
+
+    def topological_order(self):
+        """Task ids ordered so every task comes after the tasks it depends on."""
+        remaining = {task_id: len(depends_on) for task_id, depends_on in self.dependencies.items()}
+        successors = self.successors()
+        ready = deque(sorted(task_id for task_id, count in remaining.items() if count == 0))
+        order = []
+        while ready:
+            task_id = ready.popleft()
+            order.append(task_id)
+            for successor in successors[task_id]:
+                remaining[successor] -= 1
+                if remaining[successor] == 0:
+                    ready.append(successor)
+        if len(order) != len(self.tasks):
+            raise DependencyCycleError(self.find_cycle())
+        return order
+
+    def schedule(self, start_date):
+        order = self.topological_order()
+        successors = self.successors()
+
+        def duration(task_id):
+            return timedelta(days=0 if self.tasks[task_id]['status'] == 'Done' else TASK_DURATION_DAYS)
+
+        earliest_start, earliest_finish = {}, {}
+        for task_id in order:
+            start = max([start_date] + [earliest_finish[dep] for dep in self.dependencies[task_id]])
+            earliest_start[task_id] = start
+            earliest_finish[task_id] = start + duration(task_id)
+
+        project_finish = max(earliest_finish.values(), default=start_date)
+        latest_start, latest_finish = {}, {}
+        for task_id in reversed(order):
+            bounds = [latest_start[successor] for successor in successors[task_id]]
+            due_date = self.tasks[task_id]['due_date']
+            bounds.append(due_date if due_date is not None else project_finish)
+            latest_finish[task_id] = min(bounds)
+            latest_start[task_id] = latest_finish[task_id] - duration(task_id)
+
+        slack = {task_id: (latest_start[task_id] - earliest_start[task_id]).days for task_id in order}
+        min_slack = min(slack.values(), default=0)
+
+        # Walk back from the latest-finishing least-slack task through the
+        # predecessors that determine its earliest start.
+        critical_path = []
+        critical = [task_id for task_id in order if slack[task_id] == min_slack]
+        if critical:
+            current = max(critical, key=lambda task_id: (earliest_finish[task_id], task_id))
+            while current is not None:
+                critical_path.append(current)
+                drivers = [
+                    dep for dep in self.dependencies[current]
+                    if slack[dep] == min_slack and earliest_finish[dep] == earliest_start[current]
+                ]
+                current = min(drivers) if drivers else None
+            critical_path.reverse()
+
+        return {
+            'order': order,
+            'finish_date': project_finish,
+            'min_slack': min_slack,
+            'critical_path': critical_path,
+            'tasks': [
+                {
+                    'id': task_id,
+                    'title': self.tasks[task_id]['title'],
+                    'due_date': self.tasks[task_id]['due_date'],
+                    'dependencies': sorted(self.dependencies[task_id]),
+                    'earliest_start': earliest_start[task_id],
+                    'earliest_finish': earliest_finish[task_id],
+                    'latest_start': latest_start[task_id],
+                    'latest_finish': latest_finish[task_id],
+                    'slack': slack[task_id],
+                }
+                for task_id in order
+            ],
+        }
+
+
+def critical_path_cache_key(project_id):
+    return f'graph:critical-path:{project_id}'
+
+
+def invalidate_critical_path(project_id):
+    if project_id is not None:
+        cache.delete(critical_path_cache_key(project_id))
+
+
+def project_critical_path(project):
+    """Cached schedule for ``project``; raises DependencyCycleError if the graph is cyclic."""
+    key = critical_path_cache_key(project.pk)
+    result = cache.get(key)
+    if result is None:
+        result = TaskGraph.for_project(project.pk).schedule(project.start_date)
+        result['project'] = project.pk
+        cache.set(key, result, CRITICAL_PATH_CACHE_TIMEOUT)
+    return result
+
+
+def check_dependencies(replacements):
+    """
+    Raise DependencyCycleError if giving tasks the dependency sets in
+    ``replacements`` ({task_id: dependency ids}) would create a cycle.
+    """
+    # A new cycle has to run through a replaced task, so it lies within what the new dependencies reach
+    graph = TaskGraph.reachable_from(
+        {dep for deps in replacements.values() for dep in deps}
+    ).with_dependencies(replacements)
+    cycle = graph.find_cycle()
+    if cycle:
+        raise DependencyCycleError(cycle)
@@ -0,0 +1,127 @@
+"""
+Per-request query instrumentation.
+
+``QueryBudgetMiddleware`` profiles a sample of requests (``QUERY_SAMPLE_RATE``)
+through a database execute wrapper. For each one it counts queries, adds up
+their time and groups them by SQL text. Django passes parameters separately,
+so the same statement run for every row of a list (an N+1) shows up as one
+SQL string repeated. Sampled responses get a ``Server-Timing: db`` header.
+Reads over their view's budget (``QUERY_BUDGETS``, keyed by URL name, else
+``QUERY_BUDGET_DEFAULT``) or repeating a statement more than
+``QUERY_DUPLICATE_LIMIT`` times are logged as warnings. Writes are only
+logged at debug level, since batched inserts legitimately repeat statements.
+
+Unsampled requests pay for one ``random()`` call, so sampling can stay on in
+production. ``budget_routes`` lists the routes the test suite holds to their
+budgets, detail routes included when it is given row ids.
+"""
+import logging
+import random
+import time
+from collections import Counter
+from importlib import import_module
+from django.conf import settings
+from django.db import connection
+from django.urls import URLPattern, URLResolver, reverse
+
+logger = logging.getLogger(__name__)
+
+
+class QueryProfile:
+    """Counts, times and groups the queries run while installed as an execute wrapper."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.statements = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - start
+            self.count += 1
+            self.statements[sql] += 1
+
+    def duplicates(self, limit=1):
+        """Statements run more than ``limit`` times, most repeated first."""
+        return [(sql, times) for sql, times in self.statements.most_common() if times > limit]
+
+
+def query_budget(view_name):
+    return settings.QUERY_BUDGETS.get(view_name, settings.QUERY_BUDGET_DEFAULT)
+
+
+class QueryBudgetMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if random.random() >= settings.QUERY_SAMPLE_RATE:
+            return self.get_response(request)
+
+        profile = QueryProfile()
+        with connection.execute_wrapper(profile):
+            response = self.get_response(request)
+        response['Server-Timing'] = f'db;dur={profile.duration * 1000:.1f};desc="{profile.count} queries"'
+        self._report(request, response, profile)
+        return response
+
+    @staticmethod
+    def _report(request, response, profile):
+        match = request.resolver_match
+        view_name = match.view_name if match else request.path
+        budget = query_budget(view_name)
+        duplicates = profile.duplicates(settings.QUERY_DUPLICATE_LIMIT)
+        summary = (
+            f"{request.method} {request.path} ({view_name}) -> {response.status_code}: "
+            f"{profile.count} queries in {profile.duration * 1000:.1f}ms"
+        )
+        if request.method in ('GET', 'HEAD') and (profile.count > budget or duplicates):
+            repeated = '; '.join(f'{times}x {sql[:200]}' for sql, times in duplicates[:3])
+            logger.warning(f"{summary}, budget {budget}." + (f" Repeated: {repeated}" if repeated else ''))
+        else:
+            logger.debug(summary)
+
+
+def _walk(patterns, prefix=''):
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            yield from _walk(pattern.url_patterns, prefix + (f'{pattern.namespace}:' if pattern.namespace else ''))
+        elif isinstance(pattern, URLPattern):
+            yield prefix, pattern
+
+
+def _handles_get(callback):
+    actions = getattr(callback, 'actions', None)
+    if actions is not None:
+        return 'get' in actions
+    view_class = getattr(callback, 'cls', None)
+    return view_class is not None and hasattr(view_class, 'get')
+
+
+def _basename(callback):
+    # Router-built viewset views keep their registration basename in initkwargs
+    return getattr(callback, 'initkwargs', {}).get('basename')
+
+
+def budget_routes(urlconf='core.urls', pks=None):
+    """
+    ``(url name, path)`` of every GET route in ``urlconf``. Routes that take a
+    ``pk`` (retrieve and detail actions) are included for the viewsets whose
+    router basename has a row id in ``pks``; other routes with URL arguments,
+    such as format suffixes, are skipped.
+    """
+    pks = pks or {}
+    routes = {}
+    for prefix, pattern in _walk(import_module(urlconf).urlpatterns):
+        if not pattern.name or not _handles_get(pattern.callback):
+            continue
+        name = prefix + pattern.name
+        arguments = set(pattern.pattern.regex.groupindex)
+        if not arguments and not pattern.pattern.regex.groups:
+            routes.setdefault(name, reverse(name))
+        elif arguments == {'pk'} and _basename(pattern.callback) in pks:
+            routes.setdefault(name, reverse(name, kwargs={'pk': pks[_basename(pattern.callback)]}))
+    return sorted(routes.items())
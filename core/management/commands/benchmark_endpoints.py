@@ -0,0 +1,54 @@
+import os
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from core import benchmark
+
+
+class Command(BaseCommand):
+    help = 'Times every GET endpoint as each role and stores latency, query and memory figures as JSON.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=20)
+        parser.add_argument('--warmup', type=int, default=2)
+        parser.add_argument('--page-size', type=int, default=50, help='0 benchmarks unpaginated lists.')
+        parser.add_argument('--cold', action='store_true', help='Clear the cache before every request.')
+        parser.add_argument('--role', action='append', dest='roles', help='Only this role (repeatable).')
+        parser.add_argument('--no-memory', action='store_true', help='Skip the tracemalloc run.')
+        parser.add_argument('--output', help='Result file (default: benchmarks/<commit>-<time>.json).')
+        parser.add_argument('--compare', help='Earlier result file to compare against.')
+        parser.add_argument('--threshold', type=float, default=0.2, help='p95 slowdown reported as a regression.')
+
+    def handle(self, *args, **options):
+        if options['iterations'] < 1:
+            raise CommandError('--iterations must be at least 1.')
+        baseline = benchmark.load(options['compare']) if options['compare'] else None
+
+        report = benchmark.EndpointBenchmark(
+            iterations=options['iterations'], warmup=options['warmup'], page_size=options['page_size'],
+            cold=options['cold'], roles=options['roles'], memory=not options['no_memory'],
+        ).run(log=self.stdout.write)
+
+        output = options['output']
+        if not output:
+            directory = os.path.join(settings.BASE_DIR, 'benchmarks')
+            os.makedirs(directory, exist_ok=True)
+            stamp = report['created_at'][:19].replace(':', '')
+            output = os.path.join(directory, f"{report['commit'] or 'nocommit'}-{stamp}.json")
+        benchmark.save(report, output)
+        self.stdout.write(self.style.SUCCESS(f"Wrote {len(report['results'])} results to {output}."))
+
+        if baseline is None:
+            return
+        if baseline['rows'] != report['rows']:
+            self.stdout.write(self.style.WARNING('The datasets differ; timings are not directly comparable.'))
+        regressions = 0
+        for row in benchmark.compare(baseline, report):
+            change = row['p95_change']
+            flagged = change is not None and change > options['threshold']
+            regressions += flagged
+            line = (
+                f"{row['role']:<20} {row['endpoint']:<32} p95 {row['p95_ms'][0]:>8.1f} -> {row['p95_ms'][1]:>8.1f}ms"
+                f"  queries {row['queries'][0]} -> {row['queries'][1]}"
+            )
+            self.stdout.write(self.style.ERROR(line) if flagged or row['queries'][1] > row['queries'][0] else line)
+        self.stdout.write(f'{regressions} endpoints slower than the baseline by more than {options["threshold"]:.0%} at p95.')
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand, CommandError
+from core.datagen import PRESETS, DEFAULT_PASSWORD, DatasetGenerator
+from core.models import User
+
+
+class Command(BaseCommand):
+    help = 'Generates a synthetic dataset with bulk inserts, for local load testing.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--preset', choices=sorted(PRESETS), default='small')
+        for model in PRESETS['small']:
+            parser.add_argument(f'--{model}', type=int, help=f'Number of {model} (overrides the preset).')
+        parser.add_argument('--seed', type=int, default=0, help='Random seed; also tags the generated usernames.')
+        parser.add_argument('--chunk-size', type=int, default=5000)
+        parser.add_argument('--password', default=DEFAULT_PASSWORD)
+        parser.add_argument('--skip-search-index', action='store_true', help='Do not rebuild the search index.')
+
+    def handle(self, *args, **options):
+        counts = dict(PRESETS[options['preset']])
+        for model in counts:
+            if options[model] is not None:
+                counts[model] = options[model]
+
+        generator = DatasetGenerator(
+            counts, seed=options['seed'], chunk_size=options['chunk_size'],
+            password=options['password'], index=not options['skip_search_index'],
+        )
+        if User.objects.filter(username__startswith=f'{generator.tag}-').exists():
+            raise CommandError(f'A dataset with seed {options["seed"]} already exists; pass another --seed.')
+        try:
+            created = generator.run(log=self.stdout.write)
+        except ValueError as e:
+            raise CommandError(str(e))
+        self.stdout.write(self.style.SUCCESS(f'Generated {sum(created.values())} rows.'))
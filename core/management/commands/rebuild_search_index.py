@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+from core.search import SearchIndex
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the full-text search index from the indexed models.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        counts = SearchIndex.rebuild(chunk_size=options['chunk_size'])
+        for content_type, count in counts.items():
+            self.stdout.write(f'{content_type}: {count}')
+        self.stdout.write(self.style.SUCCESS(f'Indexed {sum(counts.values())} documents.'))
@@ -0,0 +1,184 @@
+"""
+Message thread loading and mailbox queries.
+
+Conversations hang off ``Message.parent``. Instead of walking the tree one
+level at a time (one query per reply per depth), ``MessageThread`` pulls every
+message of a conversation with a single recursive CTE and stitches the tree
+together in memory.
+
+Mailbox queries each use one composite index: ``(receiver, timestamp)`` for
+the inbox, ``(receiver, is_read, timestamp)`` for unread mail and its count,
+``(sender, timestamp)`` for sent mail. A user's whole mailbox is the UNION ALL
+of the two sides instead of ``sender = x OR receiver = x`` with DISTINCT.
+``UnreadCounter`` keeps the badge count in the cache and adjusts it in place.
+
+``mark_read`` and ``archive`` change any number of the receiver's messages
+with one ``UPDATE`` and return how many actually changed.
+"""
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+from django.utils import timezone
+from .models import Message
+from . import changes
+
+UNREAD_COUNT_TIMEOUT = 10 * 60
+
+
+def inbox(user, unread_only=False):
+    queryset = Message.objects.filter(receiver=user)
+    return queryset.filter(is_read=False) if unread_only else queryset
+
+
+def sent(user):
+    return Message.objects.filter(sender=user)
+
+
+def mailbox(user):
+    """Every message ``user`` sent or received."""
+    ids = inbox(user).values('id').union(sent(user).values('id'), all=True)
+    return Message.objects.filter(pk__in=ids)
+
+
+class UnreadCounter:
+    """
+    Cached unread count per receiver. New messages increment it and bulk
+    mark-read decrements it; anything less certain drops the entry, and the
+    next read recounts from the ``(receiver, is_read)`` index prefix.
+    """
+
+    @staticmethod
+    def cache_key(user_id):
+        return f'messages:unread:{user_id}'
+
+    @classmethod
+    def get(cls, user_id):
+        key = cls.cache_key(user_id)
+        count = cache.get(key)
+        if count is None:
+            count = Message.objects.filter(receiver_id=user_id, is_read=False).count()
+            cache.add(key, count, UNREAD_COUNT_TIMEOUT)
+        return count
+
+    @classmethod
+    def adjust(cls, user_id, delta):
+        if not delta:
+            return
+        key = cls.cache_key(user_id)
+        try:
+            count = cache.incr(key, delta)
+        except ValueError:
+            # Not cached; the next get() counts from the database
+            return
+        if count < 0:
+            cache.delete(key)
+
+    @classmethod
+    def invalidate(cls, *user_ids):
+        cache.delete_many([cls.cache_key(user_id) for user_id in user_ids if user_id is not None])
+
+# Climb from the requested message to the root of its conversation, then walk
+# back down collecting every descendant. UNION (rather than UNION ALL) keeps the
+# recursion finite even if a bad write ever introduces a parent cycle.
+THREAD_IDS_SQL = """
+WITH RECURSIVE ancestors (id, parent_id) AS (
+    SELECT id, parent_id FROM {table} WHERE id = %s
+    UNION
+    SELECT m.id, m.parent_id FROM {table} m INNER JOIN ancestors a ON m.id = a.parent_id
+),
+thread (id) AS (
+    SELECT id FROM ancestors WHERE parent_id IS NULL
+    UNION
+    SELECT m.id FROM {table} m INNER JOIN thread t ON m.parent_id = t.id
+)
+SELECT id FROM thread
+"""
+
+
+class MessageThread:
+    """An in-memory conversation tree assembled from a flat list of messages."""
+
+    def __init__(self, messages):
+        self.messages = messages
+        self.children = {}
+        self.roots = []
+
+        loaded_ids = {message.id for message in messages}
+        for message in messages:
+            # Messages whose parent is not visible to the reader are promoted to
+            # the top level so nothing the reader may see is dropped.
+            if message.parent_id in loaded_ids:
+                self.children.setdefault(message.parent_id, []).append(message)
+            else:
+                self.roots.append(message)
+
+    @classmethod
+    def load(cls, message_id, user=None):
+        """
+        Load the whole conversation containing ``message_id`` in one query.
+        When ``user`` is given only messages they sent or received are kept.
+        """
+        sql = THREAD_IDS_SQL.format(table=Message._meta.db_table)
+        queryset = (
+            Message.objects.select_related('sender', 'receiver')
+            .filter(pk__in=RawSQL(sql, [message_id]))
+            .order_by('timestamp', 'id')
+        )
+        if user is not None:
+            queryset = queryset.filter(Q(sender=user) | Q(receiver=user))
+        return cls(list(queryset))
+
+    def nest(self, serialized):
+        """
+        Arrange serialized messages (in the same order as ``self.messages``) into
+        nested ``replies`` lists. Built iteratively so deep chains cannot hit the
+        recursion limit.
+        """
+        by_id = {}
+        for message, data in zip(self.messages, serialized):
+            data = dict(data)
+            data['replies'] = []
+            by_id[message.id] = data
+
+        for parent_id, replies in self.children.items():
+            by_id[parent_id]['replies'] = [by_id[reply.id] for reply in replies]
+
+        return [by_id[root.id] for root in self.roots]
+
+
+def _select(queryset, ids=None, thread=None, project=None, before=None):
+    if ids is not None:
+        queryset = queryset.filter(pk__in=ids)
+    if thread is not None:
+        queryset = queryset.filter(pk__in=RawSQL(THREAD_IDS_SQL.format(table=Message._meta.db_table), [thread]))
+    if project is not None:
+        queryset = queryset.filter(project_id=project)
+    if before is not None:
+        queryset = queryset.filter(timestamp__lt=before)
+    return queryset
+
+
+def _update(queryset, **values):
+    with transaction.atomic():
+        # The ids feed the change log; locking them keeps the count exact
+        ids = list(queryset.select_for_update().values_list('id', flat=True))
+        if ids:
+            Message.objects.filter(pk__in=ids).update(updated_at=timezone.now(), **values)
+            changes.record(Message, ids)
+    return len(ids)
+
+
+def mark_read(user, **selection):
+    """
+    Mark the unread messages ``user`` received that match ``selection`` (``ids``,
+    ``thread``, ``project``, ``before``) as read. Returns the number marked.
+    """
+    count = _update(_select(inbox(user, unread_only=True), **selection), is_read=True)
+    transaction.on_commit(lambda: UnreadCounter.adjust(user.pk, -count))
+    return count
+
+
+def archive(user, **selection):
+    """Archive the messages ``user`` received that match ``selection``. Returns the number archived."""
+    return _update(_select(inbox(user).exclude(status='archived'), **selection), status='archived')
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.11 on 2026-10-18 04:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_founder_founderproject'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='message',
+            index=models.Index(fields=['timestamp'], name='core_messag_timesta_647fca_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='output',
+            index=models.Index(fields=['date'], name='core_output_date_0396a4_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='project',
+            index=models.Index(fields=['created_at'], name='core_projec_created_1f5557_idx'),
+        ),
+    ]
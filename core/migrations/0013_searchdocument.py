@@ -0,0 +1,115 @@
+# Generated by Django 5.2.11 on 2026-10-18 04:17
+
+from django.db import migrations, models
+
+# Postgres: a generated, weighted tsvector column with a GIN index, so the
+# vector is maintained by the database on every write.
+POSTGRES_SQL = (
+    """
+    ALTER TABLE core_searchdocument ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(body, '')), 'B')
+    ) STORED
+    """,
+    'CREATE INDEX core_searchdocument_vector_gin ON core_searchdocument USING GIN (search_vector)',
+)
+POSTGRES_REVERSE_SQL = (
+    'DROP INDEX IF EXISTS core_searchdocument_vector_gin',
+    'ALTER TABLE core_searchdocument DROP COLUMN IF EXISTS search_vector',
+)
+
+# SQLite: an external-content FTS5 table kept in step by triggers.
+SQLITE_SQL = (
+    """
+    CREATE VIRTUAL TABLE core_searchdocument_fts USING fts5(
+        title, body, content='core_searchdocument', content_rowid='id', tokenize='porter unicode61'
+    )
+    """,
+    """
+    CREATE TRIGGER core_searchdocument_ai AFTER INSERT ON core_searchdocument BEGIN
+        INSERT INTO core_searchdocument_fts(rowid, title, body) VALUES (new.id, new.title, new.body);
+    END
+    """,
+    """
+    CREATE TRIGGER core_searchdocument_ad AFTER DELETE ON core_searchdocument BEGIN
+        INSERT INTO core_searchdocument_fts(core_searchdocument_fts, rowid, title, body)
+        VALUES ('delete', old.id, old.title, old.body);
+    END
+    """,
+    """
+    CREATE TRIGGER core_searchdocument_au AFTER UPDATE ON core_searchdocument BEGIN
+        INSERT INTO core_searchdocument_fts(core_searchdocument_fts, rowid, title, body)
+        VALUES ('delete', old.id, old.title, old.body);
+        INSERT INTO core_searchdocument_fts(rowid, title, body) VALUES (new.id, new.title, new.body);
+    END
+    """,
+)
+SQLITE_REVERSE_SQL = (
+    'DROP TRIGGER IF EXISTS core_searchdocument_au',
+    'DROP TRIGGER IF EXISTS core_searchdocument_ad',
+    'DROP TRIGGER IF EXISTS core_searchdocument_ai',
+    'DROP TABLE IF EXISTS core_searchdocument_fts',
+)
+
+# content_type -> (model, title field, body field)
+BACKFILL = {
+    'project': ('Project', 'title', None),
+    'task': ('Task', 'title', None),
+    'output': ('Output', 'title', None),
+    'message': ('Message', 'subject', 'content'),
+    'idea': ('Idea', 'project_title', 'projects_desc'),
+}
+
+
+def _run(schema_editor, statements):
+    for sql in statements.get(schema_editor.connection.vendor, ()):
+        schema_editor.execute(sql)
+
+
+def create_fulltext_index(apps, schema_editor):
+    _run(schema_editor, {'postgresql': POSTGRES_SQL, 'sqlite': SQLITE_SQL})
+
+
+def drop_fulltext_index(apps, schema_editor):
+    _run(schema_editor, {'postgresql': POSTGRES_REVERSE_SQL, 'sqlite': SQLITE_REVERSE_SQL})
+
+
+def backfill(apps, schema_editor):
+    SearchDocument = apps.get_model('core', 'SearchDocument')
+    for content_type, (model_name, title_field, body_field) in BACKFILL.items():
+        fields = ['id', title_field] + ([body_field] if body_field else [])
+        rows = apps.get_model('core', model_name).objects.values_list(*fields).iterator(chunk_size=2000)
+        batch = []
+        for row in rows:
+            batch.append(SearchDocument(
+                content_type=content_type, object_id=row[0], title=row[1] or '', body=(row[2] or '') if body_field else '',
+            ))
+            if len(batch) == 2000:
+                SearchDocument.objects.bulk_create(batch)
+                batch = []
+        SearchDocument.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_task_status_due_date_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchDocument',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('content_type', models.CharField(choices=[('project', 'Project'), ('task', 'Task'), ('output', 'Output'), ('message', 'Message'), ('idea', 'Idea')], max_length=20)),
+                ('object_id', models.BigIntegerField()),
+                ('title', models.TextField(blank=True)),
+                ('body', models.TextField(blank=True)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('content_type', 'object_id'), name='unique_search_document')],
+            },
+        ),
+        migrations.RunPython(create_fulltext_index, drop_fulltext_index),
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
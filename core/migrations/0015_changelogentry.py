@@ -0,0 +1,29 @@
+# Generated by Django 5.2.11 on 2026-10-18 04:21
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0014_updated_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChangeLogEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('resource', models.CharField(choices=[('project', 'Project'), ('task', 'Task'), ('event', 'Event'), ('message', 'Message'), ('output', 'Output')], max_length=20)),
+                ('object_id', models.BigIntegerField()),
+                ('action', models.CharField(choices=[('upsert', 'Created or updated'), ('delete', 'Deleted')], max_length=10)),
+                ('project_id', models.BigIntegerField(blank=True, null=True)),
+                ('user_ids', models.JSONField(blank=True, default=list)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['resource', 'id'], name='core_change_resourc_f2d773_idx'), models.Index(fields=['created_at'], name='core_change_created_c32e93_idx')],
+            },
+        ),
+    ]
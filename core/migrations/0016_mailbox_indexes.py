@@ -0,0 +1,33 @@
+# Generated by Django 5.2.11 on 2026-10-18 04:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0015_changelogentry'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='message',
+            name='core_messag_sender__064541_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='message',
+            name='core_messag_receive_374293_idx',
+        ),
+        migrations.AddIndex(
+            model_name='message',
+            index=models.Index(fields=['receiver', 'timestamp'], name='core_messag_receive_f9aaf3_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='message',
+            index=models.Index(fields=['receiver', 'is_read', 'timestamp'], name='core_messag_receive_a1f22e_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='message',
+            index=models.Index(fields=['sender', 'timestamp'], name='core_messag_sender__a9bcec_idx'),
+        ),
+    ]
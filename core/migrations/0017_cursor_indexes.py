@@ -0,0 +1,21 @@
+# Generated by Django 5.2.11 on 2026-10-18 05:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0016_mailbox_indexes'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='output',
+            name='core_output_date_0396a4_idx',
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['created_at'], name='core_task_created_9e4493_idx'),
+        ),
+    ]
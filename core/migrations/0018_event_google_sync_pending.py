@@ -0,0 +1,18 @@
+# Generated by Django 5.2.11 on 2026-10-18 05:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0017_cursor_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='event',
+            name='google_sync_pending',
+            field=models.BooleanField(default=False),
+        ),
+    ]
@@ -1,6 +1,7 @@
 from django.db import models
 from django.contrib.auth.models import AbstractUser
 from django.core.validators import MinValueValidator, MaxValueValidator
+from django.utils import timezone
 
 class User(AbstractUser):
     # Named constants for the three primary spec roles
@@ -54,6 +55,7 @@ class Project(models.Model):
         indexes = [
             models.Index(fields=['status']),
             models.Index(fields=['project_type']),
+            models.Index(fields=['created_at']),
         ]
 
     def __str__(self):
@@ -78,6 +80,7 @@ class Partner(models.Model):
     phone = models.CharField(max_length=50, blank=True)
     engagement = models.CharField(max_length=20, choices=ENGAGEMENT_CHOICES)
     project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='partners', null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         indexes = [
@@ -108,12 +111,16 @@ class Task(models.Model):
     # or separate models if performance on subtask queries is needed.
     # Given "least amount of time", models allow indexing and prefetching.
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         indexes = [
-            models.Index(fields=['status']),
+            # Leading status also serves the plain status filters; the sweeper range-scans due_date within it
+            models.Index(fields=['status', 'due_date']),
             models.Index(fields=['priority']),
             models.Index(fields=['due_date']),
+            # Keyset pagination cursor
+            models.Index(fields=['created_at']),
         ]
 
 class SubTask(models.Model):
@@ -143,6 +150,7 @@ class Output(models.Model):
     frequency = models.CharField(max_length=50, blank=True) # e.g. Monthly, Weekly
     resource_url = models.URLField(max_length=500, blank=True, null=True)
     resource_type = models.CharField(max_length=50, blank=True, null=True) # e.g. Model, Paper, Dataset, Prototype
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         indexes = [
@@ -171,13 +179,17 @@ class Message(models.Model):
     priority = models.CharField(max_length=20, choices=PRIORITY_CHOICES, default='normal')
     parent = models.ForeignKey('self', on_delete=models.CASCADE, null=True, blank=True, related_name='replies')
     is_read = models.BooleanField(default=False)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         indexes = [
             models.Index(fields=['status']),
             models.Index(fields=['priority']),
-            models.Index(fields=['sender']),
-            models.Index(fields=['receiver']),
+            # Mailbox queries; see core.messaging
+            models.Index(fields=['receiver', 'timestamp']),
+            models.Index(fields=['receiver', 'is_read', 'timestamp']),
+            models.Index(fields=['sender', 'timestamp']),
+            models.Index(fields=['timestamp']),
         ]
 
 class Event(models.Model):
@@ -202,6 +214,8 @@ class Event(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
     google_event_id = models.CharField(max_length=255, blank=True, null=True)
     google_calendar_link = models.URLField(max_length=500, blank=True, null=True)
+    # Set by every edit and cleared by the owner's next batched calendar sync
+    google_sync_pending = models.BooleanField(default=False)
 
     class Meta:
         indexes = [
@@ -259,3 +273,84 @@ class FounderProject(models.Model):
 
     def __str__(self):
         return self.project_name
+
+class OutboundEmail(models.Model):
+    """A queued notification email, drained in batches by ``core.tasks.drain_email_outbox``."""
+    STATUS_CHOICES = (
+        ('queued', 'Queued'),
+        ('sending', 'Sending'),
+        ('sent', 'Sent'),
+        ('failed', 'Failed'),
+    )
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    from_email = models.CharField(max_length=255)
+    recipients = models.JSONField(default=list)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='queued')
+    attempts = models.PositiveSmallIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    # When the row may next be picked up: the retry time for queued rows,
+    # the lease expiry for rows a worker is currently sending.
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at']),
+        ]
+
+    def __str__(self):
+        return self.subject
+
+class SearchDocument(models.Model):
+    """
+    Searchable text of one row of an indexed model, kept in sync by ``core.search``.
+    The vendor-specific full-text index over it is created in migration 0013.
+    """
+    TYPE_CHOICES = (
+        ('project', 'Project'),
+        ('task', 'Task'),
+        ('output', 'Output'),
+        ('message', 'Message'),
+        ('idea', 'Idea'),
+    )
+    content_type = models.CharField(max_length=20, choices=TYPE_CHOICES)
+    object_id = models.BigIntegerField()
+    title = models.TextField(blank=True)
+    body = models.TextField(blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['content_type', 'object_id'], name='unique_search_document'),
+        ]
+
+class ChangeLogEntry(models.Model):
+    """
+    One create, update or delete of a synced row, in insertion order by ``id``.
+    Feeds the ``changes`` endpoints in ``core.changes``; pruned after a retention period.
+    """
+    RESOURCE_CHOICES = (
+        ('project', 'Project'),
+        ('task', 'Task'),
+        ('event', 'Event'),
+        ('message', 'Message'),
+        ('output', 'Output'),
+    )
+    ACTION_CHOICES = (
+        ('upsert', 'Created or updated'),
+        ('delete', 'Deleted'),
+    )
+    resource = models.CharField(max_length=20, choices=RESOURCE_CHOICES)
+    object_id = models.BigIntegerField()
+    action = models.CharField(max_length=10, choices=ACTION_CHOICES)
+    # Tombstones outlive their rows, so the fields visibility is decided on are copied here
+    project_id = models.BigIntegerField(null=True, blank=True)
+    user_ids = models.JSONField(default=list, blank=True)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['resource', 'id']),
+            models.Index(fields=['created_at']),
+        ]
@@ -0,0 +1,146 @@
+"""
+Durable email outbox.
+
+Notification emails are written to ``OutboundEmail`` inside the request's
+transaction and sent later by a Celery worker. The worker claims queued rows in
+batches and pushes them through one reused mail connection. Queued mail
+survives worker restarts, and a burst of notifications no longer spawns a
+thread per email.
+"""
+import logging
+import time
+from datetime import timedelta
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from .models import OutboundEmail
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 100
+MAX_ATTEMPTS = 5
+# How long a claimed batch stays reserved before another worker may retry it
+SENDING_LEASE = timedelta(minutes=10)
+
+
+def queue_email(subject, message, recipient_list, from_email=None):
+    """Queue an email for delivery once the current transaction commits."""
+    recipients = [address for address in recipient_list if address]
+    if not recipients:
+        return None
+    email = OutboundEmail.objects.create(
+        subject=subject[:255],
+        body=message,
+        from_email=from_email or settings.DEFAULT_FROM_EMAIL,
+        recipients=recipients,
+    )
+    transaction.on_commit(_wake_worker)
+    return email
+
+
+def _wake_worker():
+    from .tasks import drain_email_outbox
+    try:
+        drain_email_outbox.delay()
+    except Exception as e:
+        # The row is already durable; the periodic drain will deliver it.
+        logger.warning(f"Could not enqueue outbox drain, leaving it to the scheduler: {e}")
+
+
+def _claim_batch(batch_size):
+    """
+    Reserve up to ``batch_size`` due emails and count the attempt now, so a
+    worker that dies mid-send still uses up one of the row's attempts. Rows whose
+    lease expired on their last attempt are dead-lettered instead of claimed.
+    Returns ``(claimed, dead_lettered)``.
+    """
+    now = timezone.now()
+    due = Q(status='queued') | Q(status='sending')
+    with transaction.atomic():
+        rows = list(
+            OutboundEmail.objects.select_for_update(skip_locked=True)
+            .filter(due, next_attempt_at__lte=now)
+            .order_by('id')[:batch_size]
+        )
+        batch = [email for email in rows if email.attempts < MAX_ATTEMPTS]
+        exhausted = [email.id for email in rows if email.attempts >= MAX_ATTEMPTS]
+        if batch:
+            OutboundEmail.objects.filter(id__in=[email.id for email in batch]).update(
+                status='sending', next_attempt_at=now + SENDING_LEASE, attempts=F('attempts') + 1
+            )
+        if exhausted:
+            OutboundEmail.objects.filter(id__in=exhausted).update(
+                status='failed', last_error=f'Sending lease expired on attempt {MAX_ATTEMPTS}'
+            )
+            logger.error(f"Dead-lettered outbox emails {exhausted} after {MAX_ATTEMPTS} interrupted attempts.")
+    for email in batch:
+        email.attempts += 1
+    return batch, len(exhausted)
+
+
+def _record_failure(email, error):
+    # The attempt was already counted when the row was claimed
+    if email.attempts >= MAX_ATTEMPTS:
+        status, next_attempt_at = 'failed', timezone.now()
+    else:
+        status, next_attempt_at = 'queued', timezone.now() + timedelta(minutes=2 ** email.attempts)
+    OutboundEmail.objects.filter(id=email.id).update(
+        status=status, last_error=str(error)[:1000], next_attempt_at=next_attempt_at
+    )
+    return status
+
+
+def drain(batch_size=BATCH_SIZE, max_batches=None):
+    """
+    Send every due email in the outbox over a single connection.
+    Returns throughput metrics for the run.
+    """
+    stats = {'sent': 0, 'retrying': 0, 'failed': 0, 'batches': 0}
+    started = time.monotonic()
+    connection = None
+
+    try:
+        while max_batches is None or stats['batches'] < max_batches:
+            batch, dead_lettered = _claim_batch(batch_size)
+            stats['failed'] += dead_lettered
+            if not batch:
+                if dead_lettered:
+                    continue
+                break
+            stats['batches'] += 1
+
+            if connection is None:
+                connection = get_connection(fail_silently=False)
+                connection.open()
+
+            sent_ids = []
+            for email in batch:
+                message = EmailMessage(
+                    email.subject, email.body, email.from_email, email.recipients, connection=connection
+                )
+                try:
+                    connection.send_messages([message])
+                    sent_ids.append(email.id)
+                except Exception as e:
+                    logger.error(f"Error sending outbox email {email.id}: {e}")
+                    stats['retrying' if _record_failure(email, e) == 'queued' else 'failed'] += 1
+
+            OutboundEmail.objects.filter(id__in=sent_ids).update(
+                status='sent', sent_at=timezone.now(), last_error=''
+            )
+            stats['sent'] += len(sent_ids)
+    finally:
+        if connection is not None:
+            connection.close()
+
+    elapsed = time.monotonic() - started
+    stats['seconds'] = round(elapsed, 3)
+    stats['per_second'] = round(stats['sent'] / elapsed, 1) if elapsed else 0.0
+    if stats['batches']:
+        logger.info(
+            f"Outbox drained: {stats['sent']} sent, {stats['retrying']} retrying, "
+            f"{stats['failed']} failed in {stats['seconds']}s ({stats['per_second']}/s)."
+        )
+    return stats
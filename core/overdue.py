@@ -0,0 +1,67 @@
+"""
+Overdue task sweeper.
+
+Flips every task that is past its due date and not finished to ``Overdue``.
+Each chunk is one indexed ``UPDATE ... WHERE id IN (...)`` over rows claimed
+with ``SELECT ... FOR UPDATE SKIP LOCKED`` on the ``(status, due_date)``
+index. Locks are held for one short transaction per chunk, rows a user is
+editing are picked up on the next run, and no task is loaded as a model
+instance.
+
+"Today" is the date in ``CELERY_TIMEZONE``, the zone the nightly beat entry is
+scheduled in, so a task is overdue as soon as that day has started.
+"""
+import logging
+from collections import Counter
+from zoneinfo import ZoneInfo
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from .models import Task
+from .signals import tasks_changed
+from . import changes
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 5000
+SWEEP_STATUSES = ('To Do', 'In Progress')
+
+
+def _sweep_chunk(today, chunk_size):
+    with transaction.atomic():
+        rows = list(
+            Task.objects.select_for_update(skip_locked=True)
+            .filter(status__in=SWEEP_STATUSES, due_date__lt=today)
+            .order_by('due_date', 'id')
+            .values_list('id', 'project_id')[:chunk_size]
+        )
+        if rows:
+            ids = [task_id for task_id, _ in rows]
+            Task.objects.filter(id__in=ids).update(status='Overdue', updated_at=timezone.now())
+            changes.record(Task, ids)
+    return Counter(project_id for _, project_id in rows)
+
+
+def sweep_overdue(today=None, chunk_size=CHUNK_SIZE, max_chunks=None):
+    """
+    Mark past-due tasks as overdue in chunks of ``chunk_size``.
+    Returns the number of tasks flipped per project id.
+    """
+    today = today or timezone.localdate(timezone=ZoneInfo(settings.CELERY_TIMEZONE))
+    per_project, chunks = Counter(), 0
+    while max_chunks is None or chunks < max_chunks:
+        swept = _sweep_chunk(today, chunk_size)
+        if not swept:
+            break
+        per_project.update(swept)
+        chunks += 1
+        tasks_changed(swept)
+
+    for project_id, count in sorted(per_project.items()):
+        logger.info(
+            f"Marked {count} tasks overdue in project {project_id}.",
+            extra={'project_id': project_id, 'overdue_count': count},
+        )
+    total = sum(per_project.values())
+    logger.info(f"Marked {total} tasks overdue across {len(per_project)} projects in {chunks} chunks.")
+    return dict(per_project)
@@ -0,0 +1,27 @@
+from rest_framework.pagination import CursorPagination
+
+
+class KeysetPagination(CursorPagination):
+    """
+    Cursor (keyset) pagination ordered by each viewset's ``cursor_ordering``.
+
+    Pages are located with ``WHERE <column> > <cursor>`` on an indexed column,
+    so deep pages cost the same as the first one. Pagination is opt-in per
+    request: a list is only paginated when the client sends ``cursor`` or
+    ``page_size``, which lets the frontend migrate one endpoint at a time.
+    """
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+    ordering = ('-id',)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        params = request.query_params
+        if self.cursor_query_param not in params and self.page_size_query_param not in params:
+            return None
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_ordering(self, request, queryset, view):
+        ordering = getattr(view, 'cursor_ordering', self.ordering)
+        if isinstance(ordering, str):
+            return (ordering,)
+        return tuple(ordering)
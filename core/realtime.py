@@ -0,0 +1,188 @@
+"""
+Real-time notifications over server-sent events.
+
+``publish`` fans a notification out to users through Redis pub/sub
+(``notify:user:<id>`` channels), so any web or Celery process can publish and
+every ASGI worker holding one of the user's streams receives it. Notifications
+are published only after the surrounding transaction commits.
+
+``notification_stream`` is an async Django view at ``/stream/notifications/``.
+It holds one SSE connection per browser tab and costs no database work while
+idle. ``EventSource`` cannot send headers, so the JWT access token may be
+passed as ``?token=``. It is only served from an ASGI server (the ``stream``
+service in docker-compose, which ``nginx/default.conf`` routes
+``/api/v1/stream/`` to); under WSGI an endless response would hold a whole
+worker, so it answers 501 there. The REST API stays on WSGI.
+
+Without ``REDIS_URL`` an in-process broker is used, which only reaches
+streams served by the same process (development and tests).
+"""
+import asyncio
+import json
+import logging
+import threading
+from functools import lru_cache
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.db import transaction
+from django.http import JsonResponse, StreamingHttpResponse
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+from .authentication import CachedJWTAuthentication
+
+logger = logging.getLogger(__name__)
+
+HEARTBEAT_SECONDS = 25
+RECONNECT_MILLISECONDS = 5000
+
+
+def channel_name(user_id):
+    return f'notify:user:{user_id}'
+
+
+class LocalBroker:
+    """Fan-out between threads of one process, used when Redis isn't configured."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = {}
+
+    def publish(self, channel, data):
+        with self._lock:
+            subscribers = list(self._subscribers.get(channel, ()))
+        for loop, queue in subscribers:
+            loop.call_soon_threadsafe(queue.put_nowait, data)
+
+    def subscribe(self, channel):
+        subscriber = (asyncio.get_running_loop(), asyncio.Queue())
+        with self._lock:
+            self._subscribers.setdefault(channel, set()).add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, channel, subscriber):
+        with self._lock:
+            self._subscribers.get(channel, set()).discard(subscriber)
+
+
+local_broker = LocalBroker()
+
+
+@lru_cache(maxsize=None)
+def _redis():
+    import redis
+    return redis.Redis.from_url(settings.REDIS_URL)
+
+
+def _send(user_ids, data):
+    channels = [channel_name(user_id) for user_id in user_ids]
+    if not settings.REDIS_URL:
+        for channel in channels:
+            local_broker.publish(channel, data)
+        return
+    try:
+        pipe = _redis().pipeline(transaction=False)
+        for channel in channels:
+            pipe.publish(channel, data)
+        pipe.execute()
+    except Exception as e:
+        # Push is best-effort; clients still catch up through the changes feeds
+        logger.warning(f"Could not publish notification to {len(channels)} users: {e}")
+
+
+def notify(user_ids, event, payload):
+    """Notify ``user_ids`` with ``event`` right away."""
+    user_ids = sorted({user_id for user_id in user_ids if user_id is not None})
+    if user_ids:
+        _send(user_ids, json.dumps({'event': event, 'data': payload}, default=str))
+
+
+def publish(user_ids, event, payload):
+    """Notify ``user_ids`` with ``event`` once the current transaction commits."""
+    user_ids = list(user_ids)
+    transaction.on_commit(lambda: notify(user_ids, event, payload))
+
+
+def _authenticate(request):
+    authenticator = CachedJWTAuthentication()
+    raw_token = request.GET.get('token')
+    if not raw_token:
+        header = authenticator.get_header(request)
+        raw_token = authenticator.get_raw_token(header) if header else None
+    if not raw_token:
+        return None
+    try:
+        return authenticator.get_user(authenticator.get_validated_token(raw_token))
+    except (InvalidToken, TokenError, AuthenticationFailed):
+        return None
+
+
+def _format(data):
+    message = json.loads(data)
+    return f"event: {message['event']}\ndata: {json.dumps(message['data'])}\n\n"
+
+
+class LocalSubscription:
+    def __init__(self, channel):
+        self.channel = channel
+
+    async def open(self):
+        self.subscriber = local_broker.subscribe(self.channel)
+
+    async def next(self, timeout):
+        try:
+            return await asyncio.wait_for(self.subscriber[1].get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    async def close(self):
+        local_broker.unsubscribe(self.channel, self.subscriber)
+
+
+class RedisSubscription:
+    def __init__(self, channel):
+        self.channel = channel
+
+    async def open(self):
+        import redis.asyncio as aioredis
+        self.client = aioredis.Redis.from_url(settings.REDIS_URL)
+        self.pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+        await self.pubsub.subscribe(self.channel)
+
+    async def next(self, timeout):
+        message = await self.pubsub.get_message(timeout=timeout)
+        return message['data'].decode() if message else None
+
+    async def close(self):
+        await self.pubsub.unsubscribe(self.channel)
+        await self.pubsub.aclose()
+        await self.client.aclose()
+
+
+async def event_stream(user_id):
+    """SSE frames for ``user_id``: notifications as they arrive, comments as heartbeats."""
+    subscription_class = RedisSubscription if settings.REDIS_URL else LocalSubscription
+    subscription = subscription_class(channel_name(user_id))
+    # Subscribe before the first frame so nothing published after it is missed
+    await subscription.open()
+    try:
+        yield f'retry: {RECONNECT_MILLISECONDS}\n\n'
+        while True:
+            data = await subscription.next(HEARTBEAT_SECONDS)
+            # Heartbeats keep proxies from closing an idle connection
+            yield _format(data) if data is not None else ': keep-alive\n\n'
+    finally:
+        await subscription.close()
+
+
+async def notification_stream(request):
+    if not isinstance(request, ASGIRequest):
+        return JsonResponse({'error': 'Notifications are streamed by the ASGI service only.'}, status=501)
+    user = await sync_to_async(_authenticate)(request)
+    if user is None or not user.is_active:
+        return JsonResponse({'error': 'Authentication credentials were not provided or are invalid.'}, status=401)
+    response = StreamingHttpResponse(event_stream(user.pk), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # Stop nginx from buffering the stream
+    response['X-Accel-Buffering'] = 'no'
+    return response
@@ -1,36 +1,109 @@
+from django.core.cache import cache
+from django.db.models import Count, Q
 from django.utils import timezone
 from datetime import timedelta
 from .models import Project, Task, Output
 
+REPORT_CACHE_TIMEOUT = 60 * 60
+PENDING_STATUSES = ['To Do', 'In Progress', 'Overdue']
+
+
 class ReportGenerator:
+    """
+    Weekly project summaries.
+
+    Reports for any number of projects are built in a fixed number of queries:
+    one grouped aggregate over tasks, plus one query each for pending task
+    titles and new outputs. Results are cached per project and day, and the
+    signals in ``core.signals`` drop a project's entry when its tasks or outputs
+    change.
+    """
+
     @staticmethod
-    def generate_weekly_summary(project_id):
+    def cache_key(project_id, day=None):
+        day = day or timezone.now().date()
+        return f'reports:weekly:{day.isoformat()}:{project_id}'
+
+    @classmethod
+    def invalidate(cls, project_id):
+        if project_id is not None:
+            cache.delete(cls.cache_key(project_id))
+
+    @classmethod
+    def generate_weekly_summary(cls, project_id):
         try:
-            project = Project.objects.get(id=project_id)
-        except Project.DoesNotExist:
+            project_id = int(project_id)
+        except (TypeError, ValueError):
             return None
+        return cls.generate_weekly_summaries([project_id]).get(project_id)
+
+    @classmethod
+    def generate_weekly_summaries(cls, project_ids):
+        """Return ``{project_id: report}`` for every existing project in ``project_ids``."""
+        keys = {cls.cache_key(pid): pid for pid in set(project_ids)}
+        summaries = {keys[key]: report for key, report in cache.get_many(keys).items()}
+
+        missing = [pid for pid in keys.values() if pid not in summaries]
+        if missing:
+            computed = cls._compute(missing)
+            cache.set_many(
+                {cls.cache_key(pid): report for pid, report in computed.items()},
+                REPORT_CACHE_TIMEOUT,
+            )
+            summaries.update(computed)
+        return summaries
 
-        last_week = timezone.now() - timedelta(days=7)
-        
-        # Aggregate tasks completed in the last week
-        completed_tasks = project.tasks.filter(
-            status='Done'
+    @staticmethod
+    def _compute(project_ids):
+        now = timezone.now()
+        last_week = (now - timedelta(days=7)).date()
+
+        reports = {}
+        for project in Project.objects.filter(id__in=project_ids).values('id', 'title', 'progress', 'status'):
+            reports[project['id']] = {
+                'project_title': project['title'],
+                'report_date': now.date(),
+                'progress': project['progress'],
+                'completed_tasks_count': 0,
+                'pending_tasks_count': 0,
+                'total_tasks_count': 0,
+                'pending_tasks': [],
+                'new_outputs': [],
+                'status': project['status'],
+            }
+        if not reports:
+            return reports
+
+        task_counts = (
+            Task.objects.filter(project_id__in=reports)
+            .values('project_id')
+            .annotate(
+                total=Count('id'),
+                completed=Count('id', filter=Q(status='Done')),
+                pending=Count('id', filter=Q(status__in=PENDING_STATUSES)),
+            )
+            .order_by()
+        )
+        for row in task_counts:
+            report = reports[row['project_id']]
+            report['total_tasks_count'] = row['total']
+            report['completed_tasks_count'] = row['completed']
+            report['pending_tasks_count'] = row['pending']
+
+        pending_titles = (
+            Task.objects.filter(project_id__in=reports, status__in=PENDING_STATUSES)
+            .order_by('due_date', 'id')
+            .values_list('project_id', 'title')
+        )
+        for project_id, title in pending_titles:
+            reports[project_id]['pending_tasks'].append(title)
+
+        new_outputs = (
+            Output.objects.filter(project_id__in=reports, date__gte=last_week)
+            .order_by('-date', 'id')
+            .values_list('project_id', 'title')
         )
-        
-        # Aggregate pending/overdue tasks
-        pending_tasks = project.tasks.filter(status__in=['To Do', 'In Progress', 'Overdue'])
-        
-        # Aggregate new outputs
-        new_outputs = project.outputs.filter(date__gte=last_week)
-        
-        report_data = {
-            'project_title': project.title,
-            'report_date': timezone.now().date(),
-            'progress': project.progress,
-            'completed_tasks_count': completed_tasks.count(),
-            'pending_tasks': [t.title for t in pending_tasks],
-            'new_outputs': [o.title for o in new_outputs],
-            'status': project.status
-        }
-        
-        return report_data
+        for project_id, title in new_outputs:
+            reports[project_id]['new_outputs'].append(title)
+
+        return reports
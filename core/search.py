@@ -0,0 +1,187 @@
+"""
+Full-text search over projects, tasks, outputs, messages and ideas.
+
+The searchable text of every indexed row is copied into ``SearchDocument``
+on write (see the receivers in ``core.signals``). Migration 0013 puts a
+vendor-specific full-text index on that table:
+
+* Postgres: a generated ``search_vector`` tsvector column (title weighted A,
+  body weighted B) with a GIN index, queried with ``websearch_to_tsquery``
+  and ranked with ``ts_rank_cd``.
+* SQLite: an FTS5 table maintained by triggers, ranked with ``bm25``.
+
+A search is one query. Visibility is applied in SQL with the same
+``ProjectScope`` filters the viewsets use, so ranking and limits only ever
+see rows the user is allowed to read. Matches are highlighted with
+``<mark>``; the rest of the snippet is HTML-escaped.
+"""
+import html
+import re
+from django.db import connection
+from django.db.models import BooleanField, FloatField, Q, TextField, Value
+from django.db.models.expressions import RawSQL
+from .models import Project, Task, Output, Message, Idea, SearchDocument
+
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 100
+INDEX_BATCH_SIZE = 500
+
+# content_type -> (model, title field, body field, ProjectScope filter)
+INDEXED = {
+    'project': (Project, 'title', None, 'filter_projects'),
+    'task': (Task, 'title', None, 'filter_tasks'),
+    'output': (Output, 'title', None, 'filter_outputs'),
+    'message': (Message, 'subject', 'content', None),
+    'idea': (Idea, 'project_title', 'projects_desc', None),
+}
+CONTENT_TYPES = {model: content_type for content_type, (model, *_) in INDEXED.items()}
+
+# Control characters mark matches in the SQL output, so highlighting survives
+# HTML-escaping the user's text.
+_MARK_START, _MARK_STOP = '\x02', '\x03'
+
+
+class SearchIndex:
+    @staticmethod
+    def document_for(instance):
+        content_type = CONTENT_TYPES[type(instance)]
+        _, title_field, body_field, _ = INDEXED[content_type]
+        return SearchDocument(
+            content_type=content_type,
+            object_id=instance.pk,
+            title=getattr(instance, title_field) or '',
+            body=(getattr(instance, body_field) or '') if body_field else '',
+        )
+
+    @classmethod
+    def index(cls, instances):
+        """Insert or refresh the documents of ``instances`` with one upsert per batch."""
+        documents = [cls.document_for(instance) for instance in instances]
+        SearchDocument.objects.bulk_create(
+            documents,
+            batch_size=INDEX_BATCH_SIZE,
+            update_conflicts=True,
+            unique_fields=['content_type', 'object_id'],
+            update_fields=['title', 'body'],
+        )
+
+    @staticmethod
+    def remove(content_type, object_ids):
+        SearchDocument.objects.filter(content_type=content_type, object_id__in=object_ids).delete()
+
+    @classmethod
+    def rebuild(cls, chunk_size=2000):
+        """Re-index every row from scratch. Returns the number indexed per content type."""
+        SearchDocument.objects.all().delete()
+        counts = {}
+        for content_type, (model, title_field, body_field, _) in INDEXED.items():
+            fields = ['pk', title_field] + ([body_field] if body_field else [])
+            batch, counts[content_type] = [], 0
+            for instance in model.objects.only(*fields).iterator(chunk_size=chunk_size):
+                batch.append(instance)
+                if len(batch) == chunk_size:
+                    cls.index(batch)
+                    counts[content_type] += len(batch)
+                    batch = []
+            cls.index(batch)
+            counts[content_type] += len(batch)
+        return counts
+
+
+def _visible(scope, content_types):
+    clauses = Q()
+    for content_type in content_types:
+        model, _, _, scope_filter = INDEXED[content_type]
+        if content_type == 'message':
+            # Same rule as MessageViewSet: only your own conversations, whatever the role
+            ids = Message.objects.filter(Q(sender=scope.user) | Q(receiver=scope.user)).values('id')
+        elif scope_filter is None or scope.unrestricted:
+            clauses |= Q(content_type=content_type)
+            continue
+        else:
+            ids = getattr(scope, scope_filter)(model.objects.all()).values('id')
+        clauses |= Q(content_type=content_type, object_id__in=ids)
+    return clauses
+
+
+def _postgres_match(query):
+    table = SearchDocument._meta.db_table
+    tsquery = "websearch_to_tsquery('english', %s)"
+    options = f'StartSel={_MARK_START}, StopSel={_MARK_STOP}, MaxWords=35, MinWords=15, MaxFragments=2'
+    return (
+        RawSQL(f'{table}.search_vector @@ {tsquery}', [query], output_field=BooleanField()),
+        RawSQL(f'ts_rank_cd({table}.search_vector, {tsquery})', [query], output_field=FloatField()),
+        RawSQL(
+            f"ts_headline('english', {table}.title || ' ' || {table}.body, {tsquery}, %s)",
+            [query, options], output_field=TextField(),
+        ),
+    )
+
+
+def _sqlite_match(terms):
+    table = SearchDocument._meta.db_table
+    fts = f'{table}_fts'
+    # Every term must match; the last one also matches as a prefix for search-as-you-type
+    match = ' '.join(f'"{term}"' for term in terms) + '*'
+    matching_row = f'FROM {fts} WHERE {fts} MATCH %s AND {fts}.rowid = {table}.id'
+    return (
+        RawSQL(f'{table}.id IN (SELECT rowid FROM {fts} WHERE {fts} MATCH %s)', [match], output_field=BooleanField()),
+        # bm25 is lower-is-better; the title column weighs ten times the body
+        RawSQL(f'(SELECT -bm25({fts}, 10.0, 1.0) {matching_row})', [match], output_field=FloatField()),
+        RawSQL(
+            f"(SELECT snippet({fts}, -1, %s, %s, '...', 24) {matching_row})",
+            [_MARK_START, _MARK_STOP, match], output_field=TextField(),
+        ),
+    )
+
+
+def _fallback_match(terms):
+    condition = Q()
+    for term in terms:
+        condition &= Q(title__icontains=term) | Q(body__icontains=term)
+    return condition, Value(0.0, output_field=FloatField()), Value('', output_field=TextField())
+
+
+def _highlight(snippet):
+    escaped = html.escape(snippet or '')
+    return escaped.replace(_MARK_START, '<mark>').replace(_MARK_STOP, '</mark>')
+
+
+def search(query, scope, content_types=None, limit=DEFAULT_LIMIT):
+    """
+    Ranked matches for ``query`` among the rows ``scope`` may see, as a list of
+    ``{'type', 'id', 'title', 'rank', 'highlight'}``.
+    """
+    terms = re.findall(r'\w+', query or '')
+    if not terms:
+        return []
+    content_types = [ct for ct in (content_types or INDEXED) if ct in INDEXED]
+    if not content_types:
+        return []
+    limit = max(1, min(limit, MAX_LIMIT))
+
+    if connection.vendor == 'postgresql':
+        condition, rank, snippet = _postgres_match(query)
+    elif connection.vendor == 'sqlite':
+        condition, rank, snippet = _sqlite_match(terms)
+    else:
+        condition, rank, snippet = _fallback_match(terms)
+
+    rows = (
+        SearchDocument.objects.filter(_visible(scope, content_types))
+        .filter(condition)
+        # Postgres evaluates the costly ts_headline after the sort and limit
+        .annotate(rank=rank, snippet=snippet)
+        .order_by('-rank', 'content_type', 'object_id')
+        .values('content_type', 'object_id', 'title', 'rank', 'snippet')[:limit]
+    )
+    return [
+        {
+            'type': row['content_type'],
+            'id': row['object_id'],
+            'title': row['title'],
+            'rank': round(row['rank'] or 0.0, 4),
+            'highlight': _highlight(row['snippet'] or row['title']),
+        }
+        for row in rows
+    ]
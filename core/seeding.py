@@ -0,0 +1,166 @@
+"""
+Bulk loading for the seed scripts and the dataset generator.
+
+``BulkLoader`` resets and fills the database without going through
+``save()``:
+
+* ``truncate`` empties tables with the backend's flush SQL (``TRUNCATE ...
+  RESTART IDENTITY CASCADE`` on Postgres). This avoids collecting and
+  deleting every row through the ORM cascade.
+* The shared seed password is hashed once, not once per user.
+* Rows go in with ``bulk_create``. It stamps ``auto_now`` and
+  ``auto_now_add`` columns with the current time, so timestamps set on the
+  objects (e.g. backdated ``created_at``) are written back afterwards with
+  ``bulk_update``. M2M links are written straight into the through table,
+  with ``COPY`` on Postgres.
+* ``finish`` does the work that signals would have done per row: it resets
+  sequences after rows inserted with explicit ids, rebuilds the search index
+  and drops cached responses. Truncation restarts ids, so it also drops the
+  caches keyed by project and user id (reports, critical paths, unread counts,
+  authenticated users) up to the highest id in use before or after the load.
+"""
+import csv
+import io
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models import Max
+from .models import (
+    User, Project, Partner, Task, SubTask, Output, Message, Event, Innovator, Idea, Founder, FounderProject,
+    SearchDocument, ChangeLogEntry,
+)
+from .authentication import UserCache
+from .graph import critical_path_cache_key
+from .messaging import UnreadCounter
+from .reports import ReportGenerator
+from .search import SearchIndex
+from . import caching
+
+BATCH_SIZE = 2000
+# Below this many links a plain bulk_create is as fast as COPY
+COPY_THRESHOLD = 5000
+
+# Everything a seed run replaces; users are handled separately to keep superusers
+SEEDED_MODELS = (
+    FounderProject, Founder, Innovator, Idea, Message, SubTask, Task, Output, Partner, Event, Project,
+    SearchDocument, ChangeLogEntry,
+)
+
+
+def _tables(models):
+    tables = []
+    for model in models:
+        tables.append(model._meta.db_table)
+        tables.extend(
+            field.remote_field.through._meta.db_table for field in model._meta.local_many_to_many
+            if field.remote_field.through._meta.auto_created
+        )
+    return tables
+
+
+class BulkLoader:
+    def __init__(self, password, batch_size=BATCH_SIZE):
+        self.password_hash = make_password(password)
+        self.batch_size = batch_size
+        self.explicit_ids = set()
+        # Highest project id before truncation; its cache entries may now belong to new rows
+        self.replaced_project_id = 0
+
+    def truncate(self, models=SEEDED_MODELS, users=True):
+        """
+        Empty the tables of ``models`` and their M2M tables, then (with
+        ``users``) delete every non-superuser account.
+        """
+        if Project in models:
+            top = Project.objects.aggregate(top=Max('pk'))['top'] or 0
+            self.replaced_project_id = max(self.replaced_project_id, top)
+        sql = connection.ops.sql_flush(no_style(), _tables(models), reset_sequences=True, allow_cascade=True)
+        connection.ops.execute_sql_flush(sql)
+        if users:
+            # The big tables are empty by now, so the ORM cascade has little left to collect
+            User.objects.exclude(is_superuser=True).delete()
+
+    def users(self, users):
+        """Insert unsaved ``User`` instances, all with the loader's password."""
+        for user in users:
+            user.password = self.password_hash
+        return self.insert(User, users)
+
+    def insert(self, model, objects):
+        """Insert unsaved ``model`` instances, setting the pks the database assigns."""
+        objects = list(objects)
+        stamped = [
+            field.attname for field in model._meta.concrete_fields
+            if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False)
+        ]
+        # bulk_create overwrites these with the current time
+        preset = [
+            (obj, {attname: getattr(obj, attname) for attname in stamped if getattr(obj, attname) is not None})
+            for obj in objects
+        ]
+        if any(obj.pk is not None for obj in objects):
+            self.explicit_ids.add(model)
+        with transaction.atomic():
+            model._base_manager.bulk_create(objects, batch_size=self.batch_size)
+            backdated = []
+            for obj, values in preset:
+                if values:
+                    for attname, value in values.items():
+                        setattr(obj, attname, value)
+                    backdated.append(obj)
+            if backdated:
+                model._base_manager.bulk_update(backdated, stamped, batch_size=self.batch_size)
+        return objects
+
+    def link(self, relation, pairs):
+        """
+        Write ``(source id, target id)`` pairs into the through table of the
+        M2M ``relation`` (e.g. ``Project.team``).
+        """
+        through = relation.through
+        field = relation.field
+        source, target = field.m2m_column_name(), field.m2m_reverse_name()
+        pairs = list(dict.fromkeys(pairs))
+        if connection.vendor == 'postgresql' and len(pairs) >= COPY_THRESHOLD:
+            self._copy(through._meta.db_table, (source, target), pairs)
+        else:
+            through.objects.bulk_create(
+                [through(**{source: a, target: b}) for a, b in pairs], batch_size=self.batch_size
+            )
+        return len(pairs)
+
+    @staticmethod
+    def _copy(table, columns, rows):
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(rows)
+        buffer.seek(0)
+        quote = connection.ops.quote_name
+        with connection.cursor() as cursor:
+            cursor.copy_expert(
+                f'COPY {quote(table)} ({", ".join(quote(column) for column in columns)}) FROM STDIN WITH (FORMAT csv)',
+                buffer,
+            )
+
+    def finish(self, index=True):
+        """Reset sequences, rebuild the search index and invalidate cached responses and rows."""
+        if self.explicit_ids:
+            statements = connection.ops.sequence_reset_sql(no_style(), list(self.explicit_ids))
+            with transaction.atomic(), connection.cursor() as cursor:
+                for statement in statements:
+                    cursor.execute(statement)
+        indexed = SearchIndex.rebuild() if index else {}
+        caching.invalidate(*caching.NAMESPACES)
+        self._forget_cached_rows()
+        return indexed
+
+    def _forget_cached_rows(self):
+        top_project = max(self.replaced_project_id, Project.objects.aggregate(top=Max('pk'))['top'] or 0)
+        keys = []
+        for project_id in range(1, top_project + 1):
+            keys += [ReportGenerator.cache_key(project_id), critical_path_cache_key(project_id)]
+        # User ids are not restarted, but the messages behind every unread count were replaced
+        for user_id in User.objects.values_list('pk', flat=True).iterator():
+            keys += [UnreadCounter.cache_key(user_id), UserCache.cache_key(user_id)]
+        for start in range(0, len(keys), self.batch_size):
+            cache.delete_many(keys[start:start + self.batch_size])
@@ -1,7 +1,13 @@
+from datetime import timedelta
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+from django.utils import timezone
 from rest_framework import serializers
 from .models import User, Project, Task, SubTask, Partner, Output, Message, Event, Innovator, Idea, Founder, FounderProject
+from .fieldsets import SparseFieldsMixin
+from .graph import check_dependencies, DependencyCycleError
+from . import availability
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = User
         fields = ['id', 'username', 'email', 'first_name', 'last_name', 'role', 'avatar', 'password', 'force_password_change']
@@ -32,12 +38,12 @@ class ChangePasswordSerializer(serializers.Serializer):
         instance.save()
         return instance
 
-class SubTaskSerializer(serializers.ModelSerializer):
+class SubTaskSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = SubTask
-        fields = ['id', 'title', 'completed']
+        fields = ['id', 'task', 'title', 'completed']
 
-class TaskSerializer(serializers.ModelSerializer):
+class TaskSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     assignee_name = serializers.ReadOnlyField(source='assignee.get_full_name')
     subtasks = SubTaskSerializer(many=True, read_only=True)
     
@@ -47,15 +53,28 @@ class TaskSerializer(serializers.ModelSerializer):
             'id', 'project', 'title', 'assignee', 'assignee_name', 
             'due_date', 'status', 'priority', 'dependencies', 'subtasks', 'created_at'
         ]
-
-class PartnerSerializer(serializers.ModelSerializer):
+        select_related_fields = {'assignee_name': 'assignee'}
+        prefetch_related_fields = {'subtasks': 'subtasks', 'dependencies': 'dependencies'}
+        expandable_fields = {'assignee': 'assignee_name'}
+
+    def validate(self, attrs):
+        # A brand new task has no dependants yet, so only updates can close a cycle
+        if self.instance is not None and 'dependencies' in attrs:
+            try:
+                check_dependencies({self.instance.pk: [task.pk for task in attrs['dependencies']]})
+            except DependencyCycleError as e:
+                raise serializers.ValidationError({'dependencies': [str(e)]})
+        return attrs
+
+class PartnerSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     project_title = serializers.ReadOnlyField(source='project.title')
     
     class Meta:
         model = Partner
         fields = ['id', 'name', 'sector', 'contact', 'email', 'phone', 'engagement', 'project', 'project_title']
+        select_related_fields = {'project_title': 'project'}
 
-class ProjectSerializer(serializers.ModelSerializer):
+class ProjectSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     lead_name = serializers.ReadOnlyField(source='lead.get_full_name')
     team_names = serializers.SerializerMethodField()
     
@@ -65,6 +84,9 @@ class ProjectSerializer(serializers.ModelSerializer):
             'id', 'title', 'project_type', 'status', 'lead', 'lead_name', 
             'team', 'team_names', 'start_date', 'end_date', 'budget', 'progress'
         ]
+        select_related_fields = {'lead_name': 'lead'}
+        prefetch_related_fields = {'team': 'team', 'team_names': 'team'}
+        expandable_fields = {'team': 'team_names', 'lead': 'lead_name'}
 
     def get_team_names(self, obj):
         return [user.get_full_name() for user in obj.team.all()]
@@ -76,32 +98,86 @@ class ProjectSerializer(serializers.ModelSerializer):
             representation.pop('budget', None)
         return representation
 
-class OutputSerializer(serializers.ModelSerializer):
+class OutputSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     project_title = serializers.ReadOnlyField(source='project.title')
     author_names = serializers.SerializerMethodField()
     
     class Meta:
         model = Output
         fields = ['id', 'project', 'project_title', 'output_type', 'title', 'status', 'date', 'authors', 'author_names', 'frequency', 'resource_url', 'resource_type']
+        select_related_fields = {'project_title': 'project'}
+        prefetch_related_fields = {'authors': 'authors', 'author_names': 'authors'}
+        expandable_fields = {'authors': 'author_names', 'project': 'project_title'}
 
     def get_author_names(self, obj):
         return [user.get_full_name() for user in obj.authors.all()]
 
-class MessageSerializer(serializers.ModelSerializer):
+class MessageSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     sender_name = serializers.ReadOnlyField(source='sender.get_full_name')
     receiver_name = serializers.ReadOnlyField(source='receiver.get_full_name')
-    replies = serializers.SerializerMethodField()
     
     class Meta:
         model = Message
-        fields = ['id', 'sender', 'sender_name', 'receiver', 'receiver_name', 'project', 'subject', 'content', 'timestamp', 'status', 'priority', 'parent', 'replies']
-
-    def get_replies(self, obj):
-        if obj.replies.exists():
-            return MessageSerializer(obj.replies.all(), many=True).data
-        return []
-
-class EventSerializer(serializers.ModelSerializer):
+        # Replies are not nested here; full conversations are served by the
+        # thread endpoint, which loads the whole tree in a single query.
+        fields = [
+            'id', 'sender', 'sender_name', 'receiver', 'receiver_name', 'project', 'subject', 'content',
+            'timestamp', 'status', 'priority', 'parent', 'is_read',
+        ]
+        select_related_fields = {'sender_name': 'sender', 'receiver_name': 'receiver'}
+        expandable_fields = {'sender': 'sender_name', 'receiver': 'receiver_name'}
+
+class MessageSelectionSerializer(serializers.Serializer):
+    """Which received messages a bulk mailbox action applies to; filters combine."""
+    ids = serializers.ListField(child=serializers.IntegerField(), required=False, max_length=1000)
+    thread = serializers.IntegerField(required=False)
+    project = serializers.IntegerField(required=False)
+    before = serializers.DateTimeField(required=False)
+
+class AvailabilityQuerySerializer(serializers.Serializer):
+    """Query parameters of ``/events/availability/``; ``users`` is a comma-separated id list."""
+    users = serializers.CharField()
+    duration = serializers.IntegerField(min_value=5, max_value=8 * 60, default=60)
+    start = serializers.DateTimeField(required=False)
+    end = serializers.DateTimeField(required=False)
+    limit = serializers.IntegerField(min_value=1, max_value=50, default=5)
+    weekends = serializers.BooleanField(default=False)
+    tz = serializers.CharField(required=False)
+
+    def validate_users(self, value):
+        try:
+            ids = list(dict.fromkeys(int(part) for part in value.split(',') if part.strip()))
+        except ValueError:
+            raise serializers.ValidationError('Expected a comma-separated list of user ids.')
+        if not ids:
+            raise serializers.ValidationError('At least one user is required.')
+        if len(ids) > availability.MAX_USERS:
+            raise serializers.ValidationError(f'At most {availability.MAX_USERS} users can be compared.')
+        missing = set(ids) - set(User.objects.filter(pk__in=ids, is_active=True).values_list('id', flat=True))
+        if missing:
+            raise serializers.ValidationError(f'Unknown users: {", ".join(map(str, sorted(missing)))}.')
+        return ids
+
+    def validate_tz(self, value):
+        try:
+            return ZoneInfo(value)
+        except (ZoneInfoNotFoundError, ValueError):
+            raise serializers.ValidationError(f'Unknown time zone "{value}".')
+
+    def validate(self, attrs):
+        start = attrs.get('start') or timezone.now()
+        end = attrs.get('end') or start + availability.DEFAULT_WINDOW
+        if end <= start:
+            raise serializers.ValidationError('end must be after start.')
+        if end - start > availability.MAX_WINDOW:
+            raise serializers.ValidationError(f'The window can span at most {availability.MAX_WINDOW.days} days.')
+        attrs.update(
+            start=start, end=end, duration=timedelta(minutes=attrs['duration']),
+            tz=attrs.get('tz') or timezone.get_current_timezone(),
+        )
+        return attrs
+
+class EventSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     owner_name = serializers.ReadOnlyField(source='owner.get_full_name')
     attendee_details = UserSerializer(source='attendees', many=True, read_only=True)
     
@@ -112,15 +188,18 @@ class EventSerializer(serializers.ModelSerializer):
             'pipeline_stage', 'location', 'owner', 'owner_name', 'attendees', 
             'attendee_details', 'max_attendees', 'linked_project', 'created_at'
         ]
+        select_related_fields = {'owner_name': 'owner'}
+        prefetch_related_fields = {'attendees': 'attendees', 'attendee_details': 'attendees'}
+        expandable_fields = {'attendees': 'attendee_details', 'owner': 'owner_name'}
 
-class InnovatorSerializer(serializers.ModelSerializer):
+class InnovatorSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     idea_title = serializers.ReadOnlyField(source='idea.project_title')
 
     class Meta:
         model = Innovator
         fields = ['id', 'name', 'year', 'email', 'idea', 'idea_title', 'created_at']
 
-class IdeaSerializer(serializers.ModelSerializer):
+class IdeaSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     project_id = serializers.PrimaryKeyRelatedField(
         queryset=Project.objects.all(), source='project', required=False, allow_null=True
     )
@@ -131,13 +210,13 @@ class IdeaSerializer(serializers.ModelSerializer):
         extra_kwargs = {'project': {'read_only': True}}
 
 
-class FounderProjectSerializer(serializers.ModelSerializer):
+class FounderProjectSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = FounderProject
         fields = ['id', 'project_name', 'description', 'submission_date', 'stage']
 
 
-class FounderSerializer(serializers.ModelSerializer):
+class FounderSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     user = UserSerializer(read_only=True)
     projects = FounderProjectSerializer(many=True, read_only=True)
 
@@ -146,7 +225,7 @@ class FounderSerializer(serializers.ModelSerializer):
         fields = ['id', 'user', 'name', 'email', 'bio', 'projects', 'created_at']
 
 
-class InnovationOfficerFounderSummarySerializer(serializers.ModelSerializer):
+class InnovationOfficerFounderSummarySerializer(SparseFieldsMixin, serializers.ModelSerializer):
     project_title = serializers.SerializerMethodField()
     stage = serializers.SerializerMethodField()
 
@@ -154,11 +233,16 @@ class InnovationOfficerFounderSummarySerializer(serializers.ModelSerializer):
         model = Founder
         fields = ['id', 'name', 'email', 'bio', 'project_title', 'stage']
 
+    @staticmethod
+    def _first_project(obj):
+        # Picked from the prefetched projects; .first() would query again per founder
+        return min(obj.projects.all(), key=lambda project: project.pk, default=None)
+
     def get_project_title(self, obj):
-        project = obj.projects.first()
+        project = self._first_project(obj)
         return project.project_name if project else None
 
     def get_stage(self, obj):
-        project = obj.projects.first()
+        project = self._first_project(obj)
         return project.stage if project else None
 
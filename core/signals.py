@@ -1,7 +1,17 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_init, post_save, pre_delete, post_delete, m2m_changed
+from django.db import transaction
 from django.dispatch import receiver
-from .models import Event, Task, Message
+from .models import User, Event, Task, Message, Project, Output, Idea
 from .tasks import send_event_email, send_task_email, send_message_email
+from .reports import ReportGenerator
+from . import caching
+from .graph import invalidate_critical_path
+from .search import SearchIndex, CONTENT_TYPES
+from .conditional import touch
+from . import changes
+from . import realtime
+from .messaging import UnreadCounter
+from .authentication import UserCache
 
 # @receiver(post_save, sender=Event)
 # def event_post_save(sender, instance, created, **kwargs):
@@ -18,3 +28,189 @@ from .tasks import send_event_email, send_task_email, send_message_email
 #     if created:
 #         # the read-check delay is implemented here (60 seconds)
 #         send_message_email.apply_async(kwargs={'message_id': instance.id}, countdown=60)
+
+
+def tasks_changed(project_ids):
+    """
+    Invalidate what depends on the tasks of ``project_ids`` after writes that
+    bypass the model signals (bulk_create, bulk_update, queryset update/delete).
+    """
+    project_ids = set(project_ids)
+    for project_id in project_ids:
+        ReportGenerator.invalidate(project_id)
+        invalidate_critical_path(project_id)
+    if project_ids:
+        caching.invalidate(*caching.LIST_CACHE_DEPENDENCIES[Task])
+
+
+@receiver(post_init, sender=Task)
+@receiver(post_init, sender=Output)
+def remember_project(sender, instance, **kwargs):
+    # from_db only clears _state.adding after __init__, so a loaded row is told apart by its pk
+    instance._loaded_project_id = instance.__dict__.get('project_id') if instance.pk is not None else None
+
+
+@receiver([post_save, post_delete], sender=Task)
+@receiver([post_save, post_delete], sender=Output)
+def invalidate_project_report(sender, instance, **kwargs):
+    # A row moved to another project changes the reports of both
+    for project_id in {instance.project_id, getattr(instance, '_loaded_project_id', None)} - {None}:
+        ReportGenerator.invalidate(project_id)
+        if sender is Task:
+            invalidate_critical_path(project_id)
+    instance._loaded_project_id = instance.project_id
+
+
+@receiver([post_save, post_delete], sender=Project)
+def invalidate_own_report(sender, instance, **kwargs):
+    ReportGenerator.invalidate(instance.pk)
+    invalidate_critical_path(instance.pk)
+
+
+@receiver(m2m_changed, sender=Task.dependencies.through)
+def invalidate_task_graph(sender, instance, action, **kwargs):
+    if action.startswith('post_'):
+        # instance is a Task whether the forward or reverse side was edited
+        invalidate_critical_path(instance.project_id)
+
+
+@receiver(post_save, sender=Project)
+@receiver(post_save, sender=Task)
+@receiver(post_save, sender=Output)
+@receiver(post_save, sender=Message)
+@receiver(post_save, sender=Idea)
+def update_search_index(sender, instance, **kwargs):
+    SearchIndex.index([instance])
+
+
+@receiver(post_delete, sender=Project)
+@receiver(post_delete, sender=Task)
+@receiver(post_delete, sender=Output)
+@receiver(post_delete, sender=Message)
+@receiver(post_delete, sender=Idea)
+def remove_from_search_index(sender, instance, **kwargs):
+    SearchIndex.remove(CONTENT_TYPES[sender], [instance.pk])
+
+
+@receiver(post_save, sender=Project)
+@receiver(post_save, sender=Task)
+@receiver(post_save, sender=Event)
+@receiver(post_save, sender=Message)
+@receiver(post_save, sender=Output)
+def log_change(sender, instance, **kwargs):
+    changes.record_save(instance)
+
+
+@receiver(pre_delete, sender=Event)
+@receiver(pre_delete, sender=Output)
+def remember_members(sender, instance, **kwargs):
+    # The attendee/author rows are gone by post_delete
+    changes.remember_members(instance)
+
+
+@receiver(post_delete, sender=Project)
+@receiver(post_delete, sender=Task)
+@receiver(post_delete, sender=Event)
+@receiver(post_delete, sender=Message)
+@receiver(post_delete, sender=Output)
+def log_deletion(sender, instance, **kwargs):
+    changes.record_delete(instance)
+
+
+@receiver(m2m_changed, sender=Project.team.through)
+@receiver(m2m_changed, sender=Output.authors.through)
+@receiver(m2m_changed, sender=Event.attendees.through)
+@receiver(m2m_changed, sender=Task.dependencies.through)
+def touch_m2m_owner(sender, instance, action, reverse, model, pk_set, **kwargs):
+    # M2M edits don't save the owning row, so its updated_at would stay put
+    if not action.startswith('post_'):
+        return
+    if reverse:
+        touch(model, pk_set or ())
+    else:
+        touch(type(instance), [instance.pk])
+
+
+@receiver([post_save, post_delete, m2m_changed])
+def invalidate_cached_lists(sender, **kwargs):
+    namespaces = caching.LIST_CACHE_DEPENDENCIES.get(sender)
+    if not namespaces:
+        return
+    action = kwargs.get('action')
+    if action is not None and not action.startswith('post_'):
+        return
+    caching.invalidate(*namespaces)
+
+
+# Real-time notifications
+
+def notify_task_assigned(tasks):
+    """Push ``task.assigned`` for tasks whose assignee is new since they were loaded."""
+    for task in tasks:
+        if task.assignee_id and task.assignee_id != getattr(task, '_loaded_assignee_id', None):
+            realtime.publish([task.assignee_id], 'task.assigned', {
+                'id': task.pk, 'title': task.title, 'project': task.project_id,
+                'due_date': task.due_date, 'priority': task.priority,
+            })
+        task._loaded_assignee_id = task.assignee_id
+
+
+@receiver(post_init, sender=Task)
+def remember_assignee(sender, instance, **kwargs):
+    # Read from __dict__ so a deferred assignee column isn't loaded just for this. from_db
+    # only clears _state.adding after __init__, so a loaded row is told apart by its pk.
+    instance._loaded_assignee_id = instance.__dict__.get('assignee_id') if instance.pk is not None else None
+
+
+@receiver(post_save, sender=Task)
+def push_task_assignment(sender, instance, **kwargs):
+    notify_task_assigned([instance])
+
+
+@receiver(post_save, sender=Message)
+def push_new_message(sender, instance, created, **kwargs):
+    if not created:
+        # is_read may have flipped either way; recount on the next read
+        UnreadCounter.invalidate(instance.receiver_id)
+        return
+
+    def after_commit():
+        if not instance.is_read:
+            UnreadCounter.adjust(instance.receiver_id, 1)
+        realtime.notify([instance.receiver_id], 'message.reply' if instance.parent_id else 'message.new', {
+            'id': instance.pk, 'subject': instance.subject, 'sender': instance.sender_id,
+            'parent': instance.parent_id, 'project': instance.project_id, 'priority': instance.priority,
+            'timestamp': instance.timestamp, 'unread_count': UnreadCounter.get(instance.receiver_id),
+        })
+    transaction.on_commit(after_commit)
+
+
+@receiver(post_delete, sender=Message)
+def forget_unread_count(sender, instance, **kwargs):
+    UnreadCounter.invalidate(instance.receiver_id)
+
+
+def _invitation(event):
+    return {
+        'id': event.pk, 'title': event.title, 'owner': event.owner_id,
+        'start_date': event.start_date, 'end_date': event.end_date, 'location': event.location,
+    }
+
+
+@receiver(m2m_changed, sender=Event.attendees.through)
+def push_event_invitations(sender, instance, action, reverse, pk_set, **kwargs):
+    if action != 'post_add' or not pk_set:
+        return
+    if reverse:
+        for event in Event.objects.filter(pk__in=pk_set):
+            if event.owner_id != instance.pk:
+                realtime.publish([instance.pk], 'event.invitation', _invitation(event))
+    else:
+        realtime.publish(pk_set - {instance.owner_id}, 'event.invitation', _invitation(instance))
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def forget_cached_user(sender, instance, **kwargs):
+    # Role and is_active changes must reach the next authenticated request
+    UserCache.invalidate(instance.pk)
@@ -2,7 +2,7 @@ import logging
 from celery import shared_task
 from django.core.mail import send_mail
 from django.conf import settings
-from .models import Event, Task, Message
+from .models import Event, Task, Message, Project
 
 logger = logging.getLogger(__name__)
 
@@ -117,3 +117,47 @@ def send_message_email(self, message_id):
     except Exception as exc:
         logger.error(f"Error sending email for Message ID {message_id}: {exc}")
         raise self.retry(exc=exc)
+
+
+@shared_task
+def warm_weekly_reports():
+    """
+    Pre-computes the weekly summary of every active project in one batched pass
+    so Monday's report views are served from cache.
+    """
+    from .reports import ReportGenerator
+
+    project_ids = list(Project.objects.exclude(status='Completed').values_list('id', flat=True))
+    reports = ReportGenerator.generate_weekly_summaries(project_ids)
+    logger.info(f"Warmed weekly reports for {len(reports)} projects.")
+    return len(reports)
+
+
+@shared_task(ignore_result=True)
+def drain_email_outbox():
+    """
+    Delivers queued OutboundEmail rows in batches over one mail connection.
+    """
+    from .outbox import drain
+
+    return drain()
+
+
+@shared_task(ignore_result=True)
+def mark_overdue_tasks():
+    """
+    Flips past-due, unfinished tasks to Overdue with chunked set-based updates.
+    """
+    from .overdue import sweep_overdue
+
+    return sweep_overdue()
+
+
+@shared_task(ignore_result=True)
+def prune_change_log():
+    """
+    Drops delta-sync change log entries older than the retention window.
+    """
+    from .changes import prune
+
+    return prune()
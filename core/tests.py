@@ -66,3 +66,1152 @@ class EmailNotificationTests(TestCase):
             is_read=True
         )
         self.assertEqual(len(mail.outbox), 0)
+
+
+class MessageThreadTests(TestCase):
+    def setUp(self):
+        from rest_framework.test import APIClient
+        self.alice = User.objects.create_user(username='alice', email='alice@test.com', role='Research Assistant')
+        self.bob = User.objects.create_user(username='bob', email='bob@test.com', role='Research Assistant')
+        self.root = Message.objects.create(sender=self.alice, receiver=self.bob, subject='Root', content='Start')
+        parent = self.root
+        for i in range(5):
+            sender, receiver = (self.bob, self.alice) if i % 2 == 0 else (self.alice, self.bob)
+            parent = Message.objects.create(
+                sender=sender, receiver=receiver, subject=f'Re {i}', content='Reply', parent=parent
+            )
+        self.leaf = parent
+        self.client = APIClient()
+        self.client.force_authenticate(self.alice)
+
+    def test_thread_loads_whole_tree_in_constant_queries(self):
+        with self.assertNumQueries(2):
+            response = self.client.get(f'/api/v1/messages/{self.leaf.id}/thread/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['count'], 6)
+        node, depth = response.data['results'][0], 0
+        self.assertEqual(node['id'], self.root.id)
+        while node['replies']:
+            node, depth = node['replies'][0], depth + 1
+        self.assertEqual(depth, 5)
+        self.assertEqual(node['id'], self.leaf.id)
+
+    def test_list_does_not_nest_replies(self):
+        response = self.client.get('/api/v1/messages/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data), 6)
+        self.assertNotIn('replies', response.data[0])
+
+
+class KeysetPaginationTests(TestCase):
+    def setUp(self):
+        from rest_framework.test import APIClient
+        self.user = User.objects.create_user(username='director', email='director@test.com', role='Director')
+        project = Project.objects.create(
+            title='Paged', project_type='Research', start_date=timezone.now().date(),
+            end_date=timezone.now().date(), budget=1, lead=self.user
+        )
+        for i in range(7):
+            Task.objects.create(
+                project=project, title=f'Task {i}', assignee=self.user,
+                due_date=timezone.now().date() + timezone.timedelta(days=i)
+            )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_unpaginated_without_opt_in(self):
+        response = self.client.get('/api/v1/tasks/')
+        self.assertEqual([row['title'] for row in response.data], [f'Task {i}' for i in range(7)])
+
+    def test_cursor_walks_every_row_once(self):
+        seen = []
+        url = '/api/v1/tasks/?page_size=3'
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            seen.extend(row['title'] for row in response.data['results'])
+            url = response.data['next']
+        # The cursor seeks on creation time, newest first, not on the due date
+        self.assertEqual(seen, [f'Task {i}' for i in reversed(range(7))])
+
+
+class ProjectScopeTests(TestCase):
+    def setUp(self):
+        from rest_framework.test import APIClient
+        self.assistant = User.objects.create_user(username='ra', email='ra@test.com', role='Research Assistant')
+        self.other = User.objects.create_user(username='other', email='other@test.com', role='Research Assistant')
+        today = timezone.now().date()
+        self.mine = Project.objects.create(
+            title='Mine', project_type='Research', start_date=today, end_date=today, budget=1, lead=self.assistant
+        )
+        # Leading and being on the team must not produce duplicate rows
+        self.mine.team.add(self.assistant, self.other)
+        self.theirs = Project.objects.create(
+            title='Theirs', project_type='Research', start_date=today, end_date=today, budget=1, lead=self.other
+        )
+        Task.objects.create(project=self.mine, title='Visible', assignee=self.other, due_date=today)
+        Task.objects.create(project=self.theirs, title='Assigned', assignee=self.assistant, due_date=today)
+        Task.objects.create(project=self.theirs, title='Hidden', assignee=self.other, due_date=today)
+        self.client = APIClient()
+        self.client.force_authenticate(self.assistant)
+
+    def test_projects_are_scoped_without_duplicates(self):
+        response = self.client.get('/api/v1/projects/')
+        self.assertEqual([p['title'] for p in response.data], ['Mine'])
+
+    def test_tasks_include_assigned_and_project_tasks(self):
+        response = self.client.get('/api/v1/tasks/')
+        self.assertEqual(sorted(t['title'] for t in response.data), ['Assigned', 'Visible'])
+
+
+class WeeklyReportTests(TestCase):
+    def setUp(self):
+        from django.core.cache import cache
+        from .models import Output
+        cache.clear()
+        self.user = User.objects.create_user(username='director', email='director@test.com', role='Director')
+        today = timezone.now().date()
+        self.projects = []
+        for i in range(3):
+            project = Project.objects.create(
+                title=f'Project {i}', project_type='Research', start_date=today, end_date=today, budget=1, lead=self.user
+            )
+            Task.objects.create(project=project, title=f'Done {i}', status='Done', due_date=today)
+            Task.objects.create(project=project, title=f'Open {i}', status='To Do', due_date=today)
+            Output.objects.create(project=project, output_type='Paper', title=f'Paper {i}', status='Draft', date=today)
+            self.projects.append(project)
+
+    def test_batched_summaries_use_fixed_query_count(self):
+        from .reports import ReportGenerator
+        with self.assertNumQueries(4):
+            reports = ReportGenerator.generate_weekly_summaries([p.id for p in self.projects])
+        report = reports[self.projects[1].id]
+        self.assertEqual(report['completed_tasks_count'], 1)
+        self.assertEqual(report['pending_tasks'], ['Open 1'])
+        self.assertEqual(report['new_outputs'], ['Paper 1'])
+
+    def test_summary_is_cached_until_tasks_change(self):
+        from .reports import ReportGenerator
+        project = self.projects[0]
+        ReportGenerator.generate_weekly_summary(project.id)
+        with self.assertNumQueries(0):
+            ReportGenerator.generate_weekly_summary(project.id)
+        Task.objects.create(project=project, title='Another', status='Done', due_date=timezone.now().date())
+        self.assertEqual(ReportGenerator.generate_weekly_summary(project.id)['completed_tasks_count'], 2)
+
+    def test_moving_a_row_invalidates_both_projects(self):
+        from .models import Output
+        from .reports import ReportGenerator
+        source, target = self.projects[0], self.projects[1]
+        for project in (source, target):
+            ReportGenerator.generate_weekly_summary(project.id)
+
+        task = Task.objects.get(title='Done 0')
+        task.project = target
+        task.save()
+        output = Output.objects.get(title='Paper 0')
+        output.project = target
+        output.save()
+
+        self.assertEqual(ReportGenerator.generate_weekly_summary(source.id)['completed_tasks_count'], 0)
+        self.assertEqual(ReportGenerator.generate_weekly_summary(source.id)['new_outputs'], [])
+        self.assertEqual(ReportGenerator.generate_weekly_summary(target.id)['completed_tasks_count'], 2)
+
+
+@override_settings(EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend')
+class EmailOutboxTests(TestCase):
+    def test_drain_sends_queued_emails_and_marks_them_sent(self):
+        from .models import OutboundEmail
+        from .outbox import queue_email, drain
+        for i in range(3):
+            queue_email(f'Notice {i}', 'Body', ['someone@test.com'])
+        stats = drain(batch_size=2)
+        self.assertEqual(stats['sent'], 3)
+        self.assertEqual(stats['batches'], 2)
+        self.assertEqual(len(mail.outbox), 3)
+        self.assertFalse(OutboundEmail.objects.exclude(status='sent').exists())
+
+    def test_failed_send_is_rescheduled(self):
+        from unittest import mock
+        from .outbox import queue_email, drain
+        email = queue_email('Notice', 'Body', ['someone@test.com'])
+        with mock.patch('django.core.mail.backends.locmem.EmailBackend.send_messages', side_effect=OSError('down')):
+            stats = drain()
+        self.assertEqual(stats['retrying'], 1)
+        email.refresh_from_db()
+        self.assertEqual((email.status, email.attempts), ('queued', 1))
+        self.assertGreater(email.next_attempt_at, timezone.now())
+
+    def test_interrupted_sends_use_up_attempts(self):
+        from .models import OutboundEmail
+        from .outbox import queue_email, drain, _claim_batch, MAX_ATTEMPTS
+        email = queue_email('Notice', 'Body', ['someone@test.com'])
+        for attempt in range(1, MAX_ATTEMPTS + 1):
+            # A worker claims the row and dies before sending; the lease then expires
+            self.assertEqual([claimed.attempts for claimed in _claim_batch(10)[0]], [attempt])
+            OutboundEmail.objects.filter(id=email.id).update(next_attempt_at=timezone.now())
+
+        stats = drain()
+        self.assertEqual((stats['sent'], stats['failed']), (0, 1))
+        self.assertEqual(len(mail.outbox), 0)
+        email.refresh_from_db()
+        self.assertEqual((email.status, email.attempts), ('failed', MAX_ATTEMPTS))
+
+
+class EventGoogleSyncTests(TestCase):
+    def setUp(self):
+        from django.core.cache import cache
+        from rest_framework.test import APIClient
+        cache.clear()
+        self.owner = User.objects.create_user(username='owner', email='owner@test.com', role='Director')
+        self.event = Event.objects.create(
+            title='Planning', start_date=timezone.now(), end_date=timezone.now() + timezone.timedelta(hours=1),
+            category='Meeting', owner=self.owner
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.owner)
+
+    def test_rapid_edits_coalesce_into_one_background_sync(self):
+        from unittest import mock
+        with mock.patch('integration.tasks.sync_events_to_google.apply_async') as apply_async:
+            for title in ('One', 'Two', 'Three'):
+                with self.captureOnCommitCallbacks(execute=True):
+                    response = self.client.patch(f'/api/v1/events/{self.event.id}/', {'title': title}, format='json')
+                self.assertEqual(response.status_code, 200)
+        apply_async.assert_called_once_with(args=[self.owner.id], countdown=mock.ANY)
+        self.event.refresh_from_db()
+        self.assertTrue(self.event.google_sync_pending)
+
+
+class ListResponseCacheTests(TestCase):
+    def setUp(self):
+        from django.core.cache import cache
+        from rest_framework.test import APIClient
+        cache.clear()
+        self.director = User.objects.create_user(username='director', email='director@test.com', role='Director')
+        today = timezone.now().date()
+        self.project = Project.objects.create(
+            title='Cached', project_type='Research', start_date=today, end_date=today, budget=1, lead=self.director
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.director)
+
+    def test_second_list_is_served_from_cache(self):
+        self.assertEqual(self.client.get('/api/v1/projects/')['X-Cache'], 'MISS')
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/v1/projects/')
+        self.assertEqual(response['X-Cache'], 'HIT')
+        self.assertEqual(response.data[0]['title'], 'Cached')
+
+    def test_team_change_invalidates_cached_lists(self):
+        from .caching import stats
+        self.client.get('/api/v1/projects/')
+        self.project.team.add(self.director)
+        response = self.client.get('/api/v1/projects/')
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data[0]['team'], [self.director.id])
+        self.assertEqual(stats()['projects']['misses'], 2)
+
+
+class SparseFieldsetTests(TestCase):
+    def setUp(self):
+        from rest_framework.test import APIClient
+        self.owner = User.objects.create_user(username='owner', email='owner@test.com', role='Director')
+        for i in range(3):
+            event = Event.objects.create(
+                title=f'Event {i}', start_date=timezone.now(), end_date=timezone.now() + timezone.timedelta(hours=1),
+                category='Meeting', owner=self.owner
+            )
+            event.attendees.add(self.owner)
+        self.client = APIClient()
+        self.client.force_authenticate(self.owner)
+
+    def test_fields_trims_payload_and_skips_prefetch(self):
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/v1/events/?fields=id,title')
+        self.assertEqual(set(response.data[0]), {'id', 'title'})
+
+    def test_expand_adds_derived_fields(self):
+        response = self.client.get('/api/v1/events/?fields=id,attendees&expand=attendees')
+        self.assertEqual(set(response.data[0]), {'id', 'attendees', 'attendee_details'})
+        self.assertEqual(response.data[0]['attendee_details'][0]['username'], 'owner')
+
+
+class TaskBulkTests(TestCase):
+    def setUp(self):
+        from rest_framework.test import APIClient
+        self.director = User.objects.create_user(username='director', email='director@test.com', role='Director')
+        today = timezone.now().date()
+        self.project = Project.objects.create(
+            title='Import', project_type='Research', start_date=today, end_date=today, budget=1, lead=self.director
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.director)
+
+    def test_bulk_create_with_refs_subtasks_and_dependencies(self):
+        payload = [
+            {'ref': 'design', 'project': self.project.id, 'title': 'Design', 'due_date': '2026-11-01',
+             'subtasks': [{'title': 'Sketch'}, {'title': 'Review', 'completed': True}]},
+            {'ref': 'build', 'project': self.project.id, 'title': 'Build', 'due_date': '2026-11-10',
+             'assignee': self.director.id, 'dependencies': ['design']},
+        ]
+        response = self.client.post('/api/v1/tasks/bulk/', payload, format='json')
+        self.assertEqual(response.status_code, 201)
+        design, build = response.data
+        self.assertEqual(len(design['subtasks']), 2)
+        self.assertEqual(build['dependencies'], [design['id']])
+
+    def test_invalid_item_rejects_whole_batch_with_per_item_errors(self):
+        payload = [
+            {'project': self.project.id, 'title': 'Fine', 'due_date': '2026-11-01'},
+            {'project': 999, 'title': 'Broken', 'due_date': '2026-11-01', 'dependencies': ['missing']},
+        ]
+        response = self.client.post('/api/v1/tasks/bulk/', payload, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data[0], {})
+        self.assertEqual(set(response.data[1]), {'project', 'dependencies'})
+        self.assertFalse(Task.objects.exists())
+
+    def test_bulk_update_and_delete(self):
+        tasks = [Task.objects.create(project=self.project, title=f'T{i}', due_date='2026-11-01') for i in range(3)]
+        response = self.client.patch(
+            '/api/v1/tasks/bulk/', [{'id': t.id, 'status': 'Done'} for t in tasks], format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(Task.objects.filter(status='Done').count(), 3)
+        response = self.client.delete('/api/v1/tasks/bulk/', {'ids': [t.id for t in tasks[:2]]}, format='json')
+        self.assertEqual(response.data, {'deleted': 2})
+
+
+class TaskGraphTests(TestCase):
+    def setUp(self):
+        from django.core.cache import cache
+        from rest_framework.test import APIClient
+        cache.clear()
+        self.director = User.objects.create_user(username='director', email='director@test.com', role='Director')
+        self.start = timezone.now().date()
+        self.project = Project.objects.create(
+            title='Graph', project_type='Research', start_date=self.start, end_date=self.start, budget=1,
+            lead=self.director,
+        )
+        due = self.start + timezone.timedelta(days=10)
+        self.design = Task.objects.create(project=self.project, title='Design', due_date=due)
+        self.build = Task.objects.create(project=self.project, title='Build', due_date=due)
+        self.docs = Task.objects.create(project=self.project, title='Docs', due_date=due)
+        self.ship = Task.objects.create(project=self.project, title='Ship', due_date=due)
+        self.build.dependencies.add(self.design)
+        self.ship.dependencies.add(self.build, self.docs)
+        self.client = APIClient()
+        self.client.force_authenticate(self.director)
+
+    def test_critical_path_and_cache_invalidation(self):
+        url = f'/api/v1/projects/{self.project.id}/critical-path/'
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['critical_path'], [self.design.id, self.build.id, self.ship.id])
+        self.assertLess(response.data['order'].index(self.build.id), response.data['order'].index(self.ship.id))
+        self.assertEqual(response.data['finish_date'], self.start + timezone.timedelta(days=3))
+
+        self.ship.dependencies.remove(self.build)
+        response = self.client.get(url)
+        self.assertEqual(response.data['critical_path'], [self.docs.id, self.ship.id])
+
+    def test_cycles_are_rejected(self):
+        response = self.client.patch(
+            f'/api/v1/tasks/{self.design.id}/', {'dependencies': [self.ship.id]}, format='json'
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('dependencies', response.data)
+
+        response = self.client.patch(
+            '/api/v1/tasks/bulk/', [{'id': self.docs.id, 'dependencies': [self.ship.id]}], format='json'
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('cycle', response.data[0]['dependencies'][0])
+        self.assertFalse(self.docs.dependencies.exists())
+
+    def test_cycles_across_projects_are_rejected(self):
+        today = self.start
+        tasks = []
+        for title in ('P1', 'P2', 'P3'):
+            project = Project.objects.create(
+                title=title, project_type='Research', start_date=today, end_date=today, budget=1, lead=self.director
+            )
+            tasks.append(Task.objects.create(project=project, title=f'{title} task', due_date=today))
+        first, second, third = tasks
+        first.dependencies.add(second)
+        second.dependencies.add(third)
+
+        response = self.client.patch(f'/api/v1/tasks/{third.id}/', {'dependencies': [first.id]}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn(f'{first.id} -> {second.id} -> {third.id}', response.data['dependencies'][0])
+        response = self.client.patch(
+            '/api/v1/tasks/bulk/', [{'id': third.id, 'dependencies': [first.id]}], format='json'
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(third.dependencies.exists())
+
+
+class OverdueSweepTests(TestCase):
+    def test_sweep_flips_past_due_unfinished_tasks_in_chunks(self):
+        from .overdue import sweep_overdue
+        lead = User.objects.create_user(username='lead', email='lead@test.com')
+        today = timezone.now().date()
+        past = today - timezone.timedelta(days=1)
+        first, second = [
+            Project.objects.create(
+                title=title, project_type='Research', start_date=today, end_date=today, budget=1, lead=lead
+            )
+            for title in ('First', 'Second')
+        ]
+        for status in ('To Do', 'In Progress', 'Done'):
+            Task.objects.create(project=first, title=status, due_date=past, status=status)
+        Task.objects.create(project=second, title='Late', due_date=past)
+        Task.objects.create(project=second, title='Upcoming', due_date=today)
+
+        with self.assertLogs('core.overdue', level='INFO') as logs:
+            self.assertEqual(sweep_overdue(today=today, chunk_size=2), {first.id: 2, second.id: 1})
+        self.assertEqual(
+            sorted((record.project_id, record.overdue_count) for record in logs.records if hasattr(record, 'project_id')),
+            sorted([(first.id, 2), (second.id, 1)]),
+        )
+        self.assertEqual(
+            set(Task.objects.filter(status='Overdue').values_list('title', flat=True)),
+            {'To Do', 'In Progress', 'Late'},
+        )
+        self.assertEqual(sweep_overdue(today=today), {})
+
+    @override_settings(CELERY_TIMEZONE='Africa/Nairobi')
+    def test_nightly_run_uses_the_beat_timezone_date(self):
+        from datetime import date, datetime, timezone as dt_timezone
+        from unittest import mock
+        from .overdue import sweep_overdue
+        lead = User.objects.create_user(username='lead', email='lead@test.com')
+        project = Project.objects.create(
+            title='Nightly', project_type='Research', start_date=date(2026, 3, 1), end_date=date(2026, 3, 31),
+            budget=1, lead=lead
+        )
+        Task.objects.create(project=project, title='Due yesterday', due_date=date(2026, 3, 9))
+        Task.objects.create(project=project, title='Due today', due_date=date(2026, 3, 10))
+
+        # 00:05 in Nairobi, when the beat entry fires, is still 9 March in UTC
+        with mock.patch('django.utils.timezone.now', return_value=datetime(2026, 3, 9, 21, 5, tzinfo=dt_timezone.utc)):
+            self.assertEqual(sweep_overdue(), {project.id: 1})
+        self.assertEqual(Task.objects.get(status='Overdue').title, 'Due yesterday')
+
+
+class DashboardSummaryTests(TestCase):
+    def setUp(self):
+        from django.core.cache import cache
+        from rest_framework.test import APIClient
+        cache.clear()
+        self.member = User.objects.create_user(username='member', email='member@test.com', role='Researcher')
+        other = User.objects.create_user(username='other', email='other@test.com', role='Researcher')
+        today = timezone.now().date()
+        self.mine = Project.objects.create(
+            title='Mine', project_type='Research', start_date=today, end_date=today, budget=1, lead=self.member
+        )
+        hidden = Project.objects.create(
+            title='Hidden', project_type='Research', start_date=today, end_date=today, budget=1, lead=other
+        )
+        Task.objects.create(project=self.mine, title='A', due_date=today, priority='High')
+        Task.objects.create(project=self.mine, title='B', due_date=today, status='Done', priority='High')
+        Task.objects.create(project=hidden, title='C', due_date=today)
+        self.client = APIClient()
+        self.client.force_authenticate(self.member)
+
+    def test_summary_is_scoped_grouped_and_cached(self):
+        with self.assertNumQueries(5):
+            response = self.client.get('/api/v1/dashboard/summary/')
+        tasks = response.data['tasks']
+        self.assertEqual(tasks['total'], 2)
+        self.assertEqual(tasks['by_status']['Done'], 1)
+        self.assertEqual(tasks['by_status']['Overdue'], 0)
+        self.assertEqual(tasks['by_priority']['High'], 2)
+        self.assertEqual(response.data['projects']['total'], 1)
+
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/v1/dashboard/summary/')
+        self.assertEqual(response['X-Cache'], 'HIT')
+
+        Task.objects.create(project=self.mine, title='D', due_date=self.mine.start_date)
+        response = self.client.get('/api/v1/dashboard/summary/')
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data['tasks']['total'], 3)
+
+
+class SearchTests(TestCase):
+    def setUp(self):
+        from rest_framework.test import APIClient
+        self.member = User.objects.create_user(username='member', email='member@test.com', role='Researcher')
+        other = User.objects.create_user(username='other', email='other@test.com', role='Researcher')
+        today = timezone.now().date()
+        self.mine = Project.objects.create(
+            title='Solar irrigation pilot', project_type='Pilot', start_date=today, end_date=today, budget=1,
+            lead=self.member,
+        )
+        hidden = Project.objects.create(
+            title='Solar kiosks', project_type='Pilot', start_date=today, end_date=today, budget=1, lead=other
+        )
+        self.task = Task.objects.create(project=self.mine, title='Size the solar panels', due_date=today)
+        Task.objects.create(project=hidden, title='Solar vendor shortlist', due_date=today)
+        Message.objects.create(
+            sender=other, receiver=self.member, subject='Pumps', content='The <b>solar</b> pump quote arrived'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.member)
+
+    def test_search_is_ranked_scoped_and_highlighted(self):
+        response = self.client.get('/api/v1/search/?q=solar')
+        self.assertEqual(response.status_code, 200)
+        found = {(row['type'], row['id']) for row in response.data['results']}
+        self.assertIn(('project', self.mine.id), found)
+        self.assertIn(('task', self.task.id), found)
+        self.assertEqual(len(found), 3)
+        message = next(row for row in response.data['results'] if row['type'] == 'message')
+        self.assertIn('&lt;b&gt;<mark>solar</mark>&lt;/b&gt;', message['highlight'])
+
+        # The last term matches as a prefix
+        response = self.client.get('/api/v1/search/?q=solar%20pan&types=task')
+        self.assertEqual([row['id'] for row in response.data['results']], [self.task.id])
+
+    def test_index_follows_edits_and_deletes(self):
+        self.task.title = 'Order inverters'
+        self.task.save()
+        self.assertEqual(self.client.get('/api/v1/search/?q=inverters').data['count'], 1)
+        self.task.delete()
+        self.assertEqual(self.client.get('/api/v1/search/?q=inverters').data['count'], 0)
+        self.assertEqual(self.client.get('/api/v1/search/').status_code, 400)
+
+
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        from django.core.cache import cache
+        from rest_framework.test import APIClient
+        cache.clear()
+        self.director = User.objects.create_user(username='director', email='director@test.com', role='Director')
+        today = timezone.now().date()
+        self.project = Project.objects.create(
+            title='Polled', project_type='Research', start_date=today, end_date=today, budget=1, lead=self.director
+        )
+        self.task = Task.objects.create(project=self.project, title='Poll me', due_date=today)
+        self.client = APIClient()
+        self.client.force_authenticate(self.director)
+
+    def test_unchanged_list_returns_304_without_serializing(self):
+        response = self.client.get('/api/v1/tasks/')
+        etag = response['ETag']
+        # A delete doesn't move the newest updated_at, so lists are validated by ETag only
+        self.assertNotIn('Last-Modified', response)
+
+        with self.assertNumQueries(1):
+            # Only the count/max aggregate; no page query, no prefetches
+            response = self.client.get('/api/v1/tasks/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        self.client.post('/api/v1/subtasks/', {'task': self.task.id, 'title': 'Via API'}, format='json')
+        response = self.client.get('/api/v1/tasks/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_list_ignores_if_modified_since_after_a_delete(self):
+        from django.utils.http import http_date
+        other = Task.objects.create(project=self.project, title='Delete me', due_date=timezone.now().date())
+        since = http_date(timezone.now().timestamp() + 60)
+        other.delete()
+        response = self.client.get('/api/v1/tasks/', HTTP_IF_MODIFIED_SINCE=since)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([row['title'] for row in response.data], ['Poll me'])
+
+        url = f'/api/v1/tasks/{self.task.id}/'
+        self.assertIn('Last-Modified', self.client.get(url))
+        self.assertEqual(self.client.get(url, HTTP_IF_MODIFIED_SINCE=since).status_code, 304)
+
+    def test_detail_etag_follows_m2m_changes(self):
+        url = f'/api/v1/projects/{self.project.id}/'
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        self.project.team.add(self.director)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_cached_list_answers_304_from_stored_validators(self):
+        etag = self.client.get('/api/v1/projects/')['ETag']
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/v1/projects/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['X-Cache'], 'HIT')
+
+
+class ChangesFeedTests(TestCase):
+    def setUp(self):
+        from unittest import mock
+        from rest_framework.test import APIClient
+        # Test writes are committed at once; the settle delay has its own test
+        patcher = mock.patch('core.changes.SETTLE_TIME', timezone.timedelta(0))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.member = User.objects.create_user(username='member', email='member@test.com', role='Researcher')
+        self.other = User.objects.create_user(username='other', email='other@test.com', role='Researcher')
+        today = timezone.now().date()
+        self.mine = Project.objects.create(
+            title='Mine', project_type='Research', start_date=today, end_date=today, budget=1, lead=self.member
+        )
+        self.hidden = Project.objects.create(
+            title='Hidden', project_type='Research', start_date=today, end_date=today, budget=1, lead=self.other
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.member)
+
+    def test_feed_returns_upserts_and_visible_tombstones(self):
+        today = self.mine.start_date
+        token = self.client.get('/api/v1/tasks/changes/').data['next']
+
+        kept = Task.objects.create(project=self.mine, title='Kept', due_date=today)
+        gone = Task.objects.create(project=self.mine, title='Gone', due_date=today)
+        hidden = Task.objects.create(project=self.hidden, title='Hidden', due_date=today)
+        kept.title = 'Kept, renamed'
+        kept.save()
+        gone_id, hidden_id = gone.id, hidden.id
+        gone.delete()
+        hidden.delete()
+
+        response = self.client.get(f'/api/v1/tasks/changes/?since={token}')
+        self.assertEqual([row['title'] for row in response.data['results']], ['Kept, renamed'])
+        self.assertEqual(response.data['deleted'], [gone_id])
+        self.assertNotIn(hidden_id, response.data['deleted'])
+
+        response = self.client.get(f"/api/v1/tasks/changes/?since={response.data['next']}")
+        self.assertEqual((response.data['results'], response.data['deleted']), ([], []))
+
+    def test_tombstones_reach_attendees_and_authors_outside_the_project(self):
+        from .models import Output
+        now = timezone.now()
+        event = Event.objects.create(title='Hidden meeting', start_date=now, end_date=now, category='Meeting',
+                                     owner=self.other, linked_project=self.hidden)
+        event.attendees.add(self.member)
+        output = Output.objects.create(project=self.hidden, output_type='Paper', title='Hidden paper', status='Draft',
+                                       date=now.date())
+        output.authors.add(self.member)
+        tokens = {path: self.client.get(f'{path}changes/').data['next'] for path in ('/api/v1/events/', '/api/v1/outputs/')}
+        self.assertEqual([row['id'] for row in self.client.get('/api/v1/events/').data], [event.id])
+
+        event_id, output_id = event.id, output.id
+        event.delete()
+        output.delete()
+        for path, deleted_id in (('/api/v1/events/', event_id), ('/api/v1/outputs/', output_id)):
+            response = self.client.get(f'{path}changes/?since={tokens[path]}')
+            self.assertEqual(response.data['deleted'], [deleted_id])
+
+    def test_bulk_writes_are_logged_and_expired_tokens_get_410(self):
+        from .models import ChangeLogEntry
+        token = self.client.get('/api/v1/tasks/changes/').data['next']
+        payload = [{'project': self.mine.id, 'title': f'T{i}', 'due_date': '2026-11-01'} for i in range(3)]
+        self.client.post('/api/v1/tasks/bulk/', payload, format='json')
+        response = self.client.get(f'/api/v1/tasks/changes/?since={token}')
+        self.assertEqual(len(response.data['results']), 3)
+
+        ChangeLogEntry.objects.filter(id__lte=int(response.data['next']) - 1).delete()
+        self.assertEqual(self.client.get('/api/v1/tasks/changes/?since=1').status_code, 410)
+
+    def test_token_waits_for_entries_that_may_still_be_uncommitted(self):
+        from unittest import mock
+        from .models import ChangeLogEntry
+        today = self.mine.start_date
+        token = self.client.get('/api/v1/tasks/changes/').data['next']
+        slow = Task.objects.create(project=self.mine, title='Slow', due_date=today)
+        Task.objects.create(project=self.mine, title='Fast', due_date=today)
+        # The slow transaction took the lower id but commits after the fast one
+        slow_entry = ChangeLogEntry.objects.get(resource='task', object_id=slow.id)
+        slow_entry_id = slow_entry.id
+        slow_entry.delete()
+
+        with mock.patch('core.changes.SETTLE_TIME', timezone.timedelta(seconds=5)):
+            response = self.client.get(f'/api/v1/tasks/changes/?since={token}')
+            self.assertEqual((response.data['results'], response.data['next']), ([], token))
+
+            ChangeLogEntry.objects.create(id=slow_entry_id, resource='task', object_id=slow.id, action='upsert')
+            later = timezone.now() + timezone.timedelta(seconds=10)
+            with mock.patch('django.utils.timezone.now', return_value=later):
+                response = self.client.get(f'/api/v1/tasks/changes/?since={token}')
+        self.assertEqual({row['title'] for row in response.data['results']}, {'Slow', 'Fast'})
+
+    def test_rows_moved_out_of_view_are_reported_as_deleted(self):
+        task = Task.objects.create(project=self.mine, title='Moving', due_date=self.mine.start_date)
+        token = self.client.get('/api/v1/tasks/changes/').data['next']
+        task.project = self.hidden
+        task.save()
+
+        response = self.client.get(f'/api/v1/tasks/changes/?since={token}')
+        self.assertEqual((response.data['results'], response.data['deleted']), ([], [task.id]))
+
+
+class RealtimeNotificationTests(TestCase):
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+        self.alice = User.objects.create_user(username='alice', email='alice@test.com')
+        self.bob = User.objects.create_user(username='bob', email='bob@test.com')
+
+    def published(self, action):
+        import json
+        from unittest import mock
+        with mock.patch('core.realtime._send') as send, self.captureOnCommitCallbacks(execute=True):
+            action()
+        return [(user_ids, json.loads(data)) for (user_ids, data), _ in send.call_args_list]
+
+    def test_messages_invitations_and_assignments_are_pushed_after_commit(self):
+        today = timezone.now().date()
+        project = Project.objects.create(
+            title='Push', project_type='Research', start_date=today, end_date=today, budget=1, lead=self.alice
+        )
+        sent = self.published(lambda: Message.objects.create(
+            sender=self.alice, receiver=self.bob, subject='Hi', content='Hello'
+        ))
+        self.assertEqual(sent[0][0], [self.bob.id])
+        self.assertEqual(sent[0][1]['event'], 'message.new')
+        self.assertEqual(sent[0][1]['data']['unread_count'], 1)
+
+        task = Task.objects.create(project=project, title='Unassigned', due_date=today)
+        task.assignee = self.bob
+        sent = self.published(task.save)
+        self.assertEqual([(ids, body['event']) for ids, body in sent], [([self.bob.id], 'task.assigned')])
+        self.assertEqual(self.published(task.save), [])
+        # A reloaded task with an unchanged assignee is not announced again
+        self.assertEqual(self.published(Task.objects.get(pk=task.pk).save), [])
+
+        event = Event.objects.create(
+            title='Kickoff', start_date=timezone.now(), end_date=timezone.now(), category='Meeting', owner=self.alice
+        )
+        sent = self.published(lambda: event.attendees.add(self.alice, self.bob))
+        self.assertEqual([(ids, body['event']) for ids, body in sent], [([self.bob.id], 'event.invitation')])
+
+    def test_stream_is_not_served_under_wsgi(self):
+        from rest_framework_simplejwt.tokens import AccessToken
+        token = AccessToken.for_user(self.alice)
+        self.assertEqual(self.client.get(f'/api/v1/stream/notifications/?token={token}').status_code, 501)
+
+    async def test_stream_delivers_published_notifications(self):
+        import json
+        from asgiref.sync import sync_to_async
+        from rest_framework_simplejwt.tokens import AccessToken
+        from . import realtime
+
+        token = await sync_to_async(AccessToken.for_user)(self.bob)
+        self.assertEqual((await self.async_client.get('/api/v1/stream/notifications/')).status_code, 401)
+
+        response = await self.async_client.get(f'/api/v1/stream/notifications/?token={token}')
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        frames = response.streaming_content.__aiter__()
+        self.assertTrue((await anext(frames)).startswith(b'retry:'))
+        realtime._send([self.bob.id], json.dumps({'event': 'message.new', 'data': {'id': 7}}))
+        self.assertEqual(await anext(frames), b'event: message.new\ndata: {"id": 7}\n\n')
+        await frames.aclose()
+
+
+class MailboxTests(TestCase):
+    def setUp(self):
+        from django.core.cache import cache
+        from rest_framework.test import APIClient
+        cache.clear()
+        self.alice = User.objects.create_user(username='alice', email='alice@test.com')
+        self.bob = User.objects.create_user(username='bob', email='bob@test.com')
+        self.carol = User.objects.create_user(username='carol', email='carol@test.com')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.bob)
+
+    def message(self, sender, receiver, subject, **kwargs):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Message.objects.create(sender=sender, receiver=receiver, subject=subject, content='...', **kwargs)
+
+    def test_inbox_sent_and_unread_count(self):
+        first = self.message(self.alice, self.bob, 'First')
+        self.message(self.alice, self.bob, 'Read', is_read=True)
+        self.message(self.bob, self.alice, 'Reply')
+        self.message(self.alice, self.carol, 'Not for bob')
+
+        response = self.client.get('/api/v1/messages/inbox/')
+        self.assertEqual([m['subject'] for m in response.data], ['Read', 'First'])
+        response = self.client.get('/api/v1/messages/inbox/?unread=true')
+        self.assertEqual([m['subject'] for m in response.data], ['First'])
+        response = self.client.get('/api/v1/messages/sent/')
+        self.assertEqual([m['subject'] for m in response.data], ['Reply'])
+        response = self.client.get('/api/v1/messages/')
+        self.assertEqual(sorted(m['subject'] for m in response.data), ['First', 'Read', 'Reply'])
+
+        # Maintained by the message signals, so the badge never hits the database
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/v1/messages/unread-count/')
+        self.assertEqual(response.data, {'unread_count': 1})
+
+        self.message(self.carol, self.bob, 'Second')
+        self.assertEqual(self.client.get('/api/v1/messages/unread-count/').data, {'unread_count': 2})
+        first.is_read = True
+        first.save()
+        self.assertEqual(self.client.get('/api/v1/messages/unread-count/').data, {'unread_count': 1})
+
+    def test_bulk_mark_read_and_archive_only_touch_own_received_messages(self):
+        today = timezone.now().date()
+        project = Project.objects.create(
+            title='Inbox', project_type='Research', start_date=today, end_date=today, budget=1, lead=self.alice
+        )
+        root = self.message(self.alice, self.bob, 'Root')
+        reply = self.message(self.alice, self.bob, 'Reply', parent=root)
+        self.message(self.bob, self.alice, 'Own reply', parent=reply)
+        other = self.message(self.alice, self.bob, 'Other', project=project)
+        self.message(self.alice, self.carol, 'Carol', project=project)
+        self.assertEqual(self.client.get('/api/v1/messages/unread-count/').data, {'unread_count': 3})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post('/api/v1/messages/mark-read/', {'thread': reply.id}, format='json')
+        self.assertEqual(response.data, {'updated': 2})
+        self.assertFalse(Message.objects.get(subject='Own reply').is_read)
+        self.assertEqual(self.client.get('/api/v1/messages/unread-count/').data, {'unread_count': 1})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post('/api/v1/messages/mark-read/', {}, format='json')
+        self.assertEqual(response.data, {'updated': 1})
+        self.assertFalse(Message.objects.get(subject='Carol').is_read)
+        self.assertEqual(self.client.get('/api/v1/messages/unread-count/').data, {'unread_count': 0})
+
+        self.assertEqual(self.client.post('/api/v1/messages/archive/', {}, format='json').status_code, 400)
+        response = self.client.post('/api/v1/messages/archive/', {'project': project.id}, format='json')
+        self.assertEqual(response.data, {'updated': 1})
+        self.assertEqual(list(Message.objects.filter(status='archived')), [other])
+        response = self.client.post('/api/v1/messages/archive/', {'ids': [other.id, root.id]}, format='json')
+        self.assertEqual(response.data, {'updated': 1})
+
+
+class QueryBudgetTests(TestCase):
+    """
+    Every GET route in core/urls.py, list and detail (the latter on seeded pks),
+    stays within its query budget for each role, and each is served by at least one.
+    """
+
+    def setUp(self):
+        from django.core.cache import cache
+        from rest_framework.test import APIClient
+        from .models import Partner, Output, SubTask, Innovator, Idea, Founder, FounderProject
+        cache.clear()
+        today = timezone.now().date()
+        now = timezone.now()
+        self.users = [
+            User.objects.create_user(username=f'user{i}', email=f'user{i}@test.com', role=role)
+            for i, role in enumerate(['Director', 'Research Assistant', 'Research Assistant', 'Innovation Officer', 'Admin'])
+        ]
+        director, alice, bob, officer, admin = self.users
+        for i in range(3):
+            project = Project.objects.create(
+                title=f'Project {i}', project_type='Research', start_date=today, end_date=today, budget=1, lead=alice
+            )
+            project.team.add(alice, bob)
+            previous = None
+            for j in range(3):
+                task = Task.objects.create(project=project, title=f'Task {i}.{j}', due_date=today, assignee=bob)
+                SubTask.objects.create(task=task, title='Step')
+                if previous:
+                    task.dependencies.add(previous)
+                previous = task
+            output = Output.objects.create(project=project, output_type='Publication', title=f'Paper {i}',
+                                           status='Draft', date=today)
+            output.authors.add(alice, bob)
+            event = Event.objects.create(title=f'Meeting {i}', start_date=now, end_date=now, category='Meeting',
+                                         owner=alice, linked_project=project)
+            event.attendees.add(alice, bob)
+            root = Message.objects.create(sender=alice, receiver=bob, subject=f'Hi {i}', content='...', project=project)
+            Message.objects.create(sender=bob, receiver=alice, subject='Re', content='...', parent=root)
+            partner = Partner.objects.create(name=f'Partner {i}', sector='Academia', contact='x',
+                                             email=f'p{i}@test.com', engagement='Active')
+            innovator = Innovator.objects.create(name=f'Innovator {i}', year='2024', email=f'i{i}@test.com')
+            idea = Idea.objects.create(owner_name='Owner', project_title=f'Idea {i}', email=f'idea{i}@test.com',
+                                       projects_desc='...')
+            founder_user = User.objects.create_user(username=f'founder{i}', email=f'founder{i}@test.com')
+            founder = Founder.objects.create(user=founder_user, name=f'Founder {i}', email=f'founder{i}@test.com')
+            for stage in ('MVP', 'Seed'):
+                venture = FounderProject.objects.create(founder=founder, project_name=f'Venture {i}', stage=stage)
+        # Detail routes are requested for the last row of each kind
+        self.pks = {
+            'user': alice.pk, 'project': project.pk, 'task': task.pk, 'subtask': task.subtasks.get().pk,
+            'partner': partner.pk, 'output': output.pk, 'message': root.pk, 'event': event.pk,
+            'innovator': innovator.pk, 'idea': idea.pk, 'founder-profile': founder.pk,
+            'founder-projects': venture.pk, 'officer-summary': founder.pk,
+        }
+        self.client = APIClient()
+
+    def test_routes_stay_within_budgets(self):
+        from django.db import connection
+        from .benchmark import SKIPPED_ROUTES, route_params
+        from .instrumentation import QueryProfile, budget_routes, query_budget
+
+        routes = [(name, path) for name, path in budget_routes(pks=self.pks) if name not in SKIPPED_ROUTES]
+        self.assertIn(('message-inbox', '/api/v1/messages/inbox/'), routes)
+        self.assertIn(('message-thread', f"/api/v1/messages/{self.pks['message']}/thread/"), routes)
+        served = set()
+        for user in self.users:
+            self.client.force_authenticate(user=user)
+            # Paginated lists run the page query and a count/max aggregate for their validators
+            for (name, path), query in [(route, query) for route in routes for query in ({}, {'page_size': 2})]:
+                profile = QueryProfile()
+                with self.subTest(route=name, query=query, role=user.role), connection.execute_wrapper(profile):
+                    response = self.client.get(path, {**route_params(name, user), **query})
+                    # Roles may be refused a route or a row, but every route must do its real work for someone
+                    self.assertIn(response.status_code, (200, 403, 404))
+                    self.assertLessEqual(profile.count, query_budget(name))
+                    self.assertEqual(profile.duplicates(), [])
+                if response.status_code == 200:
+                    served.add(name)
+        self.assertEqual(served, {name for name, _ in routes})
+
+    def test_middleware_logs_reads_over_budget(self):
+        self.client.force_authenticate(user=self.users[1])
+        with override_settings(QUERY_SAMPLE_RATE=1.0, QUERY_BUDGETS={'message-inbox': 0}):
+            with self.assertLogs('core.instrumentation', level='WARNING') as logs:
+                response = self.client.get('/api/v1/messages/inbox/')
+        self.assertIn('message-inbox', logs.output[0])
+        self.assertIn('budget 0', logs.output[0])
+        self.assertRegex(response['Server-Timing'], r'^db;dur=[0-9.]+;desc="1 queries"$')
+
+        with override_settings(QUERY_SAMPLE_RATE=0.0):
+            self.assertNotIn('Server-Timing', self.client.get('/api/v1/messages/inbox/'))
+
+
+
+class DatasetBenchmarkTests(TestCase):
+    def test_generated_dataset_has_teams_threads_and_acyclic_dependencies(self):
+        from io import StringIO
+        from django.core.management import CommandError, call_command
+        from .graph import TaskGraph
+        from .models import SearchDocument
+        counts = {'users': 12, 'projects': 4, 'tasks': 40, 'messages': 60, 'events': 5, 'outputs': 3, 'partners': 2}
+        args = [f'--{model}={count}' for model, count in counts.items()]
+        call_command('generate_dataset', *args, '--chunk-size=7', stdout=StringIO())
+
+        self.assertEqual(User.objects.filter(username__startswith='gen0-').count(), 12)
+        self.assertEqual(Task.objects.count(), 40)
+        self.assertEqual(Message.objects.count(), 60)
+        self.assertTrue(Message.objects.filter(parent__isnull=False).exists())
+        for reply in Message.objects.filter(parent__isnull=False).select_related('parent'):
+            self.assertEqual({reply.sender_id, reply.receiver_id}, {reply.parent.sender_id, reply.parent.receiver_id})
+            self.assertGreaterEqual(reply.timestamp, reply.parent.timestamp)
+        self.assertGreater(len({m.timestamp.date() for m in Message.objects.filter(parent__isnull=True)}), 1)
+        self.assertFalse(Project.objects.filter(team__isnull=True).exists())
+        self.assertIsNone(TaskGraph.for_projects(Project.objects.values_list('id', flat=True)).find_cycle())
+        self.assertEqual(SearchDocument.objects.filter(content_type='task').count(), 40)
+
+        with self.assertRaises(CommandError):
+            call_command('generate_dataset', *args, stdout=StringIO())
+
+    def test_benchmark_stores_comparable_results(self):
+        import json
+        import os
+        import tempfile
+        from io import StringIO
+        from django.core.management import call_command
+        call_command('generate_dataset', '--users=8', '--projects=2', '--tasks=10', '--messages=10', '--events=2',
+                     '--outputs=2', '--partners=1', '--skip-search-index', stdout=StringIO())
+
+        with tempfile.TemporaryDirectory() as directory:
+            first, second = os.path.join(directory, 'a.json'), os.path.join(directory, 'b.json')
+            options = {'iterations': 2, 'warmup': 0, 'roles': ['Research Assistant'], 'no_memory': True}
+            call_command('benchmark_endpoints', output=first, stdout=StringIO(), **options)
+            out = StringIO()
+            call_command('benchmark_endpoints', output=second, compare=first, stdout=out, **options)
+            with open(second) as f:
+                report = json.load(f)
+
+        endpoints = {row['endpoint'] for row in report['results']}
+        self.assertTrue({'task-list', 'task-detail', 'message-thread', 'dashboard-summary'} <= endpoints)
+        self.assertNotIn('notification-stream', endpoints)
+        self.assertTrue(all(row['status'] < 500 for row in report['results']))
+        self.assertEqual(report['rows']['Task'], 10)
+        self.assertIn('slower than the baseline', out.getvalue())
+
+
+class SeedingTests(TestCase):
+    def test_seed_script_resets_and_bulk_loads(self):
+        from io import StringIO
+        from unittest import mock
+        import seed_db
+        from .models import Founder, FounderProject, SearchDocument
+        admin = User.objects.create_superuser(username='root', email='root@test.com', password='x')
+        User.objects.create_user(username='stale', email='stale@test.com')
+
+        for _ in range(2):
+            with mock.patch('sys.stdout', new=StringIO()):
+                seed_db.seed()
+
+        self.assertTrue(User.objects.filter(pk=admin.pk).exists())
+        self.assertFalse(User.objects.filter(username='stale').exists())
+        self.assertEqual(User.objects.filter(is_superuser=False).count(), len(seed_db.USERS_DATA))
+        director = User.objects.get(username='director@drice.ac.ke')
+        self.assertTrue(director.check_password(seed_db.SEED_PASSWORD))
+        # One hash shared by every seeded account
+        self.assertEqual(User.objects.filter(is_superuser=False).values('password').distinct().count(), 1)
+        self.assertEqual(Project.objects.get(pk=1).team.count(), 5)
+        self.assertEqual(Event.objects.get(title='Quarterly Research Review').attendees.count(), 9)
+        self.assertEqual(Task.objects.count(), 5)
+        self.assertEqual(FounderProject.objects.filter(founder__in=Founder.objects.all()).count(), 3)
+        self.assertTrue(SearchDocument.objects.filter(content_type='project', title='Kibera Sanitation Mapping').exists())
+
+    def test_loader_keeps_backdated_timestamps_without_touching_model_fields(self):
+        from .seeding import BulkLoader
+        lead = User.objects.create_user(username='lead', email='lead@test.com')
+        today = timezone.now().date()
+        backdated = timezone.now() - timezone.timedelta(days=400)
+        loader = BulkLoader('secret')
+        old, fresh = loader.insert(Project, [
+            Project(title=title, project_type='Research', start_date=today, end_date=today, budget=1, lead=lead,
+                    created_at=created_at)
+            for title, created_at in (('Old', backdated), ('Fresh', None))
+        ])
+        self.assertEqual(Project.objects.get(pk=old.pk).created_at, backdated)
+        self.assertGreater(Project.objects.get(pk=fresh.pk).created_at, backdated)
+        self.assertIsNotNone(Project.objects.get(pk=old.pk).updated_at)
+        # Ordinary saves still get their automatic timestamps
+        self.assertGreater(Project.objects.create(
+            title='Saved', project_type='Research', start_date=today, end_date=today, budget=1, lead=lead,
+            created_at=backdated,
+        ).created_at, backdated)
+
+    def test_finish_drops_caches_keyed_by_recycled_ids(self):
+        from django.core.cache import cache
+        from .graph import critical_path_cache_key
+        from .messaging import UnreadCounter
+        from .reports import ReportGenerator
+        from .seeding import BulkLoader
+        lead = User.objects.create_user(username='lead', email='lead@test.com')
+        today = timezone.now().date()
+        project = Project.objects.create(
+            title='Before', project_type='Research', start_date=today, end_date=today, budget=1, lead=lead
+        )
+        keys = [ReportGenerator.cache_key(project.pk), critical_path_cache_key(project.pk), UnreadCounter.cache_key(lead.pk)]
+        cache.set_many({key: 'stale' for key in keys})
+
+        loader = BulkLoader('secret')
+        loader.truncate([Project], users=False)
+        loader.finish(index=False)
+        self.assertEqual(cache.get_many(keys), {})
+
+
+class CachedJWTAuthenticationTests(TestCase):
+    def setUp(self):
+        from django.core.cache import cache
+        from rest_framework.test import APIClient
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='dana', email='dana@test.com', password='first-secret', first_name='Dana', last_name='Otieno',
+            avatar='DO',
+        )
+        self.client = APIClient()
+
+    def login(self):
+        response = self.client.post('/api/v1/auth/token/', {'username': 'dana', 'password': 'first-secret'}, format='json')
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {response.data['access']}")
+        return response.data
+
+    def test_user_is_resolved_from_cache_until_it_changes(self):
+        from rest_framework_simplejwt.tokens import AccessToken
+        tokens = self.login()
+        claims = AccessToken(tokens['access'])
+        self.assertEqual((claims['role'], claims['name'], claims['avatar']), ('Research Assistant', 'Dana Otieno', 'DO'))
+
+        with self.assertNumQueries(1):
+            self.assertEqual(self.client.get('/api/v1/me/').data['role'], 'Research Assistant')
+        with self.assertNumQueries(0):
+            self.client.get('/api/v1/me/')
+
+        self.user.role = 'Director'
+        self.user.save()
+        self.assertEqual(self.client.get('/api/v1/me/').data['role'], 'Director')
+        refreshed = self.client.post('/api/v1/auth/token/refresh/', {'refresh': tokens['refresh']}, format='json')
+        self.assertEqual(AccessToken(refreshed.data['access'])['role'], 'Director')
+
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.client.get('/api/v1/me/').status_code, 401)
+
+    def test_saving_the_cached_user_keeps_unloaded_fields(self):
+        self.login()
+        self.client.get('/api/v1/me/')
+        response = self.client.patch('/api/v1/users/change-password/', {'password': 'second-secret'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.check_password('second-secret'))
+        self.assertFalse(self.user.force_password_change)
+        self.assertEqual((self.user.email, self.user.avatar), ('dana@test.com', 'DO'))
+
+
+class EventAvailabilityTests(TestCase):
+    def setUp(self):
+        from datetime import datetime, timezone as dt_timezone
+        from rest_framework.test import APIClient
+        self.alice = User.objects.create_user(username='alice', email='alice@test.com')
+        self.bob = User.objects.create_user(username='bob', email='bob@test.com')
+        self.carol = User.objects.create_user(username='carol', email='carol@test.com')
+        # Monday 7 January 2030, UTC
+        self.at = lambda day, hour, minute=0: datetime(2030, 1, day, hour, minute, tzinfo=dt_timezone.utc)
+        self.booking = Event.objects.create(
+            title='Lab booking', start_date=self.at(7, 9), end_date=self.at(7, 12), category='Meeting', owner=self.alice
+        )
+        review = Event.objects.create(
+            title='Review', start_date=self.at(7, 11), end_date=self.at(7, 13, 30), category='Meeting', owner=self.carol
+        )
+        review.attendees.add(self.bob)
+        Event.objects.create(title='Deadline', start_date=self.at(7, 14), end_date=self.at(7, 14), category='Deadline',
+                             owner=self.bob)
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.alice)
+
+    def test_interval_index_loads_in_one_query(self):
+        from .availability import IntervalIndex
+        with self.assertNumQueries(1):
+            index = IntervalIndex.load([self.alice.pk, self.bob.pk], self.at(7, 0), self.at(8, 0))
+        self.assertEqual(index.busy(self.bob.pk), [(self.at(7, 11), self.at(7, 13, 30))])
+        self.assertEqual(
+            [conflict['user'] for conflict in index.conflicts([self.alice.pk, self.bob.pk], self.at(7, 10), self.at(7, 11, 30))],
+            [self.alice.pk, self.bob.pk],
+        )
+        self.assertEqual(index.overlapping(self.alice.pk, self.at(7, 12), self.at(7, 13)), [])
+
+    def test_create_and_update_report_conflicts(self):
+        payload = {
+            'title': 'Sync', 'start_date': self.at(7, 10).isoformat(), 'end_date': self.at(7, 11, 30).isoformat(),
+            'category': 'Meeting', 'owner': self.alice.pk, 'attendees': [self.bob.pk],
+        }
+        response = self.client.post('/api/v1/events/', payload, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(
+            [(conflict['user'], conflict['event']) for conflict in response.data['conflicts']],
+            [(self.alice.pk, self.booking.pk), (self.bob.pk, self.booking.pk + 1)],
+        )
+
+        response = self.client.patch(
+            f"/api/v1/events/{response.data['id']}/",
+            {'start_date': self.at(7, 15).isoformat(), 'end_date': self.at(7, 16).isoformat()}, format='json',
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['conflicts'], [])
+
+    def test_availability_finds_earliest_common_slots(self):
+        users = f'{self.alice.pk},{self.bob.pk}'
+        response = self.client.get('/api/v1/events/availability/', {
+            'users': users, 'duration': 90, 'limit': 3,
+            'start': self.at(7, 8, 10).isoformat(), 'end': self.at(14, 0).isoformat(),
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [(slot['start'], slot['end']) for slot in response.data['slots']],
+            [(self.at(7, 13, 30), self.at(7, 15)), (self.at(7, 15), self.at(7, 16, 30)), (self.at(8, 8), self.at(8, 9, 30))],
+        )
+        self.assertEqual(response.data['busy'][self.alice.pk], [{'start': self.at(7, 9), 'end': self.at(7, 12)}])
+
+        # Saturday and Sunday are skipped unless asked for
+        weekend = {'users': users, 'start': self.at(12, 0).isoformat(), 'end': self.at(15, 0).isoformat()}
+        self.assertEqual(self.client.get('/api/v1/events/availability/', weekend).data['slots'][0]['start'], self.at(14, 8))
+        weekend['weekends'] = 'true'
+        self.assertEqual(self.client.get('/api/v1/events/availability/', weekend).data['slots'][0]['start'], self.at(12, 8))
+
+        for params in ({'users': 'x'}, {'users': '999'}, {'users': users, 'start': self.at(9, 0).isoformat(),
+                                                            'end': self.at(8, 0).isoformat()}):
+            response = self.client.get('/api/v1/events/availability/', params)
+            self.assertEqual(response.status_code, 400)
+            self.assertIn('error', response.data)
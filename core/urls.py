@@ -1,7 +1,9 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
+from .realtime import notification_stream
 from .views import (
-    UserMeView, ChangePasswordView, UserViewSet, ProjectViewSet, TaskViewSet, 
+    UserMeView, ChangePasswordView, CacheStatsView, DashboardSummaryView, SearchView,
+    UserViewSet, ProjectViewSet, TaskViewSet, SubTaskViewSet,
     PartnerViewSet, OutputViewSet, MessageViewSet, EventViewSet,
     InnovatorViewSet, IdeaViewSet, FounderProfileViewSet, FounderProjectViewSet, InnovationOfficerFounderViewSet
 )
@@ -10,6 +12,7 @@ router = DefaultRouter()
 router.register(r'users', UserViewSet, basename='user')
 router.register(r'projects', ProjectViewSet, basename='project')
 router.register(r'tasks', TaskViewSet, basename='task')
+router.register(r'subtasks', SubTaskViewSet, basename='subtask')
 router.register(r'partners', PartnerViewSet, basename='partner')
 router.register(r'outputs', OutputViewSet, basename='output')
 router.register(r'messages', MessageViewSet, basename='message')
@@ -23,5 +26,9 @@ router.register(r'founders/officer-summary', InnovationOfficerFounderViewSet, ba
 urlpatterns = [
     path('me/', UserMeView.as_view(), name='user-me'),
     path('users/change-password/', ChangePasswordView.as_view(), name='change-password'),
+    path('cache/stats/', CacheStatsView.as_view(), name='cache-stats'),
+    path('dashboard/summary/', DashboardSummaryView.as_view(), name='dashboard-summary'),
+    path('search/', SearchView.as_view(), name='search'),
+    path('stream/notifications/', notification_stream, name='notification-stream'),
     path('', include(router.urls)),
 ]
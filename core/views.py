@@ -2,35 +2,31 @@ from rest_framework import viewsets, permissions, generics, status
 from rest_framework.permissions import AllowAny
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from .models import User, Project, Task, Partner, Output, Message, Event, Innovator, Idea
+from rest_framework.exceptions import PermissionDenied
+from .models import User, Project, Task, SubTask, Partner, Output, Event, Innovator, Idea
 from .serializers import (
-    UserSerializer, ProjectSerializer, TaskSerializer, 
-    PartnerSerializer, OutputSerializer, MessageSerializer, EventSerializer, ChangePasswordSerializer,
-    InnovatorSerializer, IdeaSerializer
+    UserSerializer, ProjectSerializer, TaskSerializer, SubTaskSerializer,
+    PartnerSerializer, OutputSerializer, MessageSerializer, MessageSelectionSerializer, EventSerializer,
+    AvailabilityQuerySerializer,
+    ChangePasswordSerializer, InnovatorSerializer, IdeaSerializer
 )
 from .permissions import IsDirectorOrDeputy, IsAdmin, IsOwnerOrStaff
 from .reports import ReportGenerator
-from integration.services import GoogleCalendarService
-from django.core.mail import send_mail
-from django.conf import settings
-import threading
-
-def send_email_async(subject, message, recipient_list):
-    """Utility to send emails without blocking the main thread"""
-    def send():
-        try:
-            send_mail(
-                subject,
-                message,
-                settings.DEFAULT_FROM_EMAIL,
-                recipient_list,
-                fail_silently=True,
-            )
-        except Exception as e:
-            print(f"Async email sending failed: {e}")
-            
-    thread = threading.Thread(target=send)
-    thread.start()
+from .messaging import MessageThread
+from . import messaging
+from .availability import IntervalIndex, event_conflicts
+from .visibility import ProjectScope
+from .caching import CachedListMixin
+from .conditional import ConditionalGetMixin, touch
+from .changes import ChangesFeedMixin
+from .fieldsets import SparseQuerysetMixin
+from .bulk import TaskBulkWriter
+from .graph import project_critical_path, DependencyCycleError
+from .dashboard import DashboardSummary
+from . import search
+from . import caching
+from .outbox import queue_email
+from integration.tasks import schedule_event_sync, schedule_event_deletion
 
 class UserMeView(generics.RetrieveAPIView):
     """Returns the profile and role of the currently authenticated user."""
@@ -47,17 +43,62 @@ class ChangePasswordView(generics.UpdateAPIView):
     def get_object(self):
         return self.request.user
 
+class CacheStatsView(generics.GenericAPIView):
+    """Hit rate and invalidation counts of the list response cache (Admin only)."""
+    permission_classes = [permissions.IsAuthenticated, IsAdmin]
+
+    def get(self, request):
+        return Response(caching.stats())
+
+class DashboardSummaryView(generics.GenericAPIView):
+    """Counts by status, priority, type and stage over everything the user can see."""
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        summary, hit = DashboardSummary.for_request(request)
+        response = Response(summary)
+        response['X-Cache'] = 'HIT' if hit else 'MISS'
+        return response
+
+class SearchView(generics.GenericAPIView):
+    """
+    Ranked full-text search: ``?q=`` the query, optional ``?types=task,message``
+    and ``?limit=``. Only rows the user could see through the viewsets are returned.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        query = request.query_params.get('q', '').strip()
+        if not query:
+            return Response({'error': 'The q parameter is required.'}, status=status.HTTP_400_BAD_REQUEST)
+        types = [t for t in request.query_params.get('types', '').split(',') if t.strip()]
+        unknown = sorted(set(types) - set(search.INDEXED))
+        if unknown:
+            return Response({'error': f"Unknown types: {', '.join(unknown)}"}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            limit = int(request.query_params.get('limit', search.DEFAULT_LIMIT))
+        except ValueError:
+            return Response({'error': 'limit must be an integer.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        results = search.search(query, ProjectScope.for_request(request), content_types=types, limit=limit)
+        return Response({'query': query, 'count': len(results), 'results': results})
+
 class UserViewSet(viewsets.ModelViewSet):
     queryset = User.objects.all()
     serializer_class = UserSerializer
+    cursor_ordering = ('id',)
     
     def get_permissions(self):
         if self.action in ['create', 'update', 'partial_update', 'destroy']:
             return [permissions.IsAuthenticated(), IsAdmin()]
         return [permissions.IsAuthenticated()]
 
-class ProjectViewSet(viewsets.ModelViewSet):
+class ProjectViewSet(
+    ChangesFeedMixin, CachedListMixin, ConditionalGetMixin, SparseQuerysetMixin, viewsets.ModelViewSet
+):
     serializer_class = ProjectSerializer
+    cache_namespace = 'projects'
+    cursor_ordering = ('-created_at', '-id')
     
     def get_permissions(self):
         if self.action in ['create', 'update', 'partial_update', 'destroy']:
@@ -65,11 +106,8 @@ class ProjectViewSet(viewsets.ModelViewSet):
         return [permissions.IsAuthenticated()]
 
     def get_queryset(self):
-        user = self.request.user
-        queryset = Project.objects.select_related('lead').prefetch_related('team').all()
-        if user.role in ['Admin', 'Director', 'Deputy Director', 'Innovation Officer', 'Data Analyst']:
-            return queryset
-        return queryset.filter(Q(lead=user) | Q(team=user)).distinct()
+        queryset = self.with_relations(Project.objects.all())
+        return ProjectScope.for_request(self.request).filter_projects(queryset)
 
     @action(detail=True, methods=['get'])
     def generate_report(self, request, pk=None):
@@ -78,48 +116,166 @@ class ProjectViewSet(viewsets.ModelViewSet):
             return Response(report_data)
         return Response({'error': 'Project not found'}, status=status.HTTP_404_NOT_FOUND)
 
-class TaskViewSet(viewsets.ModelViewSet):
+    @action(detail=True, methods=['get'], url_path='critical-path')
+    def critical_path(self, request, pk=None):
+        """Topological order, CPM schedule and critical path of the project's task graph."""
+        project = self.get_object()
+        try:
+            return Response(project_critical_path(project))
+        except DependencyCycleError as e:
+            return Response({'error': str(e), 'cycle': e.cycle}, status=status.HTTP_409_CONFLICT)
+
+    @action(detail=False, methods=['get'])
+    def weekly_reports(self, request):
+        """Weekly summaries for every visible project, or those listed in ?ids=1,2,3."""
+        project_ids = ProjectScope.for_request(request).filter_projects(Project.objects.all())
+        ids = request.query_params.get('ids')
+        if ids:
+            try:
+                project_ids = project_ids.filter(id__in=[int(i) for i in ids.split(',') if i.strip()])
+            except ValueError:
+                return Response({'error': 'ids must be a comma-separated list of integers'}, status=status.HTTP_400_BAD_REQUEST)
+        reports = ReportGenerator.generate_weekly_summaries(project_ids.values_list('id', flat=True))
+        return Response([dict(report, project=pid) for pid, report in sorted(reports.items())])
+
+class TaskViewSet(ChangesFeedMixin, ConditionalGetMixin, SparseQuerysetMixin, viewsets.ModelViewSet):
     serializer_class = TaskSerializer
     permission_classes = [permissions.IsAuthenticated]
+    # CursorPagination seeks on the first column only and steps past ties with an
+    # offset, so the cursor uses a near-unique column; plain lists keep due-date order
+    cursor_ordering = ('-created_at', '-id')
 
     def get_queryset(self):
-        user = self.request.user
-        queryset = Task.objects.select_related('assignee', 'project').prefetch_related('subtasks', 'dependencies').all()
-        if user.role in ['Admin', 'Director', 'Deputy Director', 'Innovation Officer', 'Data Analyst']:
-            return queryset
-        return queryset.filter(Q(assignee=user) | Q(project__lead=user) | Q(project__team=user)).distinct()
+        queryset = self.with_relations(Task.objects.order_by('due_date', 'id'))
+        return ProjectScope.for_request(self.request).filter_tasks(queryset)
+
+    @action(detail=False, methods=['post', 'patch', 'delete'])
+    def bulk(self, request):
+        """
+        POST a list of tasks (with nested subtasks, and dependencies given as task
+        ids or as refs to other items) to create them in one transaction. PATCH a
+        list of partial tasks with ids to update them; a subtasks or dependencies
+        key replaces the existing set. DELETE {"ids": [...]} to remove tasks.
+        """
+        writer = TaskBulkWriter(ProjectScope.for_request(request))
+        if request.method == 'DELETE':
+            ids = request.data.get('ids') if isinstance(request.data, dict) else None
+            return Response({'deleted': writer.delete(ids)})
+
+        if request.method == 'POST':
+            tasks, response_status = writer.create(request.data), status.HTTP_201_CREATED
+        else:
+            tasks, response_status = writer.update(request.data), status.HTTP_200_OK
+
+        order = {task.id: index for index, task in enumerate(tasks)}
+        saved = sorted(self.get_queryset().filter(id__in=order), key=lambda task: order[task.id])
+        return Response(self.get_serializer(saved, many=True).data, status=response_status)
+
+class SubTaskViewSet(viewsets.ModelViewSet):
+    serializer_class = SubTaskSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    cursor_ordering = ('id',)
+
+    def get_queryset(self):
+        tasks = ProjectScope.for_request(self.request).filter_tasks(Task.objects.all())
+        return SubTask.objects.filter(task__in=tasks)
 
-class PartnerViewSet(viewsets.ModelViewSet):
+    def _check_task(self, task):
+        tasks = ProjectScope.for_request(self.request).filter_tasks(Task.objects.filter(pk=task.pk))
+        if not tasks.exists():
+            raise PermissionDenied('You cannot edit subtasks of this task.')
+
+    # Subtasks are nested in the task payload, so the parent's ETag must move.
+    # Done here rather than in a signal so bulk subtask replacement stays set-based.
+    def perform_create(self, serializer):
+        self._check_task(serializer.validated_data['task'])
+        subtask = serializer.save()
+        touch(Task, [subtask.task_id])
+
+    def perform_update(self, serializer):
+        if 'task' in serializer.validated_data:
+            self._check_task(serializer.validated_data['task'])
+        previous_task_id = serializer.instance.task_id
+        subtask = serializer.save()
+        touch(Task, {previous_task_id, subtask.task_id})
+
+    def perform_destroy(self, instance):
+        instance.delete()
+        touch(Task, [instance.task_id])
+
+class PartnerViewSet(CachedListMixin, ConditionalGetMixin, SparseQuerysetMixin, viewsets.ModelViewSet):
     serializer_class = PartnerSerializer
+    cache_namespace = 'partners'
     permission_classes = [permissions.IsAuthenticated]
+    cursor_ordering = ('id',)
 
     def get_queryset(self):
-        user = self.request.user
-        queryset = Partner.objects.select_related('project').all()
-        if user.role in ['Admin', 'Director', 'Deputy Director', 'Innovation Officer', 'Data Analyst']:
-            return queryset
-        return queryset.filter(Q(project__lead=user) | Q(project__team=user)).distinct()
+        queryset = self.with_relations(Partner.objects.all())
+        return ProjectScope.for_request(self.request).filter_partners(queryset)
 
-class OutputViewSet(viewsets.ModelViewSet):
+class OutputViewSet(
+    ChangesFeedMixin, CachedListMixin, ConditionalGetMixin, SparseQuerysetMixin, viewsets.ModelViewSet
+):
     serializer_class = OutputSerializer
+    cache_namespace = 'outputs'
     permission_classes = [permissions.IsAuthenticated]
+    # Seek on the id rather than the low-cardinality date; see TaskViewSet
+    cursor_ordering = ('-id',)
     
     def get_queryset(self):
-        user = self.request.user
-        queryset = Output.objects.select_related('project').prefetch_related('authors').all()
-        if user.role in ['Admin', 'Director', 'Deputy Director', 'Innovation Officer', 'Data Analyst']:
-            return queryset
-        return queryset.filter(Q(authors=user) | Q(project__lead=user) | Q(project__team=user)).distinct()
-
-from django.db.models import Q
+        queryset = self.with_relations(Output.objects.order_by('-date', '-id'))
+        return ProjectScope.for_request(self.request).filter_outputs(queryset)
 
-class MessageViewSet(viewsets.ModelViewSet):
+class MessageViewSet(ChangesFeedMixin, ConditionalGetMixin, SparseQuerysetMixin, viewsets.ModelViewSet):
     serializer_class = MessageSerializer
     permission_classes = [permissions.IsAuthenticated]
+    cursor_ordering = ('-timestamp', '-id')
     
     def get_queryset(self):
-        user = self.request.user
-        return Message.objects.select_related('sender', 'receiver', 'project').prefetch_related('replies').filter(Q(sender=user) | Q(receiver=user)).distinct()
+        return self.with_relations(messaging.mailbox(self.request.user))
+
+    def _mailbox_response(self, queryset):
+        queryset = self.with_relations(queryset).order_by('-timestamp', '-id')
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(self.get_serializer(page, many=True).data)
+        return Response(self.get_serializer(queryset, many=True).data)
+
+    @action(detail=False, methods=['get'])
+    def inbox(self, request):
+        """Messages received, newest first; ``?unread=true`` for unread only."""
+        unread_only = request.query_params.get('unread', '').lower() in ('1', 'true')
+        return self._mailbox_response(messaging.inbox(request.user, unread_only=unread_only))
+
+    @action(detail=False, methods=['get'])
+    def sent(self, request):
+        """Messages sent, newest first."""
+        return self._mailbox_response(messaging.sent(request.user))
+
+    @action(detail=False, methods=['get'], url_path='unread-count')
+    def unread_count(self, request):
+        return Response({'unread_count': messaging.UnreadCounter.get(request.user.pk)})
+
+    def _selection(self, request):
+        serializer = MessageSelectionSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        return serializer.validated_data
+
+    @action(detail=False, methods=['post'], url_path='mark-read')
+    def mark_read(self, request):
+        """Marks received messages read: by ``ids``, ``thread``, ``project`` or ``before``; all of them if none."""
+        return Response({'updated': messaging.mark_read(request.user, **self._selection(request))})
+
+    @action(detail=False, methods=['post'])
+    def archive(self, request):
+        """Archives received messages matching ``ids``, ``thread``, ``project`` or ``before``."""
+        selection = self._selection(request)
+        if not selection:
+            return Response(
+                {'error': 'Give ids, thread, project or before to choose the messages to archive.'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        return Response({'updated': messaging.archive(request.user, **selection)})
 
     def perform_create(self, serializer):
         message = serializer.save()
@@ -128,44 +284,85 @@ class MessageViewSet(viewsets.ModelViewSet):
         subject = f"New Message: {message.subject}"
         body = f"Hello {message.receiver.first_name or message.receiver.username},\n\nYou have received a new message from {message.sender.first_name or message.sender.username}.\n\nPriority: {message.priority}\n\nMessage:\n{message.content}\n\nPlease check your dashboard for more details."
         
-        send_email_async(
+        queue_email(
             subject=subject,
             message=body,
             recipient_list=[message.receiver.email]
         )
+
+    @action(detail=True, methods=['get'])
+    def thread(self, request, pk=None):
+        """Returns the whole conversation containing this message as a nested tree."""
+        message = self.get_object()
+        thread = MessageThread.load(message.pk, user=request.user)
+        serializer = self.get_serializer(thread.messages, many=True)
+        return Response({
+            'count': len(thread.messages),
+            'results': thread.nest(serializer.data),
+        })
+
     @action(detail=True, methods=['post'])
     def send_to_email(self, request, pk=None):
         return Response({'status': 'Email forwarding via Google is not yet implemented.'}, status=status.HTTP_501_NOT_IMPLEMENTED)
 
-class EventViewSet(viewsets.ModelViewSet):
+class EventViewSet(ChangesFeedMixin, ConditionalGetMixin, SparseQuerysetMixin, viewsets.ModelViewSet):
     serializer_class = EventSerializer
     permission_classes = [permissions.IsAuthenticated]
+    cursor_ordering = ('start_date', 'id')
 
     def get_queryset(self):
-        user = self.request.user
-        queryset = Event.objects.select_related('owner', 'linked_project').prefetch_related('attendees').all()
-        if user.role in ['Admin', 'Director', 'Deputy Director', 'Innovation Officer', 'Data Analyst']:
-            return queryset
-        return queryset.filter(Q(owner=user) | Q(attendees=user) | Q(linked_project__lead=user) | Q(linked_project__team=user)).distinct()
-
-    def _sync_to_google(self, event):
-        service = GoogleCalendarService(event.owner)
-        if service.is_authenticated():
-            try:
-                service.sync_event(event)
-            except Exception as e:
-                # Log error but allow local save to succeed so we don't block the UI
-                print(f"Failed to sync to Google Calendar: {e}")
+        queryset = self.with_relations(Event.objects.all())
+        return ProjectScope.for_request(self.request).filter_events(queryset)
 
+    # Google Calendar sync runs in a Celery job after commit, so a slow Google
+    # response never holds the request; rapid edits coalesce into one batch.
     def perform_create(self, serializer):
         event = serializer.save()
-        self._sync_to_google(event)
+        schedule_event_sync(event)
         self._send_event_invites(event, is_update=False)
+        self.conflicts = event_conflicts(event)
 
     def perform_update(self, serializer):
         event = serializer.save()
-        self._sync_to_google(event)
+        schedule_event_sync(event)
         self._send_event_invites(event, is_update=True)
+        self.conflicts = event_conflicts(event)
+
+    # Double bookings are reported, not refused: people often overlap on purpose
+    def create(self, request, *args, **kwargs):
+        response = super().create(request, *args, **kwargs)
+        response.data['conflicts'] = self.conflicts
+        return response
+
+    def update(self, request, *args, **kwargs):
+        response = super().update(request, *args, **kwargs)
+        response.data['conflicts'] = self.conflicts
+        return response
+
+    @action(detail=False, methods=['get'])
+    def availability(self, request):
+        """
+        Earliest common free slots for ``users`` (comma-separated ids) of ``duration``
+        minutes between ``start`` and ``end``, plus each user's busy intervals.
+        """
+        serializer = AvailabilityQuerySerializer(data=request.query_params)
+        if not serializer.is_valid():
+            return Response({'error': serializer.errors}, status=status.HTTP_400_BAD_REQUEST)
+        params = serializer.validated_data
+        users, start, end = params['users'], params['start'], params['end']
+        index = IntervalIndex.load(users, start, end)
+        slots = index.free_slots(
+            users, start, end, params['duration'], params['limit'], params['tz'], weekends=params['weekends']
+        )
+        return Response({
+            'start': start,
+            'end': end,
+            'slots': [{'start': slot_start, 'end': slot_end} for slot_start, slot_end in slots],
+            'busy': {
+                user_id: [{'start': busy_start, 'end': busy_end} for busy_start, busy_end in index.busy(user_id)]
+                for user_id in users
+            },
+        })
         
     def _send_event_invites(self, event, is_update=False):
         attendees = event.attendees.all()
@@ -180,30 +377,27 @@ class EventViewSet(viewsets.ModelViewSet):
         subject = f"{action} Event Invitation: {event.title}"
         body = f"Hello,\n\nYou have been invited to a {action.lower()} event.\n\nTitle: {event.title}\nDescription: {event.description}\nStart: {event.start_date}\nEnd: {event.end_date}\nLocation: {event.location}\n\nPlease check your dashboard for more details."
         
-        send_email_async(
+        queue_email(
             subject=subject,
             message=body,
             recipient_list=emails
         )
 
     def perform_destroy(self, instance):
-        service = GoogleCalendarService(instance.owner)
-        if getattr(instance, 'google_event_id', None) and service.is_authenticated():
-            try:
-                service.delete_event(instance.google_event_id)
-            except Exception as e:
-                print(f"Failed to delete from Google Calendar: {e}")
+        schedule_event_deletion(instance.owner_id, [instance.google_event_id])
         instance.delete()
 
 class InnovatorViewSet(viewsets.ModelViewSet):
     serializer_class = InnovatorSerializer
     permission_classes = [permissions.IsAuthenticated]
     queryset = Innovator.objects.all()
+    cursor_ordering = ('-created_at', '-id')
 
 class IdeaViewSet(viewsets.ModelViewSet):
     serializer_class = IdeaSerializer
     permission_classes = [permissions.IsAuthenticated]
     queryset = Idea.objects.all()
+    cursor_ordering = ('-created_at', '-id')
 
 from .models import Founder, FounderProject
 from .serializers import FounderSerializer, FounderProjectSerializer, InnovationOfficerFounderSummarySerializer
@@ -212,18 +406,21 @@ class FounderProfileViewSet(viewsets.ModelViewSet):
     queryset = Founder.objects.all()
     serializer_class = FounderSerializer
     permission_classes = [permissions.IsAuthenticated]
+    cursor_ordering = ('-created_at', '-id')
 
     def get_queryset(self):
         # A Founder should ideally only see their own profile unless they are an admin/officer
         user = self.request.user
+        queryset = Founder.objects.select_related('user').prefetch_related('projects')
         if user.role in ['Admin', 'Innovation Officer', 'Director']:
-            return Founder.objects.all()
-        return Founder.objects.filter(user=user)
+            return queryset
+        return queryset.filter(user=user)
 
 class FounderProjectViewSet(viewsets.ModelViewSet):
     queryset = FounderProject.objects.all()
     serializer_class = FounderProjectSerializer
     permission_classes = [permissions.IsAuthenticated]
+    cursor_ordering = ('-submission_date', '-id')
 
     def get_queryset(self):
         user = self.request.user
@@ -236,7 +433,7 @@ class FounderProjectViewSet(viewsets.ModelViewSet):
         founder = Founder.objects.get(user=self.request.user)
         serializer.save(founder=founder)
 
-class InnovationOfficerFounderViewSet(viewsets.ReadOnlyModelViewSet):
+class InnovationOfficerFounderViewSet(CachedListMixin, viewsets.ReadOnlyModelViewSet):
     """
     Optimized endpoint for the Innovation Officer dashboard.
     Uses prefetch_related for O(1) database queries on the list view.
@@ -244,6 +441,8 @@ class InnovationOfficerFounderViewSet(viewsets.ReadOnlyModelViewSet):
     queryset = Founder.objects.prefetch_related('projects').all()
     serializer_class = InnovationOfficerFounderSummarySerializer
     permission_classes = [permissions.IsAuthenticated]
+    cache_namespace = 'founders'
+    cursor_ordering = ('-created_at', '-id')
 
     def get_queryset(self):
         user = self.request.user
@@ -0,0 +1,69 @@
+"""
+Row-level visibility shared by the viewsets.
+
+Privileged roles see everything. Everyone else sees the projects they lead or
+are on the team of, plus whatever hangs off those projects. The user's project
+ids are resolved once per request with a single UNION query. Each viewset then
+filters with ``project_id IN (...)`` and EXISTS subqueries instead of OR-joining
+across the ``team`` M2M and de-duplicating with DISTINCT.
+"""
+from django.db.models import Exists, OuterRef, Q
+from django.utils.functional import cached_property
+from .models import Project, Output, Event
+
+PRIVILEGED_ROLES = ('Admin', 'Director', 'Deputy Director', 'Innovation Officer', 'Data Analyst')
+
+
+class ProjectScope:
+    def __init__(self, user):
+        self.user = user
+        self.unrestricted = user.role in PRIVILEGED_ROLES
+
+    @classmethod
+    def for_request(cls, request):
+        """Return the scope for ``request.user``, computing it at most once per request."""
+        scope = getattr(request, '_project_scope', None)
+        if scope is None or scope.user.pk != request.user.pk:
+            scope = cls(request.user)
+            request._project_scope = scope
+        return scope
+
+    @property
+    def cache_key(self):
+        """Users sharing a cache key see exactly the same rows."""
+        return 'all' if self.unrestricted else f'user:{self.user.pk}'
+
+    @cached_property
+    def project_ids(self):
+        led = Project.objects.filter(lead=self.user).values_list('id', flat=True)
+        member = Project.team.through.objects.filter(user=self.user).values_list('project_id', flat=True)
+        return frozenset(led.union(member))
+
+    def filter_projects(self, queryset):
+        if self.unrestricted:
+            return queryset
+        return queryset.filter(pk__in=self.project_ids)
+
+    def filter_tasks(self, queryset):
+        if self.unrestricted:
+            return queryset
+        return queryset.filter(Q(assignee=self.user) | Q(project_id__in=self.project_ids))
+
+    def filter_partners(self, queryset):
+        if self.unrestricted:
+            return queryset
+        return queryset.filter(project_id__in=self.project_ids)
+
+    def filter_outputs(self, queryset):
+        if self.unrestricted:
+            return queryset
+        authored = Output.authors.through.objects.filter(output_id=OuterRef('pk'), user=self.user)
+        return queryset.filter(Q(project_id__in=self.project_ids) | Exists(authored))
+
+    def filter_events(self, queryset):
+        if self.unrestricted:
+            return queryset
+        attending = Event.attendees.through.objects.filter(event_id=OuterRef('pk'), user=self.user)
+        return queryset.filter(
+            Q(owner=self.user) | Q(linked_project_id__in=self.project_ids) | Exists(attending)
+        )
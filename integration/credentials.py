@@ -0,0 +1,178 @@
+"""
+Cached, self-refreshing Google OAuth credentials.
+
+``CredentialManager.get(user)`` keeps rehydrated ``Credentials`` in process
+memory, backed by the shared cache, so event operations do not read
+``GoogleCredentials`` from the database each time. Access tokens are refreshed
+with the stored refresh token shortly before they expire. A per-user lock makes
+the refresh single-flight: concurrent requests in one process share a single
+refresh, and other processes wait for the refreshed token to appear in the
+shared cache. Whoever takes the lock first re-reads the shared cache and the
+database, so a refresh that another process just finished is not repeated.
+Refreshed tokens are written back to ``creds_json``. A failed refresh is not
+retried for ``REFRESH_FAILURE_BACKOFF`` seconds, so an outage or a revoked
+grant doesn't add a token request to every call.
+"""
+import json
+import logging
+import threading
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+from django.core.cache import cache
+from django.utils import timezone
+from google.auth.transport.requests import Request
+from google.oauth2.credentials import Credentials
+from .models import GoogleCredentials
+
+logger = logging.getLogger(__name__)
+
+# Refresh this long before Google's one-hour access token actually expires
+REFRESH_MARGIN = timedelta(minutes=5)
+# How long a process trusts its in-memory copy before re-reading the shared cache
+LOCAL_TTL = 60
+SHARED_TTL = 60 * 60
+REFRESH_LOCK_TIMEOUT = 30
+# How long to wait for another process that is already refreshing
+REFRESH_WAIT_SECONDS = 5
+# After a failed refresh, keep using the old token this long before asking Google again
+REFRESH_FAILURE_BACKOFF = 60
+# Refresh locks are striped by user id, so their number stays fixed
+REFRESH_LOCK_STRIPES = 64
+
+# Cached in place of credentials for users who never connected Google
+NOT_CONNECTED = False
+
+
+def _utcnow():
+    # google-auth stores expiry as a naive UTC datetime
+    return datetime.now(dt_timezone.utc).replace(tzinfo=None)
+
+
+class CredentialManager:
+    _process_cache = {}
+    _process_lock = threading.Lock()
+    _refresh_locks = [threading.Lock() for _ in range(REFRESH_LOCK_STRIPES)]
+
+    @staticmethod
+    def _cache_key(user_id):
+        return f'gcal:creds:{user_id}'
+
+    @staticmethod
+    def _lock_key(user_id):
+        return f'gcal:creds-refresh:{user_id}'
+
+    @staticmethod
+    def _failure_key(user_id):
+        return f'gcal:creds-refresh-failed-until:{user_id}'
+
+    @classmethod
+    def get(cls, user):
+        """Return usable ``Credentials`` for ``user``, or None if they never connected Google."""
+        found, creds = cls._from_process(user.pk)
+        if not found:
+            info = cache.get(cls._cache_key(user.pk))
+            if info is None:
+                info = cls._load(user.pk)
+                cache.set(cls._cache_key(user.pk), info, SHARED_TTL)
+            creds = Credentials.from_authorized_user_info(info) if info else None
+            cls._remember(user.pk, creds)
+
+        if creds is not None and cls._needs_refresh(creds) and not cache.get(cls._failure_key(user.pk)):
+            creds = cls._refresh(user.pk, creds)
+        return creds
+
+    @classmethod
+    def invalidate(cls, user_id):
+        with cls._process_lock:
+            cls._process_cache.pop(user_id, None)
+        cache.delete_many([cls._cache_key(user_id), cls._failure_key(user_id)])
+
+    @staticmethod
+    def _load(user_id):
+        info = GoogleCredentials.objects.filter(user_id=user_id).values_list('creds_json', flat=True).first()
+        return info or NOT_CONNECTED
+
+    @classmethod
+    def _from_process(cls, user_id):
+        entry = cls._process_cache.get(user_id)
+        if entry is None or entry[0] < time.monotonic():
+            return False, None
+        return True, entry[1]
+
+    @classmethod
+    def _remember(cls, user_id, creds):
+        with cls._process_lock:
+            cls._process_cache[user_id] = (time.monotonic() + LOCAL_TTL, creds)
+
+    @staticmethod
+    def _needs_refresh(creds):
+        if not creds.refresh_token:
+            return False
+        return not creds.token or creds.expiry is None or creds.expiry - REFRESH_MARGIN <= _utcnow()
+
+    @classmethod
+    def _user_lock(cls, user_id):
+        return cls._refresh_locks[hash(user_id) % REFRESH_LOCK_STRIPES]
+
+    @classmethod
+    def _published(cls, user_id):
+        """Credentials that no longer need a refresh, from the shared cache or else the database."""
+        for source in (lambda: cache.get(cls._cache_key(user_id)), lambda: cls._load(user_id)):
+            info = source()
+            if info:
+                fresh = Credentials.from_authorized_user_info(info)
+                if not cls._needs_refresh(fresh):
+                    return info, fresh
+        return None, None
+
+    @classmethod
+    def _refresh(cls, user_id, creds):
+        with cls._user_lock(user_id):
+            # Another thread may have refreshed while this one waited for the lock
+            found, current = cls._from_process(user_id)
+            if found and current is not None and not cls._needs_refresh(current):
+                return current
+
+            if not cache.add(cls._lock_key(user_id), True, timeout=REFRESH_LOCK_TIMEOUT):
+                return cls._await_refresh(user_id, creds)
+
+            try:
+                # Another process may have refreshed before this one got the lock
+                info, fresh = cls._published(user_id)
+                if fresh is not None:
+                    cache.set(cls._cache_key(user_id), info, SHARED_TTL)
+                    cls._remember(user_id, fresh)
+                    return fresh
+                creds.refresh(Request())
+            except Exception as e:
+                logger.error(
+                    f"Failed to refresh Google credentials for user {user_id}, "
+                    f"retrying in {REFRESH_FAILURE_BACKOFF}s: {e}"
+                )
+                cache.set(cls._failure_key(user_id), time.time() + REFRESH_FAILURE_BACKOFF, REFRESH_FAILURE_BACKOFF)
+                return creds
+            else:
+                info = json.loads(creds.to_json())
+                GoogleCredentials.objects.filter(user_id=user_id).update(
+                    token=creds.token, refresh_token=creds.refresh_token,
+                    creds_json=info, updated_at=timezone.now(),
+                )
+                cache.set(cls._cache_key(user_id), info, SHARED_TTL)
+                cls._remember(user_id, creds)
+                return creds
+            finally:
+                cache.delete(cls._lock_key(user_id))
+
+    @classmethod
+    def _await_refresh(cls, user_id, creds):
+        """Wait for the process holding the refresh lock to publish the new token."""
+        deadline = time.monotonic() + REFRESH_WAIT_SECONDS
+        while time.monotonic() < deadline:
+            time.sleep(0.25)
+            info = cache.get(cls._cache_key(user_id))
+            if info:
+                fresh = Credentials.from_authorized_user_info(info)
+                if not cls._needs_refresh(fresh):
+                    cls._remember(user_id, fresh)
+                    return fresh
+        return creds
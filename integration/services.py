@@ -1,9 +1,45 @@
 import os
-from google.oauth2.credentials import Credentials
-from googleapiclient.discovery import build
-from .models import GoogleCredentials
-from django.conf import settings
-from datetime import datetime
+import json
+import threading
+from collections import OrderedDict
+from functools import lru_cache, partial
+import httplib2
+from google_auth_httplib2 import AuthorizedHttp
+from googleapiclient.discovery import build_from_document
+from googleapiclient.discovery_cache import get_static_doc
+from googleapiclient.errors import HttpError
+from django.db.models import prefetch_related_objects
+from .credentials import CredentialManager
+
+# Seconds to wait on a Google API socket before giving up
+GOOGLE_API_TIMEOUT = int(os.getenv('GOOGLE_API_TIMEOUT', '10'))
+# Google recommends at most 50 calls per batch request
+BATCH_LIMIT = 50
+# API clients kept per worker thread; the least recently used user's is dropped
+MAX_CACHED_CLIENTS = 32
+
+# httplib2 connections are not thread-safe, so each worker thread keeps its own
+# pooled connection and the API clients built on top of it.
+_local = threading.local()
+
+
+@lru_cache(maxsize=1)
+def _calendar_discovery_document():
+    """The Calendar v3 discovery document, parsed once per worker process."""
+    return json.loads(get_static_doc('calendar', 'v3'))
+
+
+def _pooled_http():
+    http = getattr(_local, 'http', None)
+    if http is None:
+        http = _local.http = httplib2.Http(timeout=GOOGLE_API_TIMEOUT)
+    return http
+
+
+def _chunks(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
 
 class GoogleCalendarService:
     def __init__(self, user):
@@ -11,34 +47,37 @@ class GoogleCalendarService:
         Initialize the service with a specific user's GoogleCredentials.
         """
         self.user = user
-        self.creds = None
-        
-        try:
-            google_creds = GoogleCredentials.objects.get(user=self.user)
-            if google_creds.creds_json:
-                self.creds = Credentials.from_authorized_user_info(google_creds.creds_json)
-        except GoogleCredentials.DoesNotExist:
-            self.creds = None
+        # Cached per process/Redis and refreshed before expiry; see CredentialManager
+        self.creds = CredentialManager.get(user)
 
     def is_authenticated(self):
         return self.creds is not None and self.creds.valid
 
-    def sync_event(self, event_data):
+    def _client(self):
         """
-        Sync a local Event model to Google Calendar.
+        Calendar API client for this user, reused across calls on this thread for
+        as long as the credentials object stays the same. Revoked or replaced
+        credentials are never matched again and age out of the LRU.
         """
-        if not self.is_authenticated():
-            raise Exception(f"User {self.user.username} is not authenticated with Google Calendar.")
+        clients = getattr(_local, 'clients', None)
+        if clients is None:
+            clients = _local.clients = OrderedDict()
+        cached = clients.get(self.user.pk)
+        if cached is not None and cached[0] is self.creds:
+            clients.move_to_end(self.user.pk)
+            return cached[1]
 
-        service = build('calendar', 'v3', credentials=self.creds)
-        
-        # Prepare attendees
-        attendees = []
-        if event_data.attendees.exists():
-            for attendee in event_data.attendees.all():
-                attendees.append({'email': attendee.email})
+        http = AuthorizedHttp(self.creds, http=_pooled_http())
+        client = build_from_document(_calendar_discovery_document(), http=http)
+        clients[self.user.pk] = (self.creds, client)
+        clients.move_to_end(self.user.pk)
+        while len(clients) > MAX_CACHED_CLIENTS:
+            clients.popitem(last=False)
+        return client
 
-        event_body = {
+    @staticmethod
+    def _event_body(event_data):
+        return {
             'summary': event_data.title,
             'location': event_data.location,
             'description': event_data.description,
@@ -50,40 +89,131 @@ class GoogleCalendarService:
                 'dateTime': event_data.end_date.isoformat(),
                 'timeZone': 'UTC',
             },
-            'attendees': attendees,
+            'attendees': [{'email': attendee.email} for attendee in event_data.attendees.all()],
         }
 
+    @staticmethod
+    def _apply_remote(event_data, event):
+        event_data.google_event_id = event.get('id')
+        event_data.google_calendar_link = event.get('htmlLink')
+
+    def sync_event(self, event_data):
+        """
+        Sync a local Event model to Google Calendar.
+        """
+        if not self.is_authenticated():
+            raise Exception(f"User {self.user.username} is not authenticated with Google Calendar.")
+
+        events = self._client().events()
+        event_body = self._event_body(event_data)
+
         # If it already has a Google Event ID, update it. Otherwise, create new.
         if event_data.google_event_id:
             try:
-                event = service.events().update(
-                    calendarId='primary', 
-                    eventId=event_data.google_event_id, 
+                event = events.update(
+                    calendarId='primary',
+                    eventId=event_data.google_event_id,
                     body=event_body
                 ).execute()
-            except Exception as e:
+            except Exception:
                 # Fallback to create if the ID is invalid or deleted remotely
-                event = service.events().insert(calendarId='primary', body=event_body).execute()
+                event = events.insert(calendarId='primary', body=event_body).execute()
         else:
-            event = service.events().insert(calendarId='primary', body=event_body).execute()
+            event = events.insert(calendarId='primary', body=event_body).execute()
 
         # Update the local Event record with Google's identifiers
-        event_data.google_event_id = event.get('id')
-        event_data.google_calendar_link = event.get('htmlLink')
-        event_data.save()
-        
+        self._apply_remote(event_data, event)
+        event_data.save(update_fields=['google_event_id', 'google_calendar_link'])
+
         return event
 
+    def sync_events(self, events_data):
+        """
+        Sync many local Events using Google batch requests (up to BATCH_LIMIT
+        calls per HTTP round trip). Returns ``{event.pk: remote event or exception}``.
+        """
+        if not self.is_authenticated():
+            raise Exception(f"User {self.user.username} is not authenticated with Google Calendar.")
+
+        events_data = list(events_data)
+        prefetch_related_objects(events_data, 'attendees')
+        client = self._client()
+        events = client.events()
+        results = {}
+        stale = []
+
+        def collect(event_data, request_id, response, exception):
+            if exception is None:
+                results[event_data.pk] = response
+            elif event_data.google_event_id and isinstance(exception, HttpError) and exception.resp.status in (404, 410):
+                # Deleted remotely: recreate it in the follow-up batch
+                stale.append(event_data)
+            else:
+                results[event_data.pk] = exception
+
+        def run(pairs):
+            for chunk in _chunks(pairs, BATCH_LIMIT):
+                batch = client.new_batch_http_request()
+                for event_data, request in chunk:
+                    batch.add(request, callback=partial(collect, event_data), request_id=str(event_data.pk))
+                batch.execute()
+
+        pairs = []
+        for event_data in events_data:
+            body = self._event_body(event_data)
+            if event_data.google_event_id:
+                request = events.update(calendarId='primary', eventId=event_data.google_event_id, body=body)
+            else:
+                request = events.insert(calendarId='primary', body=body)
+            pairs.append((event_data, request))
+        run(pairs)
+
+        if stale:
+            run([(event_data, events.insert(calendarId='primary', body=self._event_body(event_data))) for event_data in stale])
+
+        synced = []
+        for event_data in events_data:
+            remote = results.get(event_data.pk)
+            if isinstance(remote, dict):
+                self._apply_remote(event_data, remote)
+                synced.append(event_data)
+        if synced:
+            type(synced[0]).objects.bulk_update(synced, ['google_event_id', 'google_calendar_link'])
+
+        return results
+
     def delete_event(self, google_event_id):
         """
         Delete an event from Google Calendar.
         """
         if not self.is_authenticated() or not google_event_id:
             return False
-            
-        service = build('calendar', 'v3', credentials=self.creds)
+
         try:
-            service.events().delete(calendarId='primary', eventId=google_event_id).execute()
+            self._client().events().delete(calendarId='primary', eventId=google_event_id).execute()
             return True
         except Exception:
             return False
+
+    def delete_events(self, google_event_ids):
+        """
+        Delete many Google Calendar events in batch requests.
+        Returns the set of ids that were removed.
+        """
+        google_event_ids = [event_id for event_id in google_event_ids if event_id]
+        if not self.is_authenticated() or not google_event_ids:
+            return set()
+
+        client = self._client()
+        deleted = set()
+
+        def collect(request_id, response, exception):
+            if exception is None:
+                deleted.add(request_id)
+
+        for chunk in _chunks(google_event_ids, BATCH_LIMIT):
+            batch = client.new_batch_http_request(callback=collect)
+            for event_id in chunk:
+                batch.add(client.events().delete(calendarId='primary', eventId=event_id), request_id=event_id)
+            batch.execute()
+        return deleted
@@ -0,0 +1,9 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .models import GoogleCredentials
+from .credentials import CredentialManager
+
+
+@receiver([post_save, post_delete], sender=GoogleCredentials)
+def invalidate_cached_credentials(sender, instance, **kwargs):
+    CredentialManager.invalidate(instance.user_id)
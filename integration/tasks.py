@@ -0,0 +1,134 @@
+import logging
+from celery import shared_task
+from django.core.cache import cache
+from django.db import transaction
+from .services import GoogleCalendarService
+
+logger = logging.getLogger(__name__)
+
+# Edits to an owner's events within this window share one batched remote sync
+SYNC_COALESCE_SECONDS = 5
+# Upper bound on how long one sync may hold an owner's lock
+SYNC_LOCK_TIMEOUT = 120
+
+
+def _pending_key(owner_id):
+    return f'gcal:sync-pending:{owner_id}'
+
+
+def _lock_key(owner_id):
+    return f'gcal:sync-lock:{owner_id}'
+
+
+def schedule_event_sync(event):
+    """
+    Flag ``event`` for a Google Calendar sync and queue its owner's sync job
+    once the current transaction commits. The first edit schedules a delayed
+    job; edits to any of the owner's events inside the coalescing window are
+    absorbed by it, since the job pushes every flagged event in one batch.
+    """
+    type(event).objects.filter(pk=event.pk).update(google_sync_pending=True)
+    owner_id = event.owner_id
+
+    def enqueue():
+        if not cache.add(_pending_key(owner_id), True, timeout=SYNC_COALESCE_SECONDS):
+            return
+        try:
+            sync_events_to_google.apply_async(args=[owner_id], countdown=SYNC_COALESCE_SECONDS)
+        except Exception as e:
+            cache.delete(_pending_key(owner_id))
+            logger.error(f"Could not enqueue Google Calendar sync for user {owner_id}: {e}")
+
+    transaction.on_commit(enqueue)
+
+
+def schedule_event_deletion(owner_id, google_event_ids):
+    """Queue removal of Google Calendar events once the current transaction commits."""
+    google_event_ids = [event_id for event_id in google_event_ids if event_id]
+
+    def enqueue():
+        try:
+            delete_google_events.delay(owner_id, google_event_ids)
+        except Exception as e:
+            logger.error(f"Could not enqueue Google Calendar deletion of {google_event_ids}: {e}")
+
+    if google_event_ids:
+        transaction.on_commit(enqueue)
+
+
+@shared_task(bind=True, max_retries=3, default_retry_delay=30)
+def sync_events_to_google(self, owner_id):
+    """
+    Pushes the current state of every flagged Event of ``owner_id`` to their
+    Google Calendar, batching the calls, and stores the returned
+    google_event_id / google_calendar_link.
+    """
+    from core.models import Event, User
+
+    # Two jobs inserting the same new event at once would create duplicates remotely
+    if not cache.add(_lock_key(owner_id), True, timeout=SYNC_LOCK_TIMEOUT):
+        raise self.retry(countdown=SYNC_COALESCE_SECONDS)
+
+    try:
+        owner = User.objects.filter(pk=owner_id).first()
+        if owner is None:
+            return f"User {owner_id} no longer exists."
+
+        service = GoogleCalendarService(owner)
+        if not service.is_authenticated():
+            return f"User {owner_id} is not connected to Google Calendar."
+
+        pending = Event.objects.filter(owner_id=owner_id, google_sync_pending=True)
+        event_ids = list(pending.values_list('id', flat=True))
+        if not event_ids:
+            return f"Nothing to sync for user {owner_id}."
+        # Cleared before the events are read, so an edit landing mid-sync flags its event again
+        Event.objects.filter(pk__in=event_ids).update(google_sync_pending=False)
+        events = list(Event.objects.filter(pk__in=event_ids).prefetch_related('attendees'))
+
+        try:
+            if len(events) == 1:
+                # A lone edit skips the multipart batch envelope
+                service.sync_event(events[0])
+                failed = []
+            else:
+                results = service.sync_events(events)
+                failed = [event_id for event_id, remote in results.items() if isinstance(remote, Exception)]
+        except Exception as exc:
+            Event.objects.filter(pk__in=event_ids).update(google_sync_pending=True)
+            logger.error(f"Error syncing events of user {owner_id} to Google Calendar: {exc}")
+            raise self.retry(exc=exc)
+        if failed:
+            Event.objects.filter(pk__in=failed).update(google_sync_pending=True)
+            logger.error(f"Could not sync events {failed} of user {owner_id} to Google Calendar.")
+            raise self.retry()
+        logger.info(f"Synced {len(events)} event(s) of user {owner_id} to Google Calendar.")
+        return f"{len(events)} event(s) synced."
+    finally:
+        cache.delete(_lock_key(owner_id))
+
+
+@shared_task(bind=True, max_retries=3, default_retry_delay=30)
+def delete_google_events(self, owner_id, google_event_ids):
+    """
+    Removes deleted Events from their owner's Google Calendar, batching the
+    calls. A retry only repeats the deletions that failed.
+    """
+    from core.models import User
+
+    owner = User.objects.filter(pk=owner_id).first()
+    if owner is None:
+        return f"Owner {owner_id} no longer exists."
+
+    service = GoogleCalendarService(owner)
+    if not service.is_authenticated():
+        return f"Owner {owner_id} is not connected to Google Calendar."
+
+    if len(google_event_ids) == 1:
+        deleted = set(google_event_ids) if service.delete_event(google_event_ids[0]) else set()
+    else:
+        deleted = service.delete_events(google_event_ids)
+    remaining = [event_id for event_id in google_event_ids if event_id not in deleted]
+    if remaining:
+        raise self.retry(args=[owner_id, remaining])
+    return f"{len(google_event_ids)} Google event(s) deleted."
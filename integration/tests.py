@@ -0,0 +1,179 @@
+import json
+from datetime import datetime, timedelta
+from unittest import mock
+from django.core.cache import cache
+from django.test import TestCase
+from core.models import User
+from .credentials import CredentialManager
+from .models import GoogleCredentials
+
+
+def _creds_json(expires_in):
+    expiry = datetime.utcnow() + expires_in
+    return {
+        'token': 'access', 'refresh_token': 'refresh', 'token_uri': 'https://oauth2.googleapis.com/token',
+        'client_id': 'client', 'client_secret': 'secret', 'expiry': expiry.isoformat(),
+    }
+
+
+class CredentialManagerTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        CredentialManager._process_cache.clear()
+        self.user = User.objects.create_user(username='owner', email='owner@test.com', role='Director')
+
+    def test_credentials_are_cached_after_first_load(self):
+        GoogleCredentials.objects.create(user=self.user, token='access', creds_json=_creds_json(timedelta(hours=1)))
+        self.assertTrue(CredentialManager.get(self.user).valid)
+        with self.assertNumQueries(0):
+            self.assertTrue(CredentialManager.get(self.user).valid)
+
+    def test_expiring_token_is_refreshed_once_and_persisted(self):
+        GoogleCredentials.objects.create(user=self.user, token='access', creds_json=_creds_json(timedelta(minutes=1)))
+
+        def refresh(creds, request):
+            creds.token = 'renewed'
+            creds.expiry = datetime.utcnow() + timedelta(hours=1)
+
+        with mock.patch('google.oauth2.credentials.Credentials.refresh', autospec=True, side_effect=refresh) as patched:
+            self.assertEqual(CredentialManager.get(self.user).token, 'renewed')
+            self.assertEqual(CredentialManager.get(self.user).token, 'renewed')
+        self.assertEqual(patched.call_count, 1)
+        stored = GoogleCredentials.objects.get(user=self.user)
+        self.assertEqual((stored.token, stored.creds_json['token']), ('renewed', 'renewed'))
+
+    def test_failed_refresh_backs_off(self):
+        GoogleCredentials.objects.create(user=self.user, token='access', creds_json=_creds_json(timedelta(minutes=1)))
+        with mock.patch('google.oauth2.credentials.Credentials.refresh', side_effect=OSError('down')) as patched, \
+                self.assertLogs('integration.credentials', level='ERROR'):
+            self.assertEqual(CredentialManager.get(self.user).token, 'access')
+            self.assertEqual(CredentialManager.get(self.user).token, 'access')
+        self.assertEqual(patched.call_count, 1)
+
+    def test_refresh_already_stored_by_another_process_is_reused(self):
+        from google.oauth2.credentials import Credentials
+        stale = _creds_json(timedelta(minutes=1))
+        GoogleCredentials.objects.create(user=self.user, token='access', creds_json=stale)
+        # This process still holds the old token; another one has since refreshed and saved it
+        CredentialManager._remember(self.user.pk, Credentials.from_authorized_user_info(stale))
+        GoogleCredentials.objects.filter(user=self.user).update(
+            creds_json=dict(_creds_json(timedelta(hours=1)), token='renewed')
+        )
+
+        with mock.patch('google.oauth2.credentials.Credentials.refresh') as patched:
+            self.assertEqual(CredentialManager.get(self.user).token, 'renewed')
+        patched.assert_not_called()
+        self.assertEqual(cache.get(CredentialManager._cache_key(self.user.pk))['token'], 'renewed')
+
+
+class FakeBatchHttp:
+    """
+    Stands in for httplib2.Http: answers each part of a batch request with the
+    next of ``statuses``, echoing the part's Content-ID as Google does.
+    """
+    def __init__(self, statuses):
+        self.statuses = list(statuses)
+        self.requests = []
+
+    def request(self, uri, method='GET', body=None, headers=None, **kwargs):
+        import httplib2
+        import re
+        self.requests.append((uri, body))
+        body = body.decode() if isinstance(body, bytes) else body
+        parts = []
+        for content_id in re.findall(r'Content-ID: <(.+?)>', body):
+            status = self.statuses.pop(0)
+            payload = json.dumps({'id': f'remote-{len(self.requests)}-{len(parts)}', 'htmlLink': 'https://calendar/e'}) \
+                if status == 200 else json.dumps({'error': {'code': status, 'message': 'Not Found'}})
+            parts.append(
+                '--batch_boundary\r\nContent-Type: application/http\r\n'
+                f'Content-ID: <response-{content_id}>\r\n\r\n'
+                f'HTTP/1.1 {status} OK\r\nContent-Type: application/json\r\n\r\n{payload}\r\n'
+            )
+        response = httplib2.Response({'status': 200, 'content-type': 'multipart/mixed; boundary=batch_boundary'})
+        return response, (''.join(parts) + '--batch_boundary--').encode()
+
+
+class GoogleCalendarServiceTests(TestCase):
+    def setUp(self):
+        from google.oauth2.credentials import Credentials
+        from . import services
+        cache.clear()
+        services._local.__dict__.clear()
+        self.owner = User.objects.create_user(username='owner', email='owner@test.com', role='Director')
+        self.creds = Credentials(token='access')
+        patcher = mock.patch.object(CredentialManager, 'get', return_value=self.creds)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _event(self, **kwargs):
+        from django.utils import timezone
+        from core.models import Event
+        return Event.objects.create(
+            title='Sync', start_date=timezone.now(), end_date=timezone.now() + timedelta(hours=1),
+            category='Meeting', owner=self.owner, **kwargs
+        )
+
+    def test_discovery_document_is_parsed_once_and_clients_reused_per_thread(self):
+        import threading
+        from . import services
+        services._calendar_discovery_document.cache_clear()
+        with mock.patch('integration.services.get_static_doc', wraps=services.get_static_doc) as load:
+            client = services.GoogleCalendarService(self.owner)._client()
+            self.assertIs(services.GoogleCalendarService(self.owner)._client(), client)
+            other = []
+            thread = threading.Thread(target=lambda: other.append(services.GoogleCalendarService(self.owner)._client()))
+            thread.start()
+            thread.join()
+        self.assertIsNot(other[0], client)
+        self.assertEqual(load.call_count, 1)
+
+    def test_client_cache_is_bounded(self):
+        from . import services
+        with mock.patch.object(services, 'MAX_CACHED_CLIENTS', 2):
+            for index in range(3):
+                user = User.objects.create_user(username=f'user{index}', email=f'user{index}@test.com', role='Director')
+                services.GoogleCalendarService(user)._client()
+        self.assertEqual(len(services._local.clients), 2)
+
+    def test_sync_events_sends_one_batch_and_recreates_remotely_deleted_events(self):
+        from . import services
+        created, stale = self._event(), self._event(google_event_id='gone')
+        http = FakeBatchHttp([200, 404, 200])
+        with mock.patch.object(services, '_pooled_http', return_value=http):
+            results = services.GoogleCalendarService(self.owner).sync_events([created, stale])
+
+        # The 404 on update is retried as an insert in a follow-up batch
+        self.assertEqual(len(http.requests), 2)
+        self.assertTrue(all(uri.endswith('/batch/calendar/v3') for uri, _ in http.requests))
+        self.assertEqual(set(results), {created.pk, stale.pk})
+        created.refresh_from_db()
+        stale.refresh_from_db()
+        self.assertEqual((created.google_event_id, stale.google_event_id), ('remote-1-0', 'remote-2-0'))
+
+    def test_sync_job_pushes_every_flagged_event_of_the_owner(self):
+        from core.models import Event
+        from . import services
+        from .tasks import sync_events_to_google
+        events = [self._event(google_sync_pending=True) for _ in range(3)]
+        self._event()
+        http = FakeBatchHttp([200, 200, 200])
+        with mock.patch.object(services, '_pooled_http', return_value=http):
+            sync_events_to_google.run(self.owner.pk)
+
+        self.assertEqual(len(http.requests), 1)
+        self.assertFalse(Event.objects.filter(google_sync_pending=True).exists())
+        self.assertEqual(
+            Event.objects.filter(pk__in=[event.pk for event in events], google_event_id__isnull=False).count(), 3
+        )
+
+    def test_deletion_job_batches_and_retries_only_failures(self):
+        from . import services
+        from .tasks import delete_google_events
+        http = FakeBatchHttp([200, 404])
+        with mock.patch.object(services, '_pooled_http', return_value=http), \
+                mock.patch.object(delete_google_events, 'retry', side_effect=RuntimeError('retry')) as retry:
+            with self.assertRaises(RuntimeError):
+                delete_google_events.run(self.owner.pk, ['a', 'b'])
+        self.assertEqual(len(http.requests), 1)
+        retry.assert_called_once_with(args=[self.owner.pk, ['b']])
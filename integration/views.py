@@ -134,7 +134,9 @@ class GoogleCallbackView(APIView):
                 'token_uri': credentials.token_uri,
                 'client_id': credentials.client_id,
                 'client_secret': credentials.client_secret,
-                'scopes': credentials.scopes
+                'scopes': credentials.scopes,
+                # Without an expiry the token is treated as already expired on reload
+                'expiry': credentials.expiry.isoformat() if credentials.expiry else None,
             }
             
             google_creds.save()
@@ -3,66 +3,58 @@ import django
 from django.utils import timezone
 from datetime import date, datetime
 
+SEED_PASSWORD = 'password123'
+
+USERS_DATA = [
+    {'username': 'director', 'name': 'Dr. Caroline Ayuya', 'email': 'director@drice.ac.ke', 'role': 'Director', 'avatar': 'CA'},
+    {'username': 'deputy', 'name': 'Dr. Japheth Mursi', 'email': 'deputydirector@drice.ac.ke', 'role': 'Deputy Director', 'avatar': 'JM'},
+    {'username': 'admin', 'name': 'Philipe Tinega', 'email': 'admin@drice.ac.ke', 'role': 'Admin', 'avatar': 'PT'},
+    {'username': 'innovation', 'name': 'John Nderitu', 'email': 'innovation@drice.ac.ke', 'role': 'Innovation Officer', 'avatar': 'JN'},
+    {'username': 'researcher', 'name': 'Vivian Angula', 'email': 'researcher2@drice.ac.ke', 'role': 'Research Assistant', 'avatar': 'VA'},
+    {'username': 'analyst', 'name': 'Catherine Matu', 'email': 'analyst@drice.ac.ke', 'role': 'Data Analyst', 'avatar': 'CM'},
+    {'username': 'karina', 'name': 'Karina Mureithi', 'email': 'researcher3@drice.ac.ke', 'role': 'Research Assistant', 'avatar': 'KM'},
+    {'username': 'boyani', 'name': 'Maryleen Boyani', 'email': 'researcher1@drice.ac.ke','role': 'Research Assistant', 'avatar': 'MB'},
+    {'username': 'cathy', 'name': 'Catherine Matu', 'email': 'cathy@drice.ac.ke','role': 'Data Analyst', 'avatar': 'CM'},
+    {'username': 'kemunto', 'name': 'Kemunto', 'email': 'kemunto@drice.ac.ke','role': 'Research Assistant', 'avatar': 'KM'},
+    {'username': 'faith', 'name': 'Faith', 'email': 'faith@drice.ac.ke','role': 'Research Assistant', 'avatar': 'FA'},
+    {'username': 'founder', 'name': 'Daystar Founder', 'email': 'user@daystar.ac.ke', 'role': 'Research Assistant', 'avatar': 'DF'},
+]
+
 def seed():
-    from core.models import User, Project, Partner, Task, SubTask, Output, Message, Event
+    from django.db import transaction
+    from core.seeding import BulkLoader
+
+    # Hashes the shared password once for every seeded account
+    loader = BulkLoader(SEED_PASSWORD)
+    with transaction.atomic():
+        load(loader)
+    print("Rebuilding search index...")
+    loader.finish()
+    print_credentials()
+
+def load(loader):
+    from core.models import User, Project, Partner, Task, Output, Event, Founder, FounderProject
 
-    # Clear existing data in reverse order of dependencies
-    from core.models import User, Project, Partner, Task, SubTask, Output, Message, Event, Idea, Innovator, Founder, FounderProject
-    
     print("Clearing existing data...")
-    # Delete all objects that reference User, in dependency order
-    FounderProject.objects.all().delete()
-    Message.objects.all().delete()
-    SubTask.objects.all().delete()
-    Task.objects.all().delete()
-    Output.objects.all().delete()
-    Partner.objects.all().delete()
-    Event.objects.all().delete()
-    Innovator.objects.all().delete()
-    Idea.objects.all().delete()
-    Project.objects.all().delete()
-    
-    # Delete Founder objects that reference non-superuser accounts
-    non_superuser_ids = User.objects.exclude(is_superuser=True).values_list('id', flat=True)
-    Founder.objects.filter(user_id__in=non_superuser_ids).delete()
-    
-    # Now delete users (this should work since Founder references are gone)
-    User.objects.exclude(is_superuser=True).delete()
-    
-    # Clean up any remaining Founder objects
-    Founder.objects.all().delete()
+    # Truncates every seeded table and removes all non-superuser accounts
+    loader.truncate()
 
     print("Seeding Users...")
-    users_data = [
-        {'username': 'director', 'name': 'Dr. Caroline Ayuya', 'email': 'director@drice.ac.ke', 'role': 'Director', 'avatar': 'CA'},
-        {'username': 'deputy', 'name': 'Dr. Japheth Mursi', 'email': 'deputydirector@drice.ac.ke', 'role': 'Deputy Director', 'avatar': 'JM'},
-        {'username': 'admin', 'name': 'Philipe Tinega', 'email': 'admin@drice.ac.ke', 'role': 'Admin', 'avatar': 'PT'},
-        {'username': 'innovation', 'name': 'John Nderitu', 'email': 'innovation@drice.ac.ke', 'role': 'Innovation Officer', 'avatar': 'JN'},
-        {'username': 'researcher', 'name': 'Vivian Angula', 'email': 'researcher2@drice.ac.ke', 'role': 'Research Assistant', 'avatar': 'VA'},
-        {'username': 'analyst', 'name': 'Catherine Matu', 'email': 'analyst@drice.ac.ke', 'role': 'Data Analyst', 'avatar': 'CM'},
-        {'username': 'karina', 'name': 'Karina Mureithi', 'email': 'researcher3@drice.ac.ke', 'role': 'Research Assistant', 'avatar': 'KM'},
-        {'username': 'boyani', 'name': 'Maryleen Boyani', 'email': 'researcher1@drice.ac.ke','role': 'Research Assistant', 'avatar': 'MB'},
-        {'username': 'cathy', 'name': 'Catherine Matu', 'email': 'cathy@drice.ac.ke','role': 'Data Analyst', 'avatar': 'CM'},
-        {'username': 'kemunto', 'name': 'Kemunto', 'email': 'kemunto@drice.ac.ke','role': 'Research Assistant', 'avatar': 'KM'},
-        {'username': 'faith', 'name': 'Faith', 'email': 'faith@drice.ac.ke','role': 'Research Assistant', 'avatar': 'FA'},
-        {'username': 'founder', 'name': 'Daystar Founder', 'email': 'user@daystar.ac.ke', 'role': 'Research Assistant', 'avatar': 'DF'},
-    ]
-    
-    user_map = {}
-    for u in users_data:
+    users = []
+    for u in USERS_DATA:
         names = u['name'].split(' ')
         first_name = names[0]
         last_name = ' '.join(names[1:]) if len(names) > 1 else ''
-        user = User.objects.create_user(
+        users.append(User(
             username=u['email'],
             email=u['email'],
-            password='password123',
             first_name=first_name,
             last_name=last_name,
             role=u['role'],
             avatar=u['avatar']
-        )
-        user_map[u['username']] = user
+        ))
+    loader.users(users)
+    user_map = {u['username']: user for u, user in zip(USERS_DATA, users)}
 
     print("Seeding Projects...")
     projects_data = [
@@ -78,9 +70,8 @@ def seed():
         {'id': 10, 'title': 'Healthcare AI Policy', 'type': 'Research', 'status': 'Planning', 'lead': 'deputy', 'team': ['karina', 'kemunto', 'faith', 'researcher'], 'start': '2026-05-01', 'end': '2027-05-01', 'budget': 150000, 'progress': 15},
     ]
     
-    project_map = {}
-    for p in projects_data:
-        proj = Project.objects.create(
+    projects = loader.insert(Project, [
+        Project(
             id=p['id'],
             title=p['title'],
             project_type=p['type'],
@@ -91,9 +82,10 @@ def seed():
             budget=p['budget'],
             progress=p['progress']
         )
-        for member in p['team']:
-            proj.team.add(user_map[member])
-        project_map[p['id']] = proj
+        for p in projects_data
+    ])
+    loader.link(Project.team, [(p['id'], user_map[member].id) for p in projects_data for member in p['team']])
+    project_map = {proj.id: proj for proj in projects}
 
     print("Seeding Partners...")
     partners_data = [
@@ -101,8 +93,8 @@ def seed():
         {'name': 'Safaricom Foundation', 'sector': 'Industry', 'contact': 'Alice Muthoni', 'email': 'alice@safaricom.co.ke', 'engagement': 'High', 'project_id': 3},
         {'name': 'Ministry of Agriculture', 'sector': 'Govt', 'contact': 'Peter Omondi', 'email': 'pomondi@agri.go.ke', 'engagement': 'Medium', 'project_id': 2},
     ]
-    for part in partners_data:
-        Partner.objects.create(
+    loader.insert(Partner, [
+        Partner(
             name=part['name'],
             sector=part['sector'],
             contact=part['contact'],
@@ -110,6 +102,8 @@ def seed():
             engagement=part['engagement'],
             project=project_map[part['project_id']]
         )
+        for part in partners_data
+    ])
 
     print("Seeding Tasks...")
     tasks_data = [
@@ -119,8 +113,8 @@ def seed():
         {'id': 4, 'project_id': 2, 'title': 'Finalize Grant Proposal', 'assignee': 'innovation', 'due': '2026-02-25', 'status': 'To Do', 'priority': 'Urgent'},
         {'id': 5, 'project_id': 5, 'title': 'Traffic Data Analysis', 'assignee': 'analyst', 'due': '2026-06-01', 'status': 'To Do', 'priority': 'Medium'},
     ]
-    for t in tasks_data:
-        Task.objects.create(
+    loader.insert(Task, [
+        Task(
             id=t['id'],
             project=project_map[t['project_id']],
             title=t['title'],
@@ -129,6 +123,8 @@ def seed():
             status=t['status'],
             priority=t['priority']
         )
+        for t in tasks_data
+    ])
 
     print("Seeding Outputs...")
     outputs_data = [
@@ -173,8 +169,8 @@ def seed():
             'resource_type': 'Report'
         }
     ]
-    for o in outputs_data:
-        out = Output.objects.create(
+    outputs = loader.insert(Output, [
+        Output(
             project=project_map[o['project_id']],
             output_type=o['type'],
             title=o['title'],
@@ -183,8 +179,11 @@ def seed():
             resource_url=o['resource_url'],
             resource_type=o['resource_type']
         )
-        for author in o['authors']:
-            out.authors.add(user_map[author])
+        for o in outputs_data
+    ])
+    loader.link(Output.authors, [
+        (out.id, user_map[author].id) for o, out in zip(outputs_data, outputs) for author in o['authors']
+    ])
 
     print("Seeding Events...")
     # Based on eventSeeds.js
@@ -250,8 +249,8 @@ def seed():
             'attendees': ['director', 'deputy', 'cathy', 'karina', 'boyani', 'kemunto', 'faith', 'innovation', 'analyst']
         }
     ]
-    for ev in events_data:
-        event = Event.objects.create(
+    events = loader.insert(Event, [
+        Event(
             title=ev['title'],
             description=ev['description'],
             start_date=ev['start'],
@@ -260,17 +259,20 @@ def seed():
             pipeline_stage=ev['stage'],
             owner=user_map[ev['owner']]
         )
-        for att in ev['attendees']:
-            event.attendees.add(user_map[att])
+        for ev in events_data
+    ])
+    loader.link(Event.attendees, [
+        (event.id, user_map[att].id) for ev, event in zip(events_data, events) for att in ev['attendees']
+    ])
 
     print("Seeding Founders...")
     founder_user = user_map['founder']
-    founder_profile = Founder.objects.create(
+    founder_profile, = loader.insert(Founder, [Founder(
         user=founder_user,
         name='Daystar Founder',
         email='user@daystar.ac.ke',
         bio='Experienced entrepreneur building innovative tech solutions.'
-    )
+    )])
 
     print("Seeding Founder Projects...")
     founder_projects_data = [
@@ -278,22 +280,25 @@ def seed():
         {'name': 'HealthSync', 'desc': 'Rural health clinic data synchronization platform', 'stage': 'Ideation'},
         {'name': 'EcoWallet', 'desc': 'Mobile payment for recycling management', 'stage': 'Seed'},
     ]
-    for fp in founder_projects_data:
-        FounderProject.objects.create(
+    loader.insert(FounderProject, [
+        FounderProject(
             founder=founder_profile,
             project_name=fp['name'],
             description=fp['desc'],
             stage=fp['stage']
         )
+        for fp in founder_projects_data
+    ])
 
+def print_credentials():
     print("\nDatabase seeded successfully!")
     print("\n" + "="*50)
     print("USER LOGIN CREDENTIALS")
     print("="*50)
     print(f"{'Role':<20} | {'Email/Username':<25} | {'Password'}")
     print("-" * 65)
-    for u in users_data:
-        print(f"{u['role']:<20} | {u['email']:<25} | password123")
+    for u in USERS_DATA:
+        print(f"{u['role']:<20} | {u['email']:<25} | {SEED_PASSWORD}")
     print("="*65 + "\n")
 
 if __name__ == '__main__':
@@ -6,13 +6,13 @@ from django.utils import timezone
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
 django.setup()
 
+from django.db import transaction
 from core.models import User, Founder, FounderProject
+from core.seeding import BulkLoader
 
-def seed_founders():
-    print("Clearing old founder data (if any)...")
-    FounderProject.objects.all().delete()
-    Founder.objects.all().delete()
+FOUNDER_PASSWORD = "founder123"
 
+def seed_founders():
     founders_data = [
         {
             "username": "founder_a",
@@ -52,37 +52,46 @@ def seed_founders():
         }
     ]
 
-    for data in founders_data:
-        user_obj, created = User.objects.get_or_create(username=data["username"], defaults={
-            "email": data["email"],
-            "first_name": data["name"].split()[0],
-            "last_name": data["name"].split()[-1] if len(data["name"].split()) > 1 else "",
-            "role": "Research Assistant",
-            "force_password_change": False
-        })
-        if created:
-            user_obj.set_password("founder123")
-            user_obj.save()
+    loader = BulkLoader(FOUNDER_PASSWORD)
+    with transaction.atomic():
+        print("Clearing old founder data (if any)...")
+        loader.truncate([FounderProject, Founder], users=False)
 
-        # Update if exists
-        user_obj.force_password_change = False
-        user_obj.save()
+        # Founder accounts are kept between runs; only missing ones are created
+        usernames = [data["username"] for data in founders_data]
+        user_map = {user.username: user for user in User.objects.filter(username__in=usernames)}
+        loader.users([
+            User(
+                username=data["username"],
+                email=data["email"],
+                first_name=data["name"].split()[0],
+                last_name=data["name"].split()[-1] if len(data["name"].split()) > 1 else "",
+                role="Research Assistant",
+                force_password_change=False
+            )
+            for data in founders_data if data["username"] not in user_map
+        ])
+        User.objects.filter(username__in=usernames).update(force_password_change=False)
+        user_map = {user.username: user for user in User.objects.filter(username__in=usernames)}
 
-        founder, f_created = Founder.objects.get_or_create(user=user_obj, defaults={
-            "name": data["name"],
-            "email": data["email"],
-            "bio": data["bio"]
-        })
+        founders = loader.insert(Founder, [
+            Founder(user=user_map[data["username"]], name=data["name"], email=data["email"], bio=data["bio"])
+            for data in founders_data
+        ])
 
-        for p_data in data["projects"]:
-            proj = FounderProject.objects.create(
+        now = timezone.now()
+        # The loader keeps the backdated submission dates
+        loader.insert(FounderProject, [
+            FounderProject(
                 founder=founder,
                 project_name=p_data["name"],
                 description=p_data["desc"],
-                stage=p_data["stage"]
+                stage=p_data["stage"],
+                submission_date=now - timedelta(days=p_data["offset_days"])
             )
-            proj.submission_date = timezone.now() - timedelta(days=p_data["offset_days"])
-            proj.save()
+            for data, founder in zip(founders_data, founders) for p_data in data["projects"]
+        ])
+    loader.finish(index=False)
 
     print("Successfully seeded 4 founders and their projects.")
 